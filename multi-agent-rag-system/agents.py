@@ -0,0 +1,237 @@
+import time
+
+from langchain_core.prompts import PromptTemplate
+from langchain_core.runnables import RunnableLambda
+from langgraph.graph import StateGraph
+
+from tracing import span
+
+ROUTE_PROMPT = PromptTemplate.from_template(
+    "Classify the query into one of [web, rag, llm]:\n\n{history}Query: {query}\n\nAnswer:"
+)
+SUMMARY_PROMPT = PromptTemplate.from_template(
+    "Summarize clearly and concisely. Keep any 'Sources:' line at the end unchanged:\n\n{content}"
+)
+
+
+def with_history(history, query):
+    """``query`` prefixed with the bounded conversation context, if there is any."""
+    if not history:
+        return query
+    return f"Conversation so far:\n{history}\n\nCurrent question: {query}"
+
+
+def format_citations(docs):
+    seen = []
+    for doc in docs:
+        # Near-duplicate chunks are indexed once and list their other sources.
+        for meta in [doc.metadata, *doc.metadata.get("duplicates", [])]:
+            source = meta.get("source", "unknown")
+            page = meta.get("page")
+            label = f"{source} (p. {page})" if page else source
+            if label not in seen:
+                seen.append(label)
+    return ", ".join(seen)
+
+
+class AgentGraph:
+    """Router -> web/rag/llm -> summarizer workflow, compiled once per process.
+
+    The compiled graph and the stuff-documents QA chain are stateless between
+    invocations, so one instance is shared by every session.
+
+    With a ``router.QueryRouter`` the route is picked locally and the LLM
+    classifier below is only its low-confidence fallback. With a
+    ``context.ContextAssembler`` the retrieved candidates are cut down to a
+    diverse, token-budgeted subset before they reach the QA prompt. With a
+    ``summary_policy.SummaryPolicy`` short or latency-sensitive answers skip
+    the summarizer's LLM call; without one every answer is summarized. With
+    a ``web_index.WebResultIndex`` web results are kept per session and
+    follow-up web queries on the same topic are answered from them.
+
+    For follow-up questions the state carries ``history`` (the conversation
+    so far, bounded) and ``search_query`` (the question made standalone for
+    retrieval and search); prompts get the history, indexes the search query.
+    """
+
+    def __init__(self, llm, search, router=None, context=None, summary_policy=None, web_index=None):
+        self.llm = llm
+        self.search = search
+        self.router = router
+        self.context = context
+        self.summary_policy = summary_policy
+        self.web_index = web_index
+        if router is not None:
+            router.fallback = self.llm_route
+        self._qa_chain = None
+        self.app = self._compile()
+
+    @property
+    def qa_chain(self):
+        # langchain.chains is only imported on the first RAG query; web and
+        # LLM-only answers never load it.
+        if self._qa_chain is None:
+            from langchain.chains.question_answering import load_qa_chain
+
+            self._qa_chain = load_qa_chain(self.llm, chain_type="stuff")
+        return self._qa_chain
+
+    # ---------------------- AGENTS ----------------------
+    def llm_route(self, query, history=None):
+        history = f"Conversation so far:\n{history}\n\n" if history else ""
+        route_result = (ROUTE_PROMPT | self.llm).invoke({"query": query, "history": history}).content.lower()
+        route = "llm"
+        if "web" in route_result:
+            route = "web"
+        elif "rag" in route_result:
+            route = "rag"
+        return route
+
+    def router_agent(self, state):
+        query = state.get("query", "")
+        history = state.get("history")
+        if self.router is None:
+            return {**state, "route": self.llm_route(query, history)}
+        decision = self.router.route(state.get("search_query", query), state.get("retriever"), history)
+        return {**state, "route": decision.route, "route_decision": decision}
+
+    @staticmethod
+    def retrieve(retriever, query):
+        """``(docs, path)``; ``path`` is ``None`` for retrievers that do not report one."""
+        if hasattr(retriever, "retrieve"):
+            return retriever.retrieve(query)
+        return retriever.get_relevant_documents(query), None
+
+    @staticmethod
+    def prefetched(state, branch, compute):
+        """Result of a speculative task started for ``branch``, else compute it now."""
+        task = state.get("prefetch", {}).get(branch)
+        return task.result() if task is not None else compute()
+
+    def web_agent(self, state):
+        query = state.get("search_query", state["query"])
+        session = state.get("session") if self.web_index is not None else None
+        if session is not None:
+            with span("web_index", kind="cache") as s:
+                hits = self.web_index.lookup(session, query)
+                s.set(cache_hit=hits is not None, chunks=len(hits or ()))
+            if hits is not None:
+                return {**state, "content": " ".join(hits), "web_source": "index"}
+        try:
+            result = self.prefetched(state, "web", lambda: self.search.run(query))
+        except Exception as e:
+            return {**state, "content": f"Web search failed: {str(e)}"}
+        if session is not None:
+            self.web_index.add(session, result)
+        return {**state, "content": result, "web_source": "search"}
+
+    def rag_agent(self, state):
+        query = state.get("search_query", state["query"])
+        retriever = state["retriever"]
+        with span("retrieve", kind="retrieval") as s:
+            docs, path = self.prefetched(state, "rag", lambda: self.retrieve(retriever, query))
+            s.set(docs=len(docs), path=path, prefetched="rag" in state.get("prefetch", {}))
+        if self.context is not None:
+            docs = self.context.select(query, docs, lexical=path == "lexical")
+        question = with_history(state.get("history"), state["query"])
+        answer = self.qa_chain.run(input_documents=docs, question=question)
+        citations = format_citations(docs)
+        if citations:
+            answer = f"{answer}\n\nSources: {citations}"
+        return {**state, "content": answer}
+
+    def llm_agent(self, state):
+        response = self.llm.invoke(with_history(state.get("history"), state["query"]))
+        return {**state, "content": response.content}
+
+    def summarizer_agent(self, state):
+        content = state["content"]
+        on_token = state.get("on_token")
+        policy = self.summary_policy
+        decision = None
+        if policy is not None:
+            decision = policy.decide(state["route"], content, state.get("preference"))
+            if decision.action != "summarize":
+                final = policy.apply(decision, content)
+                if on_token is not None:
+                    on_token(final)
+                return {**state, "final": final, "summary_decision": decision}
+
+        started = time.perf_counter()
+        chain = SUMMARY_PROMPT | self.llm
+        if on_token is None:
+            summary = chain.invoke({"content": content}).content
+        else:
+            parts = []
+            for chunk in chain.stream({"content": content}):
+                parts.append(chunk.content)
+                on_token(chunk.content)
+            summary = "".join(parts)
+        if decision is not None:
+            policy.observe(decision.tokens, time.perf_counter() - started)
+        return {**state, "final": summary, "summary_decision": decision}
+
+    # ---------------------- LANGGRAPH ----------------------
+    @staticmethod
+    def _node(name, agent):
+        def run(state):
+            with span(name) as s:
+                result = agent(state)
+                s.set(route=result.get("route"))
+                if result.get("route_decision") is not None:
+                    s.set(decided_by=result["route_decision"].source)
+                if result.get("summary_decision") is not None:
+                    s.set(summary=result["summary_decision"].action)
+                return result
+        return RunnableLambda(run)
+
+    def _compile(self):
+        workflow = StateGraph(dict)
+        workflow.add_node("router", self._node("router_agent", self.router_agent))
+        workflow.add_node("web", self._node("web_agent", self.web_agent))
+        workflow.add_node("rag", self._node("rag_agent", self.rag_agent))
+        workflow.add_node("llm", self._node("llm_agent", self.llm_agent))
+        workflow.add_node("summarizer", self._node("summarizer_agent", self.summarizer_agent))
+        workflow.set_entry_point("router")
+
+        def router_logic(state): return state["route"]
+        workflow.add_conditional_edges("router", router_logic, {
+            "web": "web",
+            "rag": "rag",
+            "llm": "llm"
+        })
+
+        for node in ["web", "rag", "llm"]:
+            workflow.add_edge(node, "summarizer")
+
+        workflow.set_finish_point("summarizer")
+        return workflow.compile()
+
+    def invoke(self, user_query, retriever, prefetch=None, on_token=None, preference=None, session=None,
+               history=None, search_query=None):
+        """Run the graph and return its final state (``route``, ``content``, ``final``...).
+
+        ``on_token`` is called with each piece of the final answer as the
+        summarizer streams it (once with the whole answer when the summarizer
+        is bypassed). ``preference`` is the latency preference passed to the
+        summary policy (``fast``, ``balanced`` or ``quality``). ``session``
+        scopes the web result index; without it nothing is indexed.
+        ``history`` and ``search_query`` come from ``conversation.Conversation``.
+        """
+        state = {"query": user_query, "retriever": retriever}
+        if prefetch:
+            state["prefetch"] = prefetch
+        if on_token is not None:
+            state["on_token"] = on_token
+        if preference is not None:
+            state["preference"] = preference
+        if session is not None:
+            state["session"] = session
+        if history:
+            state["history"] = history
+        if search_query is not None and search_query != user_query:
+            state["search_query"] = search_query
+        return self.app.invoke(state)
+
+    def run(self, user_query, retriever, prefetch=None):
+        return self.invoke(user_query, retriever, prefetch)["final"]
@@ -0,0 +1,196 @@
+"""Selectable FAISS index types (flat, IVF, HNSW) and an offline auto-tuner.
+
+The persisted flat index stays the source of truth; an ANN index is derived
+from its vectors for serving. Tune against the chunk set already on disk,
+without any API calls:
+
+    python ann_index.py --index-dir .index_store --recall 0.95 --k 4
+
+Recall is measured with held-out chunk vectors as queries (removed from the
+indexes being measured), or with real query vectors saved as a ``.npy``
+array via ``--query-vectors``.
+"""
+import argparse
+import json
+import os
+import shutil
+import time
+
+import faiss
+import numpy as np
+
+DEFAULT_CONFIG_PATH = os.getenv("ANN_CONFIG_PATH", "ann_config.json")
+FLAT = {"type": "flat"}
+
+
+def load_config(path=DEFAULT_CONFIG_PATH):
+    """The tuned config, overridden by ``ANN_INDEX`` (flat/ivf/hnsw) if set."""
+    config = dict(FLAT)
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            config = json.load(f)
+    kind = os.getenv("ANN_INDEX")
+    if kind and kind != config.get("type"):
+        config = {"type": kind}
+    return config
+
+
+def flat_vectors(index):
+    return index.reconstruct_n(0, index.ntotal).astype(np.float32)
+
+
+def build_index(vectors, config):
+    """Build a FAISS index of ``config["type"]`` over ``vectors`` (row order preserved)."""
+    n, dim = vectors.shape
+    kind = config.get("type", "flat")
+    if kind == "flat":
+        index = faiss.IndexFlatL2(dim)
+    elif kind == "ivf":
+        # FAISS wants ~39 training points per list.
+        nlist = max(1, min(config.get("nlist", int(4 * np.sqrt(n))), n // 39))
+        index = faiss.IndexIVFFlat(faiss.IndexFlatL2(dim), dim, nlist)
+        index.train(vectors)
+        index.nprobe = min(config.get("nprobe", 8), nlist)
+    elif kind == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, config.get("M", 32))
+        index.hnsw.efConstruction = config.get("efConstruction", 80)
+        index.hnsw.efSearch = config.get("efSearch", 64)
+    else:
+        raise ValueError(f"Unknown ANN index type: {kind}")
+    index.add(vectors)
+    return index
+
+
+def set_search_params(index, config):
+    if config["type"] == "ivf":
+        index.nprobe = config["nprobe"]
+    elif config["type"] == "hnsw":
+        index.hnsw.efSearch = config["efSearch"]
+
+
+def with_ann_index(db, config, cache_dir, version):
+    """Swap ``db``'s flat index for the configured ANN index, cached in ``cache_dir``."""
+    if config.get("type", "flat") == "flat":
+        return db
+    meta_path = os.path.join(cache_dir, "meta.json")
+    index_path = os.path.join(cache_dir, "index.faiss")
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        cached = meta == {"version": version, "config": config}
+    except (OSError, ValueError):
+        cached = False
+    if cached:
+        index = faiss.read_index(index_path)
+    else:
+        index = build_index(flat_vectors(db.index), config)
+        tmp = cache_dir + ".tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        faiss.write_index(index, os.path.join(tmp, "index.faiss"))
+        with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({"version": version, "config": config}, f)
+        shutil.rmtree(cache_dir, ignore_errors=True)
+        os.replace(tmp, cache_dir)
+    if config["type"] == "ivf":
+        # Lets the router read vectors back with reconstruct(); costs 8 bytes per vector.
+        index.make_direct_map()
+    db.index = index
+    return db
+
+
+# ---------------------- TUNING ----------------------
+def candidate_configs(n):
+    """Configs to try over ``n`` vectors, with ``nlist`` capped as ``build_index`` caps it."""
+    root = int(np.sqrt(n))
+    cap = max(1, n // 39)
+    for nlist in sorted({min(max(1, root), cap), min(max(1, 4 * root), cap)}):
+        for nprobe in (1, 4, 8, 16, 32, 64):
+            if nprobe <= nlist:
+                yield {"type": "ivf", "nlist": nlist, "nprobe": nprobe}
+    for m in (16, 32):
+        for ef in (16, 32, 64, 128, 256):
+            yield {"type": "hnsw", "M": m, "efConstruction": 80, "efSearch": ef}
+
+
+def measure(index, queries, truth, k):
+    latencies, hits = [], 0
+    for query, expected in zip(queries, truth):
+        started = time.perf_counter()
+        _, found = index.search(query[None, :], k)
+        latencies.append((time.perf_counter() - started) * 1000)
+        hits += len(expected & set(found[0].tolist()))
+    latencies.sort()
+    return {
+        "recall": hits / (k * len(queries)),
+        "p50_ms": latencies[len(latencies) // 2],
+        "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))],
+    }
+
+
+def held_out(vectors, n_queries=200, seed=0):
+    """Split ``vectors`` into ``(indexed, queries)``; queries are at most a fifth of the rows.
+
+    Queries that are themselves in the index find their own vector first,
+    which overstates recall; held-out rows do not.
+    """
+    n_queries = max(1, min(n_queries, len(vectors) // 5))
+    order = np.random.default_rng(seed).permutation(len(vectors))
+    return vectors[np.sort(order[n_queries:])], vectors[order[:n_queries]]
+
+
+def tune(vectors, queries, k=4, recall_target=0.95):
+    """Return ``(best_config, results)``; best is the lowest-p50 config meeting the target.
+
+    ``queries`` must not be rows of ``vectors`` (see ``held_out``).
+    """
+    queries = np.ascontiguousarray(queries, dtype=np.float32)
+
+    flat = build_index(vectors, FLAT)
+    _, exact = flat.search(queries, k)
+    truth = [set(row.tolist()) for row in exact]
+    results = [(dict(FLAT), measure(flat, queries, truth, k))]
+
+    built = {}
+    for config in candidate_configs(len(vectors)):
+        structure = tuple((key, value) for key, value in config.items() if key not in ("nprobe", "efSearch"))
+        if structure not in built:
+            built[structure] = build_index(vectors, config)
+        index = built[structure]
+        set_search_params(index, config)
+        results.append((config, measure(index, queries, truth, k)))
+
+    passing = [(config, stats) for config, stats in results if stats["recall"] >= recall_target]
+    best = min(passing, key=lambda item: (item[1]["p50_ms"], item[1]["p99_ms"]))[0]
+    return best, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pick the fastest ANN index that meets a recall target.")
+    parser.add_argument("--index-dir", default=os.getenv("INDEX_DIR", ".index_store"))
+    parser.add_argument("--recall", type=float, default=0.95)
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--queries", type=int, default=200, help="chunk vectors held out as queries")
+    parser.add_argument("--query-vectors", help="real query vectors (.npy, shape [n, dim]) instead of held-out chunks")
+    parser.add_argument("--out", default=DEFAULT_CONFIG_PATH)
+    args = parser.parse_args()
+
+    vectors = flat_vectors(faiss.read_index(os.path.join(args.index_dir, "index.faiss")))
+    if args.query_vectors:
+        queries = np.load(args.query_vectors)
+    else:
+        vectors, queries = held_out(vectors, args.queries)
+    print(f"Tuning over {len(vectors)} vectors (dim {vectors.shape[1]}) with {len(queries)} queries, "
+          f"recall@{args.k} >= {args.recall}")
+    best, results = tune(vectors, queries, k=args.k, recall_target=args.recall)
+    for config, stats in results:
+        marker = "*" if config == best else " "
+        print(f"{marker} {json.dumps(config):<70} recall {stats['recall']:.3f} · "
+              f"p50 {stats['p50_ms']:.3f} ms · p99 {stats['p99_ms']:.3f} ms")
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(best, f)
+    print(f"Wrote {args.out}: {best}")
+
+
+if __name__ == "__main__":
+    main()
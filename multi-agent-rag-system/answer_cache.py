@@ -0,0 +1,135 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import numpy as np
+
+
+@dataclass
+class CachedAnswer:
+    query: str
+    answer: str
+    vector: np.ndarray
+    created: float
+    latency: float
+    ttl: float
+
+
+class SemanticAnswerCache:
+    """Final answers keyed by query embedding.
+
+    A lookup hits when a stored query's cosine similarity is at least
+    ``threshold`` and the entry is younger than its ``ttl`` (``ttl`` seconds
+    unless ``store`` was given another). Entries are
+    evicted least-recently-used beyond ``max_entries``, and the whole cache is
+    dropped whenever the document index version changes. Entries stored
+    without a vector (queries the index answers lexically, never embedded)
+    only match their exact text through ``lookup_text``.
+    """
+
+    def __init__(self, embeddings, threshold=0.95, ttl=3600, max_entries=500):
+        self.embeddings = embeddings
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+        self._entries = OrderedDict()
+        self._matrix = None
+        self._keys = []
+        self._version = None
+        self._lock = threading.Lock()
+
+    def embed(self, query):
+        vector = np.asarray(self.embeddings.embed_query(query), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def lookup(self, vector, version):
+        """Return the cached answer for a unit query ``vector``, or ``None``."""
+        with self._lock:
+            self._check_version(version)
+            self._expire()
+            if not self._entries:
+                self.misses += 1
+                return None
+            if self._matrix is None:
+                self._keys = [key for key, entry in self._entries.items() if entry.vector is not None]
+                vectors = [self._entries[key].vector for key in self._keys]
+                self._matrix = np.stack(vectors) if vectors else np.empty((0, len(vector)), dtype=np.float32)
+            if not self._keys:
+                self.misses += 1
+                return None
+            sims = self._matrix @ vector
+            best = int(np.argmax(sims))
+            if sims[best] < self.threshold:
+                self.misses += 1
+                return None
+            key = self._keys[best]
+            entry = self._entries[key]
+            # Only the LRU order moves; the stacked vectors stay valid.
+            self._entries.move_to_end(key)
+            self.hits += 1
+            self.saved_seconds += entry.latency
+            return entry.answer
+
+    def lookup_text(self, query, version):
+        """Return the cached answer stored for exactly ``query``, or ``None``; embeds nothing."""
+        with self._lock:
+            self._check_version(version)
+            self._expire()
+            entry = self._entries.get(query)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(query)
+            self.hits += 1
+            self.saved_seconds += entry.latency
+            return entry.answer
+
+    def store(self, query, vector, answer, latency, version, ttl=None):
+        """Cache ``answer``; ``vector`` may be ``None`` to match only the exact ``query``.
+
+        ``ttl`` overrides the cache-wide one for this entry; ``0`` stores nothing.
+        """
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._check_version(version)
+            self._entries.pop(query, None)
+            self._entries[query] = CachedAnswer(query, answer, vector, time.time(), latency, ttl)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._matrix = None
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+            self._matrix = None
+
+    def _check_version(self, version):
+        if version != self._version:
+            self._entries.clear()
+            self._matrix = None
+            self._version = version
+
+    def _expire(self):
+        now = time.time()
+        expired = [key for key, entry in self._entries.items() if entry.created < now - entry.ttl]
+        for key in expired:
+            del self._entries[key]
+        if expired:
+            self._matrix = None
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "saved_seconds": self.saved_seconds,
+        }
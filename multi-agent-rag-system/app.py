@@ -1,126 +1,53 @@
 import os
+import uuid
 import streamlit as st
-import pdfplumber
-from docx import Document as DocxDocument
-
-from langchain_community.vectorstores import FAISS
-from langchain.docstore.document import Document
-from langchain.chains import RetrievalQA
-from langchain.prompts import PromptTemplate
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langgraph.graph import StateGraph
-from langchain_core.runnables import RunnableLambda
-
-from langchain_google_genai import ChatGoogleGenerativeAI, GoogleGenerativeAIEmbeddings
-from langchain_community.tools import DuckDuckGoSearchRun
-from dotenv import load_dotenv
-load_dotenv()
-# ---------------------- CONFIGURATION ----------------------
-GOOGLE_API_KEY = os.getenv("GEMINI_API_KEY")
-
-if not GOOGLE_API_KEY:
-    raise ValueError("GOOGLE_API_KEY not found in environment variables")
-
-llm = ChatGoogleGenerativeAI(model="gemini-1.5-flash", temperature=0.2, google_api_key=GOOGLE_API_KEY)
-embeddings = GoogleGenerativeAIEmbeddings(model="models/embedding-001", google_api_key=GOOGLE_API_KEY)
-text_splitter = RecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=50)
-search = DuckDuckGoSearchRun()
-
-# ---------------------- FILE PARSER ----------------------
-def extract_text_from_local_path(path):
-    if path.endswith(".pdf"):
-        with pdfplumber.open(path) as pdf:
-            return "\n".join([page.extract_text() for page in pdf.pages if page.extract_text()])
-    elif path.endswith(".txt"):
-        with open(path, "r", encoding="utf-8") as f:
-            return f.read()
-    elif path.endswith(".docx"):
-        doc = DocxDocument(path)
-        return "\n".join([p.text for p in doc.paragraphs])
-    return ""
-
-# ---------------------- VECTOR STORE / RETRIEVER ----------------------
-def build_retriever():
-    docs = []
-    if os.path.exists("my_docs"):
-        for fname in os.listdir("my_docs"):
-            fpath = os.path.join("my_docs", fname)
-            if fname.lower().endswith((".pdf", ".txt", ".docx")):
-                text = extract_text_from_local_path(fpath)
-                if text:
-                    for chunk in text_splitter.split_text(text):
-                        docs.append(Document(page_content=chunk, metadata={"source": fname}))
-    if docs:
-        db = FAISS.from_documents(docs, embeddings)
-        return db.as_retriever()
-    return None
-
-retriever = build_retriever()
-
-# ---------------------- AGENTS ----------------------
-def router_agent(state):
-    query = state.get("query", "")
-    route_prompt = PromptTemplate.from_template(
-        "Classify the query into one of [web, rag, llm]:\n\nQuery: {query}\n\nAnswer:"
-    )
-    route_result = (route_prompt | llm).invoke({"query": query}).content.lower()
-    route = "llm"
-    if "web" in route_result:
-        route = "web"
-    elif "rag" in route_result:
-        route = "rag"
-    return {**state, "route": route}
-
-def web_agent(state):
-    query = state["query"]
-    try:
-        result = search.run(query)
-        return {**state, "content": result}
-    except Exception as e:
-        return {**state, "content": f"Web search failed: {str(e)}"}
-
-def rag_agent(state):
-    query = state["query"]
-    retriever = state["retriever"]
-    qa_chain = RetrievalQA.from_chain_type(llm=llm, retriever=retriever)
-    answer = qa_chain.run(query)
-    return {**state, "content": answer}
-
-def llm_agent(state):
-    query = state["query"]
-    response = llm.invoke(query)
-    return {**state, "content": response.content}
-
-def summarizer_agent(state):
-    content = state["content"]
-    prompt = PromptTemplate.from_template("Summarize clearly and concisely:\n\n{content}")
-    summary = (prompt | llm).invoke({"content": content}).content
-    return {**state, "final": summary}
+
+# With RAG_SERVICE_URL set the page is a thin client of service.py; otherwise it
+# hosts the runtime (models, caches, indexes, graph) itself.
+SERVICE_URL = os.getenv("RAG_SERVICE_URL")
+
+# ---------------------- BACKEND ----------------------
+@st.cache_resource(show_spinner=False)
+def get_backend():
+    if SERVICE_URL:
+        from rag_client import RAGClient
+
+        return RAGClient(SERVICE_URL)
+    from runtime import Runtime
+
+    # Shared by every session. Models and the default collection load on a
+    # background thread so the page renders immediately; other collections
+    # load on their first question. Document changes are indexed by watcher
+    # threads and swapped in without blocking any request.
+    runtime = Runtime()
+    runtime.warm_up()
+    return runtime
+
+backend = get_backend()
 
 # ---------------------- LANGGRAPH ----------------------
-def run_langgraph(user_query, retriever):
-    workflow = StateGraph(dict)
-    workflow.set_entry_point("router")
-
-    workflow.add_node("router", RunnableLambda(router_agent))
-    workflow.add_node("web", RunnableLambda(web_agent))
-    workflow.add_node("rag", RunnableLambda(rag_agent))
-    workflow.add_node("llm", RunnableLambda(llm_agent))
-    workflow.add_node("summarizer", RunnableLambda(summarizer_agent))
-
-    def router_logic(state): return state["route"]
-    workflow.add_conditional_edges("router", router_logic, {
-        "web": "web",
-        "rag": "rag",
-        "llm": "llm"
-    })
-
-    for node in ["web", "rag", "llm"]:
-        workflow.add_edge(node, "summarizer")
-
-    workflow.set_finish_point("summarizer")
-    app = workflow.compile()
-    return app.invoke({"query": user_query, "retriever": retriever})["final"]
+def run_langgraph(user_query, collection="default", speculative=False, on_partial=None, preference=None):
+    # Conversation memory and fetched web results are kept per browser session,
+    # so follow-up questions can build on earlier ones.
+    session = st.session_state.setdefault("session_id", uuid.uuid4().hex)
+    if not SERVICE_URL:
+        with st.spinner("Loading knowledge base..."):
+            backend.wait_ready()
+        return backend.answer(
+            user_query, collection, speculative=speculative, preference=preference, session=session
+        )["answer"]
+    text = ""
+    for event in backend.stream(user_query, collection, speculative=speculative, preference=preference,
+                                session=session):
+        if "token" in event:
+            text += event["token"]
+            if on_partial is not None:
+                on_partial(text + "▌")
+        elif "error" in event:
+            raise RuntimeError(event["error"])
+        else:
+            return event["answer"]
+    raise RuntimeError("The RAG service closed the stream without an answer.")
 
 # ---------------------- STREAMLIT APP ----------------------
 # --- Custom CSS for modern look ---
@@ -186,12 +113,146 @@ st.sidebar.markdown(
 st.sidebar.markdown("---")
 
 # Document status in sidebar
-if os.path.exists("my_docs"):
-    doc_files = [f for f in os.listdir("my_docs") if f.lower().endswith((".pdf", ".txt", ".docx"))]
-    st.sidebar.success(f"📂 {len(doc_files)} document(s) found in 'my_docs'.")
-else:
+try:
+    collection_ids = backend.collection_ids()
+except Exception:
+    collection_ids = ["default"]
+collection = st.sidebar.selectbox(
+    "📂 Collection",
+    collection_ids,
+    help="'default' is the my_docs folder; each sub-folder of collections/ is a separate collection.",
+)
+try:
+    stats = backend.stats(collection)
+except Exception as e:
+    stats = None
+    st.sidebar.error(f"RAG service unavailable: {e}")
+
+if stats is not None and stats["warm_error"]:
+    st.sidebar.error(f"Startup failed: {stats['warm_error']}")
+elif stats is not None and not stats["ready"]:
+    st.sidebar.info("⏳ Loading models and the knowledge base in the background...")
+
+if stats is not None and stats["documents"] is not None:
+    folder = "my_docs" if collection == "default" else f"collections/{collection}"
+    st.sidebar.success(f"📂 {stats['documents']} document(s) found in '{folder}'.")
+    if stats["watch_error"]:
+        st.sidebar.warning(f"Index update failed: {stats['watch_error']}")
+    if stats["last_sync"]:
+        sync = stats["last_sync"]
+        st.sidebar.caption(
+            f"Index: {sync['added']} added · {sync['changed']} changed · "
+            f"{sync['removed']} removed · {sync['unchanged']} unchanged ({sync['seconds']:.1f}s)"
+        )
+        if sync["ingest"]:
+            st.sidebar.caption(f"Ingestion: {sync['ingest']}")
+        if sync.get("unsupported"):
+            st.sidebar.warning(
+                f"Skipped {len(sync['unsupported'])} file(s) with unsupported formats: "
+                + ", ".join(sync["unsupported"][:5])
+                + (" ..." if len(sync["unsupported"]) > 5 else "")
+            )
+        if sync.get("failed"):
+            st.sidebar.warning(
+                f"Could not read {len(sync['failed'])} file(s), will retry on the next change: "
+                + ", ".join(sync["failed"][:5])
+                + (" ..." if len(sync["failed"]) > 5 else "")
+            )
+elif stats is not None and collection != "default":
+    st.sidebar.info(f"Collection '{collection}' loads on its first question.")
+elif stats is not None and stats["ready"] and not stats["warm_error"]:
     st.sidebar.info("No 'my_docs' folder found. Using fallback knowledge base.")
 
+if stats is not None and stats["collections"]:
+    registry = stats["collections"]
+    st.sidebar.caption(
+        f"Collections: {len(registry['loaded'])} loaded · "
+        f"{sum(c['mb'] for c in registry['loaded']):.0f}/{registry['budget_mb']:.0f} MB · "
+        f"{registry['evictions']} evicted"
+    )
+
+if stats is not None and stats["embedding_cache"]:
+    cache = stats["embedding_cache"]
+    st.sidebar.caption(
+        f"Embedding cache: {cache['hits']} hits · {cache['misses']} misses "
+        f"({cache['hit_rate']:.0%}) · {cache['bytes'] / 1e6:.1f} MB"
+    )
+
+if stats is not None and stats["answer_cache"]:
+    answer_stats = stats["answer_cache"]
+    st.sidebar.caption(
+        f"Answer cache: {answer_stats['hit_rate']:.0%} hit rate ({answer_stats['hits']}/"
+        f"{answer_stats['hits'] + answer_stats['misses']}) · {answer_stats['saved_seconds']:.1f}s saved"
+    )
+
+if stats is not None and stats["web_search"]:
+    search_stats = stats["web_search"]
+    st.sidebar.caption(
+        f"Web search: {search_stats['hits']} cached · {search_stats['misses']} fetched · "
+        f"{search_stats['coalesced']} coalesced · {search_stats['errors']} failed"
+    )
+
+if stats is not None and stats["web_index"]:
+    web_stats = stats["web_index"]
+    st.sidebar.caption(
+        f"Web result index: {web_stats['hits']} follow-ups answered locally ({web_stats['hit_rate']:.0%}) · "
+        f"{web_stats['chunks']} chunks in {web_stats['sessions']} session(s) · {web_stats['mb']:.1f} MB"
+    )
+
+if stats is not None and stats["conversations"]:
+    memory_stats = stats["conversations"]
+    st.sidebar.caption(
+        f"Conversation memory: {memory_stats['sessions']} session(s) · {memory_stats['turns']} turns · "
+        f"{memory_stats['folds']} folded into summaries"
+    )
+
+speculative = st.sidebar.toggle(
+    "⚡ Speculative mode",
+    value=os.getenv("SPECULATIVE_MODE", "").lower() in ("1", "true", "yes"),
+    help="Start retrieval and web search while the router decides. Lower latency, more backend calls.",
+)
+if speculative and stats is not None and stats["speculative"]:
+    spec = stats["speculative"]
+    st.sidebar.caption(
+        f"Speculation: {spec['used']}/{spec['launched']} calls used · "
+        f"{spec['saved_seconds']:.1f}s saved · {spec['wasted']} wasted ({spec['wasted_seconds']:.1f}s) · "
+        f"{spec['cancelled']} cancelled · {spec['over_budget']} over budget"
+    )
+
+preference = st.sidebar.select_slider(
+    "🎯 Answer style",
+    options=["fast", "balanced", "quality"],
+    value=os.getenv("SUMMARY_PREFERENCE", "balanced"),
+    help="fast: return short answers as-is and trim long ones locally. "
+    "quality: always polish the answer with a summarization call.",
+)
+if stats is not None and stats["summary"]:
+    summary_stats = stats["summary"]
+    st.sidebar.caption(
+        f"Summarizer: {summary_stats.get('summarize', 0)} summarized · "
+        f"{summary_stats.get('truncate', 0)} truncated · {summary_stats.get('passthrough', 0)} passed through"
+    )
+
+with st.sidebar.expander("⏱️ Latency by step (last 200 queries)"):
+    trace_summary = stats["latency"] if stats is not None else []
+    if trace_summary:
+        st.dataframe(
+            [
+                {
+                    "step": row["name"],
+                    "n": row["count"],
+                    "p50 ms": round(row["p50_ms"]),
+                    "p95 ms": round(row["p95_ms"]),
+                    "tokens in/out": f"{row['tokens_in']}/{row['tokens_out']}",
+                    "cache hits": row["cache_hits"],
+                }
+                for row in trace_summary
+            ],
+            hide_index=True,
+        )
+    else:
+        st.caption("No traced queries yet.")
+
 st.sidebar.markdown("---")
 st.sidebar.markdown("Created by [Your Name] · Powered by Streamlit & LangChain")
 
@@ -212,6 +273,15 @@ with col1:
     st.markdown("#### 💬 Ask your question")
     query = st.text_input("", placeholder="e.g. What is LangGraph?", key="user_query")
     submit = st.button("Submit")
+    if st.button("🧹 New conversation", help="Forget earlier questions; the next one starts fresh."):
+        st.session_state["session_id"] = uuid.uuid4().hex
+        st.session_state["turns"] = []
+    turns = st.session_state.get("turns", [])
+    if turns:
+        with st.expander(f"🗂️ Conversation so far ({len(turns)} turns)"):
+            for question, answer in turns[-10:]:
+                st.markdown(f"**You:** {question}")
+                st.markdown(answer)
 
 with col2:
     if submit:
@@ -220,10 +290,13 @@ with col2:
         else:
             with st.spinner("🤖 Thinking..."):
                 try:
-                    answer = run_langgraph(query, retriever)
-                    st.success("✅ Done!")
                     st.subheader("📘 Answer:")
-                    st.write(answer)
+                    answer_box = st.empty()
+                    answer = run_langgraph(query, collection, speculative=speculative, on_partial=answer_box.markdown,
+                                           preference=preference)
+                    answer_box.write(answer)
+                    st.session_state.setdefault("turns", []).append((query, answer))
+                    st.success("✅ Done!")
                 except Exception as e:
                     st.error(f"❌ Error: {str(e)}")
     else:
@@ -0,0 +1,181 @@
+"""Answer a JSONL file of queries without the Streamlit UI.
+
+    python batch.py queries.jsonl answers.jsonl --concurrency 8 --rate 2 --collection default
+
+Each input line is ``{"id": ..., "query": ...}`` (``id`` defaults to the
+line number). Each answer is appended to the output as soon as it finishes,
+as ``{"id", "query", "answer", "route", "seconds"}`` or ``{"id", "query",
+"error"}``. The output file doubles as the checkpoint: rerunning the same
+command skips ids that already have an answer and retries failed ones,
+whose old error records are removed first, so every id appears once.
+"""
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimiter:
+    """Spaces calls at least ``1 / rate`` seconds apart across threads (``rate <= 0``: unlimited)."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def read_queries(path):
+    with open(path, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            yield str(item.get("id", line_no)), item["query"]
+
+
+def load_checkpoint(path):
+    """Ids already answered in ``path``.
+
+    Rewrites ``path`` without its error records, whose queries run again,
+    and without a torn last line left by a crash. Any other line that does
+    not parse is kept as it is and logged.
+    """
+    done = set()
+    if not os.path.exists(path):
+        return done
+    tmp = path + ".tmp"
+    changed = False
+    with open(path, "rb") as f, open(tmp, "wb") as out:
+        line = f.readline()
+        number = 1
+        while line:
+            following = f.readline()
+            try:
+                record = json.loads(line)
+            except ValueError:
+                if not following:
+                    logger.warning("Dropping torn last line %d of %s", number, path)
+                    changed = True
+                    break
+                logger.warning("Line %d of %s is not valid JSON; keeping it", number, path)
+                record = None
+            if isinstance(record, dict) and "error" in record and "answer" not in record:
+                changed = True
+            else:
+                if isinstance(record, dict) and "answer" in record:
+                    done.add(str(record["id"]))
+                out.write(line if line.endswith(b"\n") else line + b"\n")
+            line, number = following, number + 1
+        out.flush()
+        os.fsync(out.fileno())
+    if changed:
+        os.replace(tmp, path)
+    else:
+        os.remove(tmp)
+    return done
+
+
+class BatchRunner:
+    """Runs queries through ``runtime.answer`` with at most ``concurrency`` in flight."""
+
+    def __init__(self, runtime, collection, output, concurrency=4, rate=0.0, speculative=False,
+                 preference=None):
+        self.runtime = runtime
+        self.collection = collection
+        self.output = output
+        self.concurrency = concurrency
+        self.limiter = RateLimiter(rate)
+        self.speculative = speculative
+        self.preference = preference
+        self.stats = {"answered": 0, "failed": 0, "skipped": 0}
+        self._write_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(concurrency * 2)
+
+    def run(self, queries, done=()):
+        started = time.perf_counter()
+        with open(self.output, "a", encoding="utf-8") as out, \
+                ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="batch") as pool:
+            try:
+                for query_id, query in queries:
+                    if query_id in done:
+                        self.stats["skipped"] += 1
+                        continue
+                    # Read the input lazily: only a couple of queries per worker are queued.
+                    self._slots.acquire()
+                    future = pool.submit(self._answer, query_id, query, out)
+                    future.add_done_callback(lambda _: self._slots.release())
+            except KeyboardInterrupt:
+                logger.warning("Interrupted; finishing queries already in flight. Rerun to resume.")
+                pool.shutdown(wait=True, cancel_futures=True)
+        self.stats["seconds"] = time.perf_counter() - started
+        return self.stats
+
+    def _answer(self, query_id, query, out):
+        self.limiter.wait()
+        try:
+            result = self.runtime.answer(query, self.collection, speculative=self.speculative,
+                                         preference=self.preference)
+            record = {"id": query_id, "query": query, **result}
+            key = "answered"
+        except Exception as e:
+            record = {"id": query_id, "query": query, "error": f"{type(e).__name__}: {e}"}
+            key = "failed"
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._write_lock:
+            out.write(line)
+            out.flush()
+            os.fsync(out.fileno())
+            self.stats[key] += 1
+            failed = self.stats["failed"]
+            total = self.stats["answered"] + failed
+        if total % 50 == 0:
+            logger.info("%d queries done (%d failed)", total, failed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Answer a JSONL file of queries through the agent graph.")
+    parser.add_argument("input")
+    parser.add_argument("output")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--rate", type=float, default=0.0, help="max queries started per second (0: unlimited)")
+    parser.add_argument("--collection", default="default", help="document collection to answer from")
+    parser.add_argument("--speculative", action="store_true")
+    parser.add_argument("--preference", choices=["fast", "balanced", "quality"],
+                        help="summarizer latency preference (default: SUMMARY_PREFERENCE)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    from runtime import Runtime
+
+    runtime = Runtime()
+    # Load (or build) the index before the first query; fails here on an unknown id.
+    runtime.collections.get(args.collection)
+    done = load_checkpoint(args.output)
+    if done:
+        print(f"Resuming: {len(done)} queries already answered in {args.output}")
+    runner = BatchRunner(runtime, args.collection, args.output, concurrency=args.concurrency, rate=args.rate,
+                         speculative=args.speculative, preference=args.preference)
+    stats = runner.run(read_queries(args.input), done)
+    print(
+        f"Answered {stats['answered']} · failed {stats['failed']} · skipped {stats['skipped']} "
+        f"in {stats['seconds']:.1f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""Per-format extractor benchmark: pages per second and peak memory per backend.
+
+Every registered backend of every format runs over the same files in a
+fresh process, so one backend's imports and caches do not count against
+the next. A section means something different per format (a PDF page, a
+Markdown heading, a batch of CSV rows, a whole text file), so throughput
+is normalized to pages of ``PAGE_CHARS`` extracted characters. Memory is
+reported twice: the ``tracemalloc`` peak of Python allocations during a
+second, untimed pass, and the peak RSS of the whole worker process, which
+also covers native libraries such as pdfium. Run from the project folder:
+
+    python -m benchmarks.bench_extractors --files 3 --pages 20 --out extractors.json
+    python -m benchmarks.bench_extractors --corpus my_docs   # your own documents
+
+Without ``--corpus`` a synthetic corpus (``benchmarks.corpus.make_documents``)
+is generated in a temporary folder. Backends whose package is not installed
+are reported as missing.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+import extractors
+from benchmarks.corpus import make_documents
+
+
+PAGE_CHARS = 3000
+
+
+def _peak_rss_mb():
+    # ru_maxrss is in KiB on Linux and bytes on macOS.
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _extract_all(extractor, paths):
+    sections = chars = 0
+    for path in paths:
+        for text, _ in extractor.extract(path):
+            sections += 1
+            chars += len(text)
+    return sections, chars
+
+
+def run_backend(mime, name, paths):
+    """Extract ``paths`` with one backend. Runs in its own process."""
+    extractor = extractors.get_extractor(mime, name)
+    started = time.perf_counter()
+    sections, chars = _extract_all(extractor, paths)
+    seconds = time.perf_counter() - started
+    # tracemalloc slows allocation-heavy code down, so memory gets its own pass.
+    tracemalloc.start()
+    try:
+        _extract_all(extractor, paths)
+        traced_peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    pages = chars / PAGE_CHARS
+    return {
+        "files": len(paths),
+        "sections": sections,
+        "chars": chars,
+        "pages": pages,
+        "seconds": seconds,
+        "pages_per_s": pages / seconds if seconds else 0.0,
+        "traced_peak_mb": traced_peak / (1024 * 1024),
+        "process_peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def corpus_by_mime(folder):
+    by_mime = defaultdict(list)
+    for fname in sorted(os.listdir(folder)):
+        path = os.path.join(folder, fname)
+        if os.path.isfile(path) and fname.lower().endswith(extractors.SUPPORTED_EXTENSIONS):
+            by_mime[extractors.detect_mime(path)].append(path)
+    return by_mime
+
+
+def benchmark(folder):
+    results = {}
+    context = multiprocessing.get_context("spawn")
+    for mime, paths in corpus_by_mime(folder).items():
+        label = extractors.EXTENSIONS[mime][0].lstrip(".")
+        for backend in extractors.backends(mime):
+            key = f"{label} {backend.name}"
+            if not backend.available:
+                results[key] = {"missing": ", ".join(backend.requires)}
+                continue
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                try:
+                    results[key] = pool.submit(run_backend, mime, backend.name, paths).result()
+                except Exception as e:
+                    results[key] = {"error": f"{type(e).__name__}: {e}"}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--corpus", help="folder of documents to extract (default: generate a synthetic one)")
+    parser.add_argument("--files", type=int, default=3, help="synthetic files per format")
+    parser.add_argument("--pages", type=int, default=20, help="pages per synthetic file")
+    parser.add_argument("--out", help="write results as JSON")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = args.corpus
+        if folder is None:
+            folder = os.path.join(tmp, "docs")
+            make_documents(folder, args.files, args.pages)
+        results = benchmark(folder)
+
+    print(f"pages of {PAGE_CHARS} extracted characters; py peak = tracemalloc peak, RSS = worker process peak")
+    print(f"{'format / backend':<24} {'files':>5} {'sections':>8} {'pages':>7} {'pages/s':>9} "
+          f"{'py peak MB':>10} {'RSS MB':>7}")
+    for key, row in results.items():
+        if "missing" in row or "error" in row:
+            print(f"{key:<24} {row.get('missing') and 'missing ' + row['missing'] or row['error']}")
+            continue
+        print(f"{key:<24} {row['files']:>5} {row['sections']:>8} {row['pages']:>7.1f} {row['pages_per_s']:>9.1f} "
+              f"{row['traced_peak_mb']:>10.1f} {row['process_peak_rss_mb']:>7.1f}")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({"python": sys.version.split()[0], "corpus": args.corpus, "page_chars": PAGE_CHARS,
+                       "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
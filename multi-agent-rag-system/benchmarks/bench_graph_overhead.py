@@ -0,0 +1,57 @@
+"""Per-query overhead of the agent graph: rebuilt per query vs compiled once.
+
+Uses stub LLM/embeddings/search, so the numbers isolate graph and chain
+construction cost. Run from the project folder:
+
+    python -m benchmarks.bench_graph_overhead --queries 200
+"""
+import argparse
+import statistics
+import time
+
+from langchain_community.vectorstores import FAISS
+
+from agents import AgentGraph
+from benchmarks.stubs import StubChatModel, StubEmbeddings, StubSearch
+
+
+def _measure(run, queries):
+    timings = []
+    for query in queries:
+        started = time.perf_counter()
+        run(query)
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return {
+        "mean_ms": statistics.mean(timings),
+        "p50_ms": timings[len(timings) // 2],
+        "p99_ms": timings[min(len(timings) - 1, int(len(timings) * 0.99))],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--route", choices=["web", "rag", "llm"], default="rag")
+    args = parser.parse_args()
+
+    llm = StubChatModel(route=args.route)
+    search = StubSearch()
+    texts = [f"Document {i} covers topic {i % 17} and part number PN-{i:05d}." for i in range(500)]
+    retriever = FAISS.from_texts(texts, StubEmbeddings()).as_retriever()
+    queries = [f"What does topic {i % 17} say?" for i in range(args.queries)]
+
+    # Before: a fresh graph (and QA chain) for every question.
+    before = _measure(lambda q: AgentGraph(llm, search).run(q, retriever), queries)
+    # After: one compiled graph shared across questions.
+    graph = AgentGraph(llm, search)
+    after = _measure(lambda q: graph.run(q, retriever), queries)
+
+    print(f"route={args.route} queries={args.queries}")
+    for name, result in (("per-query build", before), ("compiled once", after)):
+        print(f"{name:>16}: mean {result['mean_ms']:.2f} ms · p50 {result['p50_ms']:.2f} ms · p99 {result['p99_ms']:.2f} ms")
+    print(f"{'saved':>16}: {before['mean_ms'] - after['mean_ms']:.2f} ms per query")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Recall/latency of the int8 memory-mapped store against exact float32 search.
+
+Synthetic clustered vectors, no API calls. Run from the project folder:
+
+    python -m benchmarks.bench_quantized --rows 200000 --dim 768
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from quantized_store import QuantizedStore
+
+
+def synthetic_vectors(rows, dim, clusters=256, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim)).astype(np.float32)
+    vectors = centers[rng.integers(0, clusters, rows)] + 0.3 * rng.normal(size=(rows, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def exact_top_k(vectors, queries, k):
+    truth = []
+    for q in queries:
+        dists = ((vectors - q) ** 2).sum(axis=1)
+        truth.append(set(np.argpartition(dists, k)[:k].tolist()))
+    return truth
+
+
+def evaluate(store, queries, truth, k):
+    latencies, recalls = [], []
+    for q, expected in zip(queries, truth):
+        started = time.perf_counter()
+        rows, _ = store.search_vector(q, k)
+        latencies.append((time.perf_counter() - started) * 1000)
+        recalls.append(len(expected & set(rows.tolist())) / k)
+    latencies.sort()
+    return np.mean(recalls), latencies[len(latencies) // 2], latencies[int(len(latencies) * 0.99) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=4)
+    args = parser.parse_args()
+
+    vectors = synthetic_vectors(args.rows, args.dim)
+    rng = np.random.default_rng(1)
+    queries = vectors[rng.integers(0, args.rows, args.queries)] + 0.05 * rng.normal(size=(args.queries, args.dim))
+    queries = queries.astype(np.float32)
+    truth = exact_top_k(vectors, queries, args.k)
+
+    folder = os.path.join(tempfile.mkdtemp(), "int8")
+    records = ({"id": f"chunk-{i}", "text": "", "metadata": {}} for i in range(args.rows))
+    QuantizedStore.build(folder, args.rows, args.dim, lambda: iter([vectors]), records)
+    codes_mb = os.path.getsize(os.path.join(folder, "codes.int8")) / 1e6
+    print(f"rows={args.rows} dim={args.dim} k={args.k} · float32 {vectors.nbytes / 1e6:.0f} MB · int8 codes {codes_mb:.0f} MB")
+
+    started = time.perf_counter()
+    for q in queries[:20]:
+        np.argpartition(((vectors - q) ** 2).sum(axis=1), args.k)[:args.k]
+    flat_ms = (time.perf_counter() - started) * 1000 / 20
+    print(f"{'flat float32 (in RAM)':>24}: recall 1.000 · mean {flat_ms:.2f} ms")
+
+    for label, rerank, rerank_k in (("int8", False, 0), ("int8 + rerank 50", True, 50), ("int8 + rerank 200", True, 200)):
+        store = QuantizedStore(folder, embeddings=None, rerank=rerank, rerank_k=rerank_k)
+        recall, p50, p99 = evaluate(store, queries, truth, args.k)
+        print(f"{label:>24}: recall {recall:.3f} · p50 {p50:.2f} ms · p99 {p99:.2f} ms")
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Import-time report for the app's entry modules.
+
+Each module is imported in a fresh interpreter under ``python -X importtime``
+so earlier imports do not hide its cost. Run from the project folder:
+
+    python -m benchmarks.bench_startup --top 15 --out startup.json
+    python -m benchmarks.bench_startup --warm   # also time Runtime warm-up (needs GEMINI_API_KEY)
+"""
+import argparse
+import json
+import subprocess
+import sys
+import time
+
+MODULES = ("runtime", "agents", "index_store", "ingestion", "service", "batch")
+
+_CONSTRUCT = """
+import time
+started = time.perf_counter()
+from runtime import Runtime
+runtime = Runtime()
+constructed = time.perf_counter()
+if WARM:
+    runtime.warm_up()
+    runtime.wait_ready()
+print(constructed - started, time.perf_counter() - constructed)
+"""
+
+
+def import_times(module):
+    """``[(name, self_us, cumulative_us)]`` for one fresh ``import module``."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"], capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr.strip().splitlines()[-1]}")
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def report(module, top):
+    rows = import_times(module)
+    total = next((cum for name, _, cum in reversed(rows) if name == module), sum(s for _, s, _ in rows))
+    heaviest = sorted(rows, key=lambda r: r[2], reverse=True)
+    return {
+        "total_ms": total / 1000,
+        "modules": len(rows),
+        "top": [{"name": name, "self_ms": s / 1000, "cumulative_ms": c / 1000} for name, s, c in heaviest[:top]],
+    }
+
+
+def runtime_startup(warm):
+    started = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-c", f"WARM = {warm}\n" + _CONSTRUCT], capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+    construct, warm_up = (float(v) for v in proc.stdout.split())
+    return {
+        "process_s": time.perf_counter() - started,
+        "import_and_construct_s": construct,
+        "warm_up_s": warm_up if warm else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--modules", default=",".join(MODULES), help="comma-separated modules to import")
+    parser.add_argument("--top", type=int, default=10, help="heaviest imports to list per module")
+    parser.add_argument("--warm", action="store_true", help="also build every component (calls the APIs)")
+    parser.add_argument("--out", help="write results as JSON")
+    args = parser.parse_args()
+
+    results = {"python": sys.version.split()[0], "imports": {}}
+    for module in args.modules.split(","):
+        try:
+            results["imports"][module] = result = report(module, args.top)
+        except RuntimeError as e:
+            print(f"{module}: {e}")
+            continue
+        print(f"{module}: {result['total_ms']:.1f} ms over {result['modules']} modules")
+        for row in result["top"]:
+            print(f"    {row['cumulative_ms']:9.1f} ms  {row['name']}")
+
+    try:
+        results["runtime"] = startup = runtime_startup(args.warm)
+        print(f"Runtime(): {startup['import_and_construct_s'] * 1000:.1f} ms (process {startup['process_s']:.2f}s)")
+        if args.warm:
+            print(f"warm-up: {startup['warm_up_s']:.2f}s")
+    except RuntimeError as e:
+        print(f"Runtime(): {e}")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+"""Offline benchmark suite: ingestion, retrieval, end-to-end graph latency and memory.
+
+Runs the real ingestion pipeline, index store, hybrid retriever and agent
+graph over a synthetic corpus with stub LLM, embeddings and search. Each
+corpus size runs in a fresh process so peak memory figures are independent.
+Run from the project folder:
+
+    python -m benchmarks.bench_suite --sizes 1000,10000,100000 --out bench_results.json
+    python -m benchmarks.bench_suite --sizes 1000,10000 --compare bench_results.json
+
+With ``--compare`` the run exits non-zero if any metric is worse than the
+baseline by more than ``--tolerance``.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from agents import AgentGraph
+from benchmarks.corpus import make_corpus, make_queries
+from benchmarks.stubs import StubChatModel, StubEmbeddings, StubSearch
+from context import ContextAssembler
+from index_store import IndexStore
+from ingestion import IngestionPipeline
+from lexical_index import HybridRetriever
+
+CHUNK_SIZE, CHUNK_OVERLAP = 500, 50
+
+
+def latency(run, queries, warmup=3):
+    for query in queries[:warmup]:
+        run(query)
+    timings = []
+    for query in queries:
+        started = time.perf_counter()
+        run(query)
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return {
+        "mean_ms": sum(timings) / len(timings),
+        "p50_ms": timings[len(timings) // 2],
+        "p95_ms": timings[min(len(timings) - 1, int(len(timings) * 0.95))],
+    }
+
+
+def peak_rss_mb(who=resource.RUSAGE_SELF):
+    # ru_maxrss is in KiB on Linux and bytes on macOS.
+    peak = resource.getrusage(who).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def folder_mb(folder):
+    total = 0
+    for root, _, files in os.walk(folder):
+        total += sum(os.path.getsize(os.path.join(root, f)) for f in files)
+    return total / 1e6
+
+
+def run_size(chunks, dim, n_queries, workers):
+    tmp = tempfile.mkdtemp(prefix="rag-bench-")
+    try:
+        docs_dir = os.path.join(tmp, "docs")
+        topic_words = make_corpus(docs_dir, chunks, chunk_size=CHUNK_SIZE)
+        queries = make_queries(topic_words, chunks, n_queries)
+        baseline_rss = peak_rss_mb()
+
+        embeddings = StubEmbeddings(dim=dim)
+        store = IndexStore(os.path.join(tmp, "index"), embeddings, fingerprint="bench")
+        pipeline = IngestionPipeline(embeddings, CHUNK_SIZE, CHUNK_OVERLAP, workers=workers)
+        started = time.perf_counter()
+        db = store.sync(docs_dir, (".txt",), pipeline)
+        ingest_seconds = time.perf_counter() - started
+        started = time.perf_counter()
+        db = store.sync(docs_dir, (".txt",), pipeline)
+        reload_seconds = time.perf_counter() - started
+
+        result = {
+            "chunks": db.index.ntotal,
+            "ingestion": {
+                "seconds": ingest_seconds,
+                "chunks_per_s": db.index.ntotal / ingest_seconds,
+                "reload_s": reload_seconds,
+            },
+            "retrieval": {},
+            "e2e": {},
+        }
+        for mode in ("hybrid", "dense"):
+            retriever = HybridRetriever(vectorstore=db, lexical=store.lexical, mode=mode)
+            result["retrieval"][mode] = latency(retriever.get_relevant_documents, queries)
+
+        # Same shape as the app: a wide candidate set cut down by MMR to the token budget.
+        retriever = HybridRetriever(vectorstore=db, lexical=store.lexical, k=20)
+        context = ContextAssembler(embeddings)
+        search = StubSearch()
+        for route in ("rag", "web", "llm"):
+            graph = AgentGraph(StubChatModel(route=route), search, context=context)
+            result["e2e"][route] = latency(lambda q: graph.run(q, retriever), queries)
+
+        result["memory"] = {
+            "peak_rss_mb": peak_rss_mb(),
+            "index_rss_mb": peak_rss_mb() - baseline_rss,
+            "worker_peak_rss_mb": peak_rss_mb(resource.RUSAGE_CHILDREN),
+            "index_disk_mb": folder_mb(store.root),
+        }
+        return result
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+# ---------------------- REGRESSIONS ----------------------
+def flatten(result, prefix=""):
+    flat = {}
+    for key, value in result.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, name + "."))
+        elif isinstance(value, (int, float)):
+            flat[name] = value
+    return flat
+
+
+def compare(baseline, current, tolerance, noise_ms=1.0):
+    """Return ``[(size, metric, before, after)]`` for metrics worse by more than ``tolerance``.
+
+    Latency changes smaller than ``noise_ms`` are ignored whatever their ratio.
+    """
+    regressions = []
+    for size, result in current["results"].items():
+        if size not in baseline["results"]:
+            continue
+        before = flatten(baseline["results"][size])
+        for metric, after in flatten(result).items():
+            if metric not in before or metric == "chunks" or not before[metric]:
+                continue
+            if metric.endswith("_ms") and abs(after - before[metric]) < noise_ms:
+                continue
+            change = (after - before[metric]) / before[metric]
+            # Throughputs should not drop; times and sizes should not grow.
+            worse = -change if metric.endswith("_per_s") else change
+            if worse > tolerance:
+                regressions.append((size, metric, before[metric], after))
+    return regressions
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1000,10000,100000", help="comma-separated chunk counts")
+    parser.add_argument("--dim", type=int, default=768, help="stub embedding size (embedding-001 is 768)")
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--out", default="bench_results.json")
+    parser.add_argument("--compare", help="baseline results file to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    parser.add_argument("--noise-ms", type=float, default=1.0, help="ignore latency changes below this")
+    args = parser.parse_args()
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "dim": args.dim,
+            "queries": args.queries,
+            "workers": args.workers,
+        },
+        "results": {},
+    }
+    ctx = multiprocessing.get_context("spawn")
+    for size in (int(s) for s in args.sizes.split(",")):
+        with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+            result = pool.submit(run_size, size, args.dim, args.queries, args.workers).result()
+        report["results"][str(size)] = result
+        print(
+            f"{size:>7} chunks: ingest {result['ingestion']['chunks_per_s']:.0f} chunks/s · "
+            f"retrieval p95 {result['retrieval']['hybrid']['p95_ms']:.2f} ms · "
+            f"e2e rag p95 {result['e2e']['rag']['p95_ms']:.2f} ms · "
+            f"peak RSS {result['memory']['peak_rss_mb']:.0f} MB"
+        )
+
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {args.out}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, report, args.tolerance, args.noise_ms)
+        for size, metric, before, after in regressions:
+            print(f"REGRESSION {size} chunks · {metric}: {before:.3f} -> {after:.3f}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions beyond {args.tolerance:.0%} against {args.compare}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""Deterministic synthetic document corpus for offline benchmarks.
+
+Each paragraph is sized to become one chunk under the app's splitter and
+carries a topic word plus a unique identifier (``ERR-00042``), so both
+semantic and exact-identifier queries have a known target.
+"""
+import os
+import random
+
+_SYLLABLES = ["ka", "lo", "mi", "ren", "tas", "vo", "quel", "dri", "an", "sor", "pe", "nu", "gal", "thi", "ox", "be"]
+
+
+def vocabulary(size=2000, seed=0):
+    rng = random.Random(seed)
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(_SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+def make_corpus(folder, chunks, chunk_size=500, chunks_per_file=50, topics=50, seed=0):
+    """Write ``chunks`` paragraphs into ``.txt`` files under ``folder``.
+
+    Returns the topic words used, for building queries.
+    """
+    rng = random.Random(seed)
+    words = vocabulary(seed=seed)
+    topic_words = words[:topics]
+    os.makedirs(folder, exist_ok=True)
+    target = int(chunk_size * 0.85)
+    for start in range(0, chunks, chunks_per_file):
+        paragraphs = []
+        for n in range(start, min(chunks, start + chunks_per_file)):
+            topic = topic_words[n % topics]
+            text = f"Section {n} covers {topic}. Reference ERR-{n:05d}."
+            while len(text) < target:
+                text += " " + " ".join(rng.choice(words) for _ in range(8)) + f" {topic}."
+            paragraphs.append(text[:target])
+        with open(os.path.join(folder, f"doc_{start // chunks_per_file:05d}.txt"), "w", encoding="utf-8") as f:
+            f.write("\n\n".join(paragraphs))
+    return topic_words
+
+
+def make_queries(topic_words, chunks, n, seed=1):
+    """Alternate topic questions (dense/fused path) and identifier lookups (lexical fast path)."""
+    rng = random.Random(seed)
+    queries = []
+    for i in range(n):
+        if i % 2:
+            queries.append(f"What does ERR-{rng.randrange(chunks):05d} refer to?")
+        else:
+            queries.append(f"What do the documents say about {rng.choice(topic_words)}?")
+    return queries
+
+
+# ---------------------- MIXED-FORMAT DOCUMENTS ----------------------
+def _pages(n_pages, words, rng, lines=40):
+    return [
+        [f"Page {p + 1}. " + " ".join(rng.choice(words) for _ in range(10)) for _ in range(lines)]
+        for p in range(n_pages)
+    ]
+
+
+def _write_pdf(path, pages):
+    """Minimal uncompressed PDF, one Helvetica text page per entry in ``pages``."""
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for lines in pages:
+        ops = ["BT /F1 10 Tf 12 TL 50 780 Td"] + [f"({line}) '" for line in lines] + ["ET"]
+        stream = "\n".join(ops).encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % (len(objects))
+        )
+        kids.append(len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        " ".join(f"{k} 0 R" for k in kids).encode(), len(kids)
+    )
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    with open(path, "wb") as f:
+        f.write(out)
+
+
+def make_documents(folder, files_per_format=3, pages=10, seed=0):
+    """Write sample PDF, DOCX, TXT, Markdown, HTML and CSV files under ``folder``.
+
+    Every file holds ``pages`` pages' worth of text (a page is a PDF page, a
+    Markdown/HTML section or 40 CSV rows). DOCX is skipped without
+    python-docx. Returns the written paths by extension.
+    """
+    rng = random.Random(seed)
+    words = vocabulary(seed=seed)
+    os.makedirs(folder, exist_ok=True)
+    written = {}
+
+    def target(ext, n):
+        path = os.path.join(folder, f"sample_{n:03d}{ext}")
+        written.setdefault(ext, []).append(path)
+        return path
+
+    try:
+        from docx import Document as DocxDocument
+    except ImportError:
+        DocxDocument = None
+
+    for n in range(files_per_format):
+        content = _pages(pages, words, rng)
+        _write_pdf(target(".pdf", n), content)
+        if DocxDocument is not None:
+            doc = DocxDocument()
+            for lines in content:
+                for line in lines:
+                    doc.add_paragraph(line)
+            doc.save(target(".docx", n))
+        with open(target(".txt", n), "w", encoding="utf-8") as f:
+            f.write("\n\n".join("\n".join(lines) for lines in content))
+        with open(target(".md", n), "w", encoding="utf-8") as f:
+            for p, lines in enumerate(content, start=1):
+                f.write(f"## Section {p}\n\n" + "\n".join(f"- **{line[:12]}** {line[12:]}" for line in lines) + "\n\n")
+        with open(target(".html", n), "w", encoding="utf-8") as f:
+            f.write("<!DOCTYPE html><html><head><title>Sample</title><style>p{margin:0}</style></head><body>\n")
+            for p, lines in enumerate(content, start=1):
+                f.write(f"<section><h2>Section {p}</h2>" + "".join(f"<p>{line}</p>" for line in lines) + "</section>\n")
+            f.write("</body></html>\n")
+        with open(target(".csv", n), "w", encoding="utf-8") as f:
+            f.write("id,topic,description\n")
+            for p, lines in enumerate(content):
+                for i, line in enumerate(lines):
+                    f.write(f"{p * len(lines) + i},{rng.choice(words)},\"{line}\"\n")
+    return written
@@ -0,0 +1,49 @@
+"""Local stand-in for a web search API, for testing ``web_search.HTTPSearchBackend``.
+
+    python -m benchmarks.fake_search_server --port 8765 --latency 0.3
+    SEARCH_BACKEND=http SEARCH_URL=http://127.0.0.1:8765/search streamlit run app.py
+"""
+import argparse
+import json
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+def make_handler(latency):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path != "/search":
+                self.send_error(404)
+                return
+            query = parse_qs(url.query).get("q", [""])[0]
+            time.sleep(latency)
+            body = json.dumps({
+                "results": [{"title": f"Result {i}", "snippet": f"Result {i} about {query}."} for i in range(5)]
+            }).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake JSON search server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds to sleep per request")
+    args = parser.parse_args()
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(args.latency))
+    print(f"Fake search server on http://{args.host}:{args.port}/search")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Deterministic, offline stand-ins for the Gemini and DuckDuckGo clients."""
+import hashlib
+import math
+import re
+import time
+from typing import List
+
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+_TOKEN = re.compile(r"\w+")
+
+
+class StubChatModel(BaseChatModel):
+    """Answers routing prompts with ``route`` and everything else with an echo."""
+
+    route: str = "rag"
+    latency: float = 0.0
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        prompt = messages[-1].content
+        if self.latency:
+            time.sleep(self.latency)
+        if prompt.startswith("Classify the query"):
+            text = self.route
+        else:
+            text = f"Stub answer ({len(prompt)} chars): {prompt[:120]}"
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+    @property
+    def _llm_type(self):
+        return "stub-chat"
+
+
+class StubEmbeddings(Embeddings):
+    """Hashed bag-of-words vectors: texts sharing words land close together."""
+
+    def __init__(self, dim=64, latency=0.0):
+        self.dim = dim
+        self.latency = latency
+        self.model = f"stub-embedding-{dim}"
+
+    def _vector(self, text):
+        vec = [0.0] * self.dim
+        for token in _TOKEN.findall(text.lower()):
+            h = int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little")
+            vec[h % self.dim] += 1.0 if (h >> 32) & 1 else -1.0
+        norm = math.sqrt(sum(v * v for v in vec)) or 1.0
+        return [v / norm for v in vec]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if self.latency:
+            time.sleep(self.latency)
+        return [self._vector(t) for t in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        if self.latency:
+            time.sleep(self.latency)
+        return self._vector(text)
+
+
+class StubSearch:
+    """Mimics ``DuckDuckGoSearchRun.run``: one blob of snippet text per query."""
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+
+    def run(self, query):
+        if self.latency:
+            time.sleep(self.latency)
+        return " ".join(f"Result {i} about {query}." for i in range(5))
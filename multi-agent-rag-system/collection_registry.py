@@ -0,0 +1,179 @@
+"""Per-team document collections, loaded on first use and evicted LRU under a byte budget.
+
+A collection is a documents folder with its own persisted index, index
+watcher and answer cache. Nothing is loaded until a query names the
+collection; after each load the least recently used collections are dropped
+until the loaded ones fit in ``budget_bytes`` again (the most recent one is
+always kept). A query that already holds an evicted collection's retriever
+finishes against it.
+"""
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_COLLECTION = "default"
+_VALID_ID = re.compile(r"[A-Za-z0-9][A-Za-z0-9_-]{0,63}")
+
+
+class UnknownCollection(KeyError):
+    pass
+
+
+def folder_bytes(*folders):
+    total = 0
+    for folder in folders:
+        for root, _, files in os.walk(folder):
+            total += sum(os.path.getsize(os.path.join(root, f)) for f in files)
+    return total
+
+
+class Collection:
+    """One loaded collection. ``nbytes`` is the on-disk size of its index
+    files, which is roughly what FAISS, the docstore and BM25 take in memory.
+    It is measured once per published index (watcher generation), not on
+    every stats call."""
+
+    def __init__(self, collection_id, docs_dir, store, watcher, answer_cache, index_dirs=()):
+        self.id = collection_id
+        self.docs_dir = docs_dir
+        self.store = store
+        self.watcher = watcher
+        self.answer_cache = answer_cache
+        self.index_dirs = index_dirs or (store.root,)
+        self.loaded_at = time.time()
+        self._size = (None, 0)
+
+    @property
+    def current(self):
+        """``(retriever, version)``, published together by the watcher."""
+        return self.watcher.current
+
+    def lease(self):
+        """``current`` held open for one query; see ``DocWatcher.lease``."""
+        return self.watcher.lease()
+
+    @property
+    def retriever(self):
+        return self.watcher.retriever
+
+    @property
+    def version(self):
+        return self.watcher.version
+
+    def nbytes(self):
+        generation, size = self._size
+        if generation != self.watcher.generation:
+            generation = self.watcher.generation
+            size = folder_bytes(*self.index_dirs)
+            self._size = (generation, size)
+        return size
+
+    def close(self):
+        """Stop watching; the index files are closed once queries still using them finish."""
+        self.watcher.stop()
+
+    def stats(self):
+        return {
+            "id": self.id,
+            "documents": len(self.watcher.files) if os.path.isdir(self.docs_dir) else None,
+            "version": self.version,
+            "mb": self.nbytes() / 1e6,
+            "watch_error": self.watcher.last_error,
+        }
+
+
+class CollectionRegistry:
+    """Collections by id; ``open_collection(id)`` builds one on a miss.
+
+    Concurrent first queries for the same collection share a single load;
+    loads of different collections run in parallel.
+    """
+
+    def __init__(self, open_collection, root, budget_bytes):
+        self.open_collection = open_collection
+        self.root = root
+        self.budget_bytes = budget_bytes
+        self.stats = {"hits": 0, "loads": 0, "evictions": 0, "load_seconds": 0.0}
+        self._loaded = OrderedDict()
+        self._loading = {}
+        self._lock = threading.Lock()
+
+    def available(self):
+        """Ids that can be loaded: ``default`` plus every valid folder name under ``root``."""
+        ids = [DEFAULT_COLLECTION]
+        if os.path.isdir(self.root):
+            ids += sorted(
+                entry.name for entry in os.scandir(self.root)
+                if entry.is_dir() and _VALID_ID.fullmatch(entry.name) and entry.name != DEFAULT_COLLECTION
+            )
+        return ids
+
+    def check(self, collection_id):
+        if collection_id not in self.available():
+            raise UnknownCollection(collection_id)
+
+    def peek(self, collection_id):
+        """The collection if it is loaded, without loading it or touching its LRU position."""
+        with self._lock:
+            return self._loaded.get(collection_id)
+
+    def get(self, collection_id):
+        with self._lock:
+            collection = self._hit(collection_id)
+            if collection is not None:
+                return collection
+        self.check(collection_id)
+        with self._lock:
+            loading = self._loading.setdefault(collection_id, threading.Lock())
+        with loading:
+            with self._lock:
+                collection = self._hit(collection_id)
+                if collection is not None:
+                    return collection
+            started = time.perf_counter()
+            try:
+                collection = self.open_collection(collection_id)
+            except BaseException:
+                with self._lock:
+                    self._loading.pop(collection_id, None)
+                raise
+            # Publish and stop loading in one step, or a query in between would open it again.
+            with self._lock:
+                self._loading.pop(collection_id, None)
+                self._loaded[collection_id] = collection
+                self.stats["loads"] += 1
+                self.stats["load_seconds"] += time.perf_counter() - started
+                evicted = self._over_budget()
+        for old in evicted:
+            old.close()
+        return collection
+
+    def _hit(self, collection_id):
+        collection = self._loaded.get(collection_id)
+        if collection is not None:
+            self._loaded.move_to_end(collection_id)
+            self.stats["hits"] += 1
+        return collection
+
+    def _over_budget(self):
+        sizes = {cid: c.nbytes() for cid, c in self._loaded.items()}
+        total = sum(sizes.values())
+        evicted = []
+        while total > self.budget_bytes and len(self._loaded) > 1:
+            cid, collection = self._loaded.popitem(last=False)
+            total -= sizes[cid]
+            evicted.append(collection)
+            self.stats["evictions"] += 1
+        return evicted
+
+    def summary(self):
+        with self._lock:
+            loaded = list(self._loaded.values())
+            stats = dict(self.stats)
+        return {
+            **stats,
+            "budget_mb": self.budget_bytes / 1e6,
+            "loaded": [c.stats() for c in reversed(loaded)],
+        }
@@ -0,0 +1,76 @@
+"""Token-budgeted, diversity-aware context assembly for the RAG prompt."""
+import numpy as np
+from langchain_core.documents import Document
+
+from tracing import estimate_tokens, span
+
+
+def mmr_order(query_vector, doc_vectors, lambda_mult=0.5):
+    """Indexes of ``doc_vectors`` in maximal-marginal-relevance order.
+
+    Each step picks the candidate maximising
+    ``lambda * sim(query, d) - (1 - lambda) * max sim(d, already picked)``;
+    the pairwise similarity matrix is computed once up front.
+    """
+    docs = doc_vectors / np.maximum(np.linalg.norm(doc_vectors, axis=1, keepdims=True), 1e-12)
+    query = query_vector / max(np.linalg.norm(query_vector), 1e-12)
+    relevance = docs @ query
+    pairwise = docs @ docs.T
+    redundancy = np.full(len(docs), -np.inf)
+    available = np.ones(len(docs), dtype=bool)
+    order = []
+    for _ in range(len(docs)):
+        penalty = np.where(np.isfinite(redundancy), redundancy, 0.0)
+        scores = np.where(available, lambda_mult * relevance - (1 - lambda_mult) * penalty, -np.inf)
+        best = int(np.argmax(scores))
+        order.append(best)
+        available[best] = False
+        redundancy = np.maximum(redundancy, pairwise[best])
+    return order
+
+
+class ContextAssembler:
+    """Pick a diverse subset of retrieved chunks that fits ``budget_tokens``.
+
+    Chunk vectors come from ``embeddings.embed_documents``; behind
+    ``CachedEmbeddings`` those are cache hits for anything already indexed.
+    Candidates from the retriever's BM25-only path (``lexical=True``) have
+    no query vector; they keep their BM25 order and nothing is embedded.
+    """
+
+    def __init__(self, embeddings, budget_tokens=1500, lambda_mult=0.5, max_chunks=8):
+        self.embeddings = embeddings
+        self.budget_tokens = budget_tokens
+        self.lambda_mult = lambda_mult
+        self.max_chunks = max_chunks
+
+    def select(self, query, docs, lexical=False):
+        with span("assemble_context", kind="context", candidates=len(docs), lexical=lexical) as s:
+            selected = self._select(query, docs, lexical)
+            s.set(selected=len(selected), context_tokens=sum(estimate_tokens(d.page_content) for d in selected))
+            return selected
+
+    def _select(self, query, docs, lexical=False):
+        if not docs:
+            return []
+        if lexical:
+            order = list(range(len(docs)))
+        else:
+            query_vector = np.asarray(self.embeddings.embed_query(query), dtype=np.float32)
+            doc_vectors = np.asarray(self.embeddings.embed_documents([d.page_content for d in docs]), dtype=np.float32)
+            order = mmr_order(query_vector, doc_vectors, self.lambda_mult)
+        selected, used = [], 0
+        for i in order:
+            cost = estimate_tokens(docs[i].page_content)
+            if used + cost > self.budget_tokens:
+                # Keep trying shorter chunks further down the order.
+                continue
+            selected.append(docs[i])
+            used += cost
+            if len(selected) >= self.max_chunks:
+                break
+        if not selected:
+            # Even the best chunk alone is over budget: send a truncated copy of it.
+            best = docs[order[0]]
+            selected = [Document(page_content=best.page_content[: self.budget_tokens * 4], metadata=best.metadata)]
+        return selected
@@ -0,0 +1,208 @@
+"""Per-session conversation memory with a bounded size.
+
+Each session keeps its last ``max_turns`` exchanges verbatim (each clipped to
+``max_question_chars`` / ``max_answer_chars``). Older exchanges are folded,
+one at a time, into a running summary of at most ``max_summary_chars``. That
+fold is an LLM call, so it runs on a background thread after the answer has
+been returned. The context handed to the router and agents is therefore the
+same size on turn 3 and on turn 300.
+"""
+import contextvars
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+from langchain_core.prompts import PromptTemplate
+
+from tracing import span
+
+FOLD_PROMPT = PromptTemplate.from_template(
+    "You maintain a running summary of a conversation between a user and an assistant.\n\n"
+    "Summary so far:\n{summary}\n\nNew exchange:\nUser: {question}\nAssistant: {answer}\n\n"
+    "Rewrite the summary to include the new exchange. Keep names, numbers and the topics the user "
+    "cares about; drop pleasantries. At most {words} words.\n\nUpdated summary:"
+)
+
+_WORD = re.compile(r"[A-Za-z0-9][\w'-]*")
+# Words that make a short question depend on what was said before ("what about its price?").
+_FOLLOW_UP = re.compile(
+    r"\b(it|its|it's|that|this|these|those|they|them|their|he|she|his|her|there|also|more|else|again"
+    r"|what about|how about|and the|same)\b",
+    re.IGNORECASE,
+)
+_STOPWORDS = frozenset(
+    "a an and are as at be by can could did do does for from had has have how i in is it its me my of on or "
+    "our should so than that the their them then there these they this those to was we were what when where "
+    "which who why will with would you your about tell give show explain".split()
+)
+
+
+def clip(text, limit):
+    text = " ".join(text.split())
+    return text if len(text) <= limit else text[: limit - 1].rstrip() + "…"
+
+
+@dataclass
+class Turn:
+    question: str
+    answer: str
+
+
+class Conversation:
+    """One session's recent turns plus the summary of everything older."""
+
+    def __init__(self, max_turns=4, max_question_chars=300, max_answer_chars=600, max_summary_chars=1200):
+        self.max_turns = max_turns
+        self.max_question_chars = max_question_chars
+        self.max_answer_chars = max_answer_chars
+        self.max_summary_chars = max_summary_chars
+        self.turns = []
+        self.summary = ""
+        self.folded = 0
+        self.pending = 0
+        self.last_used = time.time()
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return self.folded + len(self.turns)
+
+    def context(self):
+        """Bounded text block describing the conversation so far ("" for a new one)."""
+        with self.lock:
+            parts = []
+            if self.summary:
+                parts.append(f"Earlier in this conversation: {self.summary}")
+            for turn in self.turns[-self.max_turns:]:
+                parts.append(f"User: {turn.question}\nAssistant: {turn.answer}")
+            return "\n\n".join(parts)
+
+    def is_follow_up(self, query):
+        """True if ``query`` is short, refers back ("it", "what about") and there is a previous turn.
+
+        Only follow-ups are answered with the conversation as context; every
+        other query is answered as if asked on its own, so its answer can be
+        shared through the answer cache.
+        """
+        with self.lock:
+            if not self.turns:
+                return False
+        return len(_WORD.findall(query)) <= 8 and _FOLLOW_UP.search(query) is not None
+
+    def standalone(self, query):
+        """``query`` with the previous question's key words appended when it reads like a follow-up.
+
+        Cheap, no LLM call; used for retrieval and web search, where "what
+        about its price?" on its own would match the wrong things.
+        """
+        if not self.is_follow_up(query):
+            return query
+        with self.lock:
+            previous = self.turns[-1].question
+        words = _WORD.findall(query)
+        seen = {w.lower() for w in words}
+        keywords = []
+        for word in _WORD.findall(previous):
+            if word.lower() not in _STOPWORDS and word.lower() not in seen:
+                seen.add(word.lower())
+                keywords.append(word)
+        return f"{query} ({' '.join(keywords)})" if keywords else query
+
+    def add(self, question, answer):
+        """Record a turn; returns the turns that just fell out of the verbatim window.
+
+        Those stay in ``turns`` (but out of ``context()``) until folded.
+        """
+        with self.lock:
+            self.turns.append(Turn(clip(question, self.max_question_chars), clip(answer, self.max_answer_chars)))
+            excess = len(self.turns) - self.max_turns - self.pending
+            overflow = self.turns[self.pending:self.pending + excess] if excess > 0 else []
+            self.pending += len(overflow)
+            return overflow
+
+    def fold(self, turn, summarize):
+        """Merge ``turn`` (the oldest verbatim one) into the summary with ``summarize(summary, turn)``."""
+        with self.lock:
+            summary = self.summary
+        try:
+            updated = summarize(summary, turn)
+        except Exception:
+            # Keep the conversation bounded even when the LLM is unavailable.
+            updated = f"{summary} User asked: {turn.question}".strip()
+        with self.lock:
+            self.summary = clip(updated, self.max_summary_chars)
+            if self.turns and self.turns[0] is turn:
+                self.turns.pop(0)
+                self.pending -= 1
+            self.folded += 1
+
+
+class ConversationStore:
+    """Conversations by session id, dropped after ``ttl`` idle seconds or past ``max_sessions`` (LRU).
+
+    Folds run on one background thread, in order, so a session's summary
+    never sees two exchanges folded at once.
+    """
+
+    def __init__(self, llm, max_turns=4, summary_words=150, ttl=3600, max_sessions=1000, **limits):
+        self.llm = llm
+        self.max_turns = max_turns
+        self.summary_words = summary_words
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self.limits = limits
+        self.stats = {"turns": 0, "folds": 0, "expired": 0}
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="conversation")
+
+    def get(self, session_id):
+        with self._lock:
+            self._expire()
+            conversation = self._sessions.get(session_id)
+            if conversation is None:
+                conversation = self._sessions[session_id] = Conversation(self.max_turns, **self.limits)
+                while len(self._sessions) > self.max_sessions:
+                    self._sessions.popitem(last=False)
+            self._sessions.move_to_end(session_id)
+            conversation.last_used = time.time()
+            return conversation
+
+    def record(self, session_id, question, answer):
+        conversation = self.get(session_id)
+        overflow = conversation.add(question, answer)
+        self.stats["turns"] += 1
+        for turn in overflow:
+            # Run in the caller's context so the fold is traced with its query.
+            self._pool.submit(contextvars.copy_context().run, self._fold, conversation, turn)
+
+    def _fold(self, conversation, turn):
+        with span("conversation_fold", kind="memory"):
+            conversation.fold(turn, self.summarize)
+        self.stats["folds"] += 1
+
+    def summarize(self, summary, turn):
+        prompt = FOLD_PROMPT.format(
+            summary=summary or "(none yet)", question=turn.question, answer=turn.answer, words=self.summary_words
+        )
+        return self.llm.invoke(prompt).content.strip()
+
+    def reset(self, session_id):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def _expire(self):
+        cutoff = time.time() - self.ttl
+        while self._sessions:
+            session_id, conversation = next(iter(self._sessions.items()))
+            if conversation.last_used >= cutoff:
+                break
+            del self._sessions[session_id]
+            self.stats["expired"] += 1
+
+    def summary(self):
+        with self._lock:
+            sessions = len(self._sessions)
+        return {**self.stats, "sessions": sessions}
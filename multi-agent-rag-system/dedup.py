@@ -0,0 +1,133 @@
+"""MinHash/LSH near-duplicate detection for chunks.
+
+Every embedded ("canonical") chunk keeps a MinHash signature of its word
+shingles, bucketed by LSH bands. A new chunk whose estimated Jaccard
+similarity to a canonical chunk reaches ``threshold`` is not embedded;
+its source is appended to the canonical chunk's list of duplicates instead.
+"""
+import hashlib
+import json
+import re
+
+import numpy as np
+from langchain_core.documents import Document
+
+_WORD = re.compile(r"\w+")
+_PRIME = (1 << 61) - 1
+
+
+class MinHasher:
+    def __init__(self, num_perm=128, shingle=5, seed=1):
+        rng = np.random.default_rng(seed)
+        # a, b < 2^31 and 32-bit shingle hashes keep a * h + b inside uint64.
+        self.a = rng.integers(1, 1 << 31, num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, 1 << 31, num_perm, dtype=np.uint64)
+        self.shingle = shingle
+
+    def shingles(self, text):
+        words = _WORD.findall(text.lower())
+        if len(words) <= self.shingle:
+            return {" ".join(words)}
+        return {" ".join(words[i:i + self.shingle]) for i in range(len(words) - self.shingle + 1)}
+
+    def signature(self, text):
+        hashes = np.fromiter(
+            (int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=4).digest(), "little")
+             for s in self.shingles(text)),
+            dtype=np.uint64,
+        )
+        values = (np.outer(hashes, self.a) + self.b) % _PRIME
+        return (values.min(axis=0) & 0xFFFFFFFF).astype(np.uint32)
+
+
+class NearDuplicateIndex:
+    """Canonical chunk signatures in LSH buckets, plus the duplicates folded into each.
+
+    With the defaults (16 bands x 8 rows) a pair at Jaccard 0.85 becomes a
+    candidate ~99% of the time and a pair at 0.5 ~6% of the time; candidates
+    are then checked against ``threshold`` on the full signature.
+    """
+
+    def __init__(self, threshold=0.85, num_perm=128, bands=16):
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.hasher = MinHasher(num_perm=num_perm)
+        self.signatures = {}
+        self.duplicates = {}
+        self._buckets = {}
+
+    def __len__(self):
+        return len(self.signatures)
+
+    def _band_keys(self, signature):
+        for band in range(self.bands):
+            yield band, signature[band * self.rows:(band + 1) * self.rows].tobytes()
+
+    def find(self, signature):
+        """Id of the most similar canonical chunk at or above ``threshold``, else ``None``."""
+        candidates = set()
+        for key in self._band_keys(signature):
+            candidates.update(self._buckets.get(key, ()))
+        best, best_sim = None, self.threshold
+        for doc_id in candidates:
+            sim = float(np.mean(self.signatures[doc_id] == signature))
+            if sim >= best_sim:
+                best, best_sim = doc_id, sim
+        return best
+
+    def add(self, doc_id, signature):
+        self.signatures[doc_id] = signature
+        for key in self._band_keys(signature):
+            self._buckets.setdefault(key, set()).add(doc_id)
+
+    def add_duplicate(self, doc_id, source):
+        self.duplicates.setdefault(doc_id, []).append(source)
+
+    def remove(self, doc_id):
+        """Forget a canonical chunk; returns the duplicate sources that pointed at it."""
+        signature = self.signatures.pop(doc_id, None)
+        if signature is not None:
+            for key in self._band_keys(signature):
+                bucket = self._buckets.get(key)
+                if bucket is not None:
+                    bucket.discard(doc_id)
+                    if not bucket:
+                        del self._buckets[key]
+        return self.duplicates.pop(doc_id, [])
+
+    def remove_file(self, doc_id, fname):
+        sources = [s for s in self.duplicates.get(doc_id, []) if s["file"] != fname]
+        if sources:
+            self.duplicates[doc_id] = sources
+        else:
+            self.duplicates.pop(doc_id, None)
+
+    # ---------------------- PERSISTENCE ----------------------
+    def save(self, path):
+        ids = list(self.signatures)
+        matrix = np.stack([self.signatures[i] for i in ids]) if ids else np.empty((0, self.rows * self.bands), np.uint32)
+        with open(path, "wb") as f:
+            np.savez(f, ids=np.array(ids, dtype=str), signatures=matrix,
+                     meta=np.array(json.dumps({"threshold": self.threshold, "bands": self.bands,
+                                               "duplicates": self.duplicates})))
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            meta = json.loads(str(data["meta"]))
+            index = cls(threshold=meta["threshold"], num_perm=data["signatures"].shape[1], bands=meta["bands"])
+            for doc_id, signature in zip(data["ids"].tolist(), data["signatures"]):
+                index.add(doc_id, signature)
+        index.duplicates = meta["duplicates"]
+        return index
+
+    @classmethod
+    def from_docstore(cls, vectorstore, **kwargs):
+        """Rebuild signatures from a FAISS store's documents (indexes saved before dedup existed)."""
+        index = cls(**kwargs)
+        for doc_id in vectorstore.index_to_docstore_id.values():
+            doc = vectorstore.docstore.search(doc_id)
+            if isinstance(doc, Document):
+                index.add(doc_id, index.hasher.signature(doc.page_content))
+        return index
@@ -0,0 +1,149 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+
+class DocWatcher(threading.Thread):
+    """Poll a documents folder and hot-swap the retriever when it changes.
+
+    ``rebuild()`` runs the incremental index sync and returns a brand-new
+    ``(retriever, version)`` pair (``(None, None)`` when there is nothing to
+    index); it is only ever called from one thread at a time. The pair
+    replaces ``self.current`` in a single assignment, so a query that already
+    picked it up finishes against the old index under the old version, and
+    nothing ever sees a new version with an old retriever or the reverse.
+    A change is applied once the folder has looked the same for two polls,
+    so files still being copied are skipped. After a failed rebuild the same
+    folder state is retried with exponential backoff (up to ``max_backoff``
+    seconds); any further change to the folder is picked up right away.
+
+    Queries take the pair through ``lease()``. A replaced retriever, or the
+    current one once the watcher is stopped, is closed (``retriever.close()``,
+    if it has one) as soon as no lease holds it any more.
+    """
+
+    def __init__(self, docs_dir, extensions, rebuild, interval=2.0, max_backoff=300.0):
+        super().__init__(name="doc-watcher", daemon=True)
+        self.docs_dir = docs_dir
+        self.extensions = extensions
+        self.rebuild = rebuild
+        self.interval = interval
+        self.max_backoff = max_backoff
+        self.current = (None, None)
+        self.files = []
+        self.generation = 0
+        self.last_refresh = None
+        self.last_error = None
+        self.failures = 0
+        self._indexed = None
+        self._failed = None
+        self._retry_at = 0.0
+        self._stop = threading.Event()
+        self._rebuild_lock = threading.Lock()
+        self._lease_lock = threading.Lock()
+        self._leases = {}
+
+    @property
+    def retriever(self):
+        return self.current[0]
+
+    @property
+    def version(self):
+        return self.current[1]
+
+    def snapshot(self):
+        if not os.path.isdir(self.docs_dir):
+            return {}
+        return {
+            entry.name: (entry.stat().st_size, entry.stat().st_mtime_ns)
+            for entry in os.scandir(self.docs_dir)
+            # Same filter as IndexStore.scan: editor swap and lock files are dotfiles.
+            if entry.is_file() and not entry.name.startswith(".") and entry.name.lower().endswith(self.extensions)
+        }
+
+    def refresh(self, snapshot=None):
+        """Rebuild now and swap the result in."""
+        snapshot = self.snapshot() if snapshot is None else snapshot
+        with self._rebuild_lock:
+            try:
+                current = self.rebuild()
+            except Exception as e:
+                self.last_error = f"{type(e).__name__}: {e}"
+                self.failures += 1
+                self._failed = snapshot
+                self._retry_at = time.time() + min(self.max_backoff, self.interval * 2 ** self.failures)
+                return
+            self._publish(current)
+            self.files = sorted(snapshot)
+            self._indexed = snapshot
+            self.generation += 1
+            self.last_refresh = time.time()
+            self.last_error = None
+            self.failures = 0
+            self._failed = None
+
+    @contextmanager
+    def lease(self):
+        """``current`` for the length of a query; its retriever stays open until the lease ends."""
+        with self._lease_lock:
+            pair = self.current
+            entry = self._leases.setdefault(id(pair), [pair, 0])
+            entry[1] += 1
+        try:
+            yield pair
+        finally:
+            with self._lease_lock:
+                entry[1] -= 1
+                retire = not entry[1]
+                if retire:
+                    del self._leases[id(pair)]
+                retire = retire and (pair is not self.current or self._stop.is_set())
+            if retire:
+                self._close(pair)
+
+    def _publish(self, current):
+        with self._lease_lock:
+            old, self.current = self.current, current
+            stopped = self._stop.is_set()
+            retire = id(old) not in self._leases
+        if retire:
+            self._close(old)
+        if stopped:
+            # Stopped while rebuilding: nothing will swap this one out any more.
+            self._retire_current()
+
+    def _retire_current(self):
+        with self._lease_lock:
+            pair = self.current
+            if id(pair) in self._leases:
+                return
+        self._close(pair)
+
+    @staticmethod
+    def _close(pair):
+        close = getattr(pair[0], "close", None)
+        if close is not None:
+            close()
+
+    def run(self):
+        pending = None
+        while not self._stop.wait(self.interval):
+            try:
+                current = self.snapshot()
+            except OSError:
+                continue
+            if current == self._indexed:
+                pending = None
+            elif current == self._failed and time.time() < self._retry_at:
+                pending = None
+            elif current == pending:
+                self.refresh(current)
+                pending = None
+            else:
+                pending = current
+
+    def stop(self):
+        """Stop polling and close the current retriever once its last lease ends."""
+        self._stop.set()
+        self._retire_current()
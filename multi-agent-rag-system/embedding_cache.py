@@ -0,0 +1,149 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from typing import List
+
+from langchain_core.embeddings import Embeddings
+
+from tracing import estimate_tokens, span
+
+# SQLite's default limit on bound parameters is 999.
+_SQL_BATCH = 500
+# Hits only touch last_used in memory; it is written with the next store, or after this
+# many hits or seconds, so readers do not queue on SQLite's write lock.
+_TOUCH_ROWS = 1000
+_TOUCH_SECONDS = 30.0
+
+
+def _chunks(items, size=_SQL_BATCH):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+class CachedEmbeddings(Embeddings):
+    """Content-addressed embedding cache in front of another ``Embeddings``.
+
+    Vectors are stored as float32 blobs in SQLite, keyed by a hash of the
+    model name, the call kind (document vs query, which some providers embed
+    differently) and the text. The least recently used rows are evicted once
+    the stored vectors exceed ``max_bytes``. Recency is recorded lazily, so
+    it can lag behind by up to ``_TOUCH_SECONDS``.
+    """
+
+    def __init__(self, inner, path, model_name, max_bytes=512 * 1024 * 1024):
+        self.inner = inner
+        self.model = model_name
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._touched = {}
+        self._touched_at = time.time()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key TEXT PRIMARY KEY, vector BLOB NOT NULL, size INTEGER NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)")
+        self._conn.commit()
+        self._bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM embeddings").fetchone()[0]
+
+    # ---------------------- EMBEDDINGS API ----------------------
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._embed(texts, "document", self.inner.embed_documents)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed([text], "query", lambda batch: [self.inner.embed_query(batch[0])])[0]
+
+    # ---------------------- CACHE ----------------------
+    def _key(self, kind, text):
+        return hashlib.sha256(f"{self.model}\0{kind}\0{text}".encode("utf-8")).hexdigest()
+
+    def _embed(self, texts, kind, compute):
+        with span(f"embed_{kind}", kind="embedding", texts=len(texts)) as s:
+            keys = [self._key(kind, t) for t in texts]
+            found = self._lookup(list(set(keys)))
+            missing = {}
+            for key, text in zip(keys, texts):
+                if key not in found:
+                    missing.setdefault(key, text)
+            if missing:
+                vectors = compute(list(missing.values()))
+                fresh = dict(zip(missing, vectors))
+                self._store(fresh)
+                found.update(fresh)
+            s.set(cache_hit=not missing, tokens_in=sum(estimate_tokens(t) for t in missing.values()))
+        with self._lock:
+            self.hits += len(texts) - len(missing)
+            self.misses += len(missing)
+        return [found[key] for key in keys]
+
+    def _lookup(self, keys):
+        found = {}
+        with self._lock:
+            for batch in _chunks(keys):
+                marks = ",".join("?" * len(batch))
+                rows = self._conn.execute(f"SELECT key, vector FROM embeddings WHERE key IN ({marks})", batch)
+                for key, blob in rows:
+                    found[key] = array("f", blob).tolist()
+            if found:
+                now = time.time()
+                self._touched.update(dict.fromkeys(found, now))
+                if len(self._touched) >= _TOUCH_ROWS or now - self._touched_at >= _TOUCH_SECONDS:
+                    self._flush_touched()
+                    self._conn.commit()
+        return found
+
+    def _flush_touched(self):
+        """Write the pending ``last_used`` updates; the caller holds ``_lock`` and commits."""
+        if self._touched:
+            self._conn.executemany("UPDATE embeddings SET last_used = ? WHERE key = ?",
+                                   [(stamp, key) for key, stamp in self._touched.items()])
+            self._touched = {}
+        self._touched_at = time.time()
+
+    def _store(self, vectors):
+        now = time.time()
+        rows = []
+        for key, vector in vectors.items():
+            blob = array("f", vector).tobytes()
+            rows.append((key, blob, len(blob), now))
+        with self._lock:
+            self._flush_touched()
+            # Another thread or replica may have stored the same key meanwhile; count only new rows.
+            for row in rows:
+                if self._conn.execute("INSERT OR IGNORE INTO embeddings VALUES (?, ?, ?, ?)", row).rowcount:
+                    self._bytes += row[2]
+            if self._bytes > self.max_bytes:
+                # Other replicas insert and evict too: check the real total before evicting.
+                self._bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM embeddings").fetchone()[0]
+                if self._bytes > self.max_bytes:
+                    self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        """Drop least recently used rows until 90% of the budget is free."""
+        target = int(self.max_bytes * 0.9)
+        victims = []
+        for key, size in self._conn.execute("SELECT key, size FROM embeddings ORDER BY last_used"):
+            if self._bytes <= target:
+                break
+            victims.append(key)
+            self._bytes -= size
+        for batch in _chunks(victims):
+            marks = ",".join("?" * len(batch))
+            self._conn.execute(f"DELETE FROM embeddings WHERE key IN ({marks})", batch)
+
+    # ---------------------- STATS ----------------------
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hit_rate, "bytes": self._bytes}
@@ -0,0 +1,369 @@
+"""Text extractors by MIME type, with alternative backends per format.
+
+Each backend is a generator ``extract(path)`` of ``(text, metadata)``
+sections (PDFs page by page, with ``{"page": n}``). The first backend
+registered for a MIME type is its default; others are picked per format
+with ``EXTRACTORS``, e.g. ``EXTRACTORS="pdf=pdfminer,docx=docx-xml"`` (keys
+are MIME types or their file extensions). Backends whose optional package
+is not installed are listed but refuse to be selected.
+
+Compare backends on your own files with ``benchmarks/bench_extractors.py``.
+"""
+import csv
+import importlib.util
+import io
+import mimetypes
+import os
+import re
+import zipfile
+from html.parser import HTMLParser
+from typing import Callable, NamedTuple, Tuple
+
+PDF = "application/pdf"
+DOCX = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+TEXT = "text/plain"
+MARKDOWN = "text/markdown"
+HTML = "text/html"
+CSV = "text/csv"
+
+EXTENSIONS = {
+    PDF: (".pdf",),
+    DOCX: (".docx",),
+    TEXT: (".txt",),
+    MARKDOWN: (".md", ".markdown"),
+    HTML: (".html", ".htm"),
+    CSV: (".csv",),
+}
+SUPPORTED_EXTENSIONS = tuple(ext for exts in EXTENSIONS.values() for ext in exts)
+_BY_EXTENSION = {ext: mime for mime, exts in EXTENSIONS.items() for ext in exts}
+
+
+class Extractor(NamedTuple):
+    mime: str
+    name: str
+    extract: Callable
+    requires: Tuple[str, ...] = ()
+
+    @property
+    def available(self):
+        return all(importlib.util.find_spec(module) is not None for module in self.requires)
+
+
+_REGISTRY = {}
+
+
+def register(mime, name, requires=()):
+    def decorator(fn):
+        _REGISTRY.setdefault(mime, {})[name] = Extractor(mime, name, fn, tuple(requires))
+        return fn
+    return decorator
+
+
+def backends(mime):
+    """All registered backends for ``mime``, default first."""
+    return list(_REGISTRY.get(mime, {}).values())
+
+
+# ---------------------- DETECTION ----------------------
+def detect_mime(path):
+    """MIME type from the file's leading bytes, falling back to its extension."""
+    with open(path, "rb") as f:
+        head = f.read(2048)
+    if head.startswith(b"%PDF-"):
+        return PDF
+    if head.startswith(b"PK\x03\x04"):
+        try:
+            with zipfile.ZipFile(path) as z:
+                if "word/document.xml" in z.namelist():
+                    return DOCX
+        except zipfile.BadZipFile:
+            pass
+    ext = os.path.splitext(path)[1].lower()
+    if ext in _BY_EXTENSION:
+        return _BY_EXTENSION[ext]
+    sniff = head.lstrip().lower()
+    if sniff.startswith((b"<!doctype html", b"<html")):
+        return HTML
+    return mimetypes.guess_type(path)[0] or "application/octet-stream"
+
+
+# ---------------------- SELECTION ----------------------
+def parse_choices(spec):
+    """``"pdf=pdfminer,text/html=lxml"`` -> ``{PDF: "pdfminer", HTML: "lxml"}``; raises ``ValueError``."""
+    choices = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        key, _, name = item.partition("=")
+        key = key.strip().lower()
+        mime = key if key in _REGISTRY else _BY_EXTENSION.get(key if key.startswith(".") else f".{key}")
+        if mime is None:
+            raise ValueError(f"EXTRACTORS: unknown format {key!r}")
+        get_extractor(mime, name.strip())
+        choices[mime] = name.strip()
+    return choices
+
+
+def describe(choices):
+    """Stable string for index fingerprints ("" when every format uses its default)."""
+    return ",".join(f"{mime}={name}" for mime, name in sorted(choices.items()))
+
+
+def get_extractor(mime, name=None):
+    registered = _REGISTRY.get(mime)
+    if not registered:
+        raise ValueError(f"no extractor for {mime}")
+    if name is None:
+        return next(iter(registered.values()))
+    extractor = registered.get(name)
+    if extractor is None:
+        raise ValueError(f"unknown extractor {name!r} for {mime}; choose from {list(registered)}")
+    if not extractor.available:
+        raise ValueError(f"extractor {name!r} needs {', '.join(extractor.requires)} installed")
+    return extractor
+
+
+def iter_sections(path, choices=None):
+    """Yield ``(text, metadata)`` sections of a file with the backend chosen for its MIME type."""
+    mime = detect_mime(path)
+    try:
+        extractor = get_extractor(mime, (choices or {}).get(mime))
+    except ValueError as e:
+        raise ValueError(f"{os.path.basename(path)}: {e}") from None
+    yield from extractor.extract(path)
+
+
+# ---------------------- PDF ----------------------
+@register(PDF, "pdfplumber", requires=("pdfplumber",))
+def pdf_pdfplumber(path):
+    """Parses every page once and flushes its object cache, so memory stays flat."""
+    import pdfplumber
+
+    with pdfplumber.open(path) as pdf:
+        for number, page in enumerate(pdf.pages, start=1):
+            text = page.extract_text()
+            page.flush_cache()
+            if text:
+                yield text, {"page": number}
+
+
+@register(PDF, "pdfminer", requires=("pdfminer",))
+def pdf_pdfminer(path):
+    """pdfminer.six layout analysis without pdfplumber's per-character objects."""
+    from pdfminer.high_level import extract_pages
+    from pdfminer.layout import LTTextContainer
+
+    for number, layout in enumerate(extract_pages(path), start=1):
+        text = "".join(element.get_text() for element in layout if isinstance(element, LTTextContainer))
+        if text.strip():
+            yield text, {"page": number}
+
+
+@register(PDF, "pypdfium2", requires=("pypdfium2",))
+def pdf_pypdfium2(path):
+    import pypdfium2 as pdfium
+
+    pdf = pdfium.PdfDocument(path)
+    try:
+        for number in range(1, len(pdf) + 1):
+            page = pdf[number - 1]
+            textpage = page.get_textpage()
+            text = textpage.get_text_range()
+            textpage.close()
+            page.close()
+            if text.strip():
+                yield text, {"page": number}
+    finally:
+        pdf.close()
+
+
+@register(PDF, "pymupdf", requires=("fitz",))
+def pdf_pymupdf(path):
+    import fitz
+
+    with fitz.open(path) as pdf:
+        for number, page in enumerate(pdf, start=1):
+            text = page.get_text()
+            if text.strip():
+                yield text, {"page": number}
+
+
+# ---------------------- DOCX ----------------------
+@register(DOCX, "python-docx", requires=("docx",))
+def docx_python_docx(path):
+    from docx import Document as DocxDocument
+
+    doc = DocxDocument(path)
+    yield "\n".join([p.text for p in doc.paragraphs]), {}
+
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+
+@register(DOCX, "docx-xml")
+def docx_xml(path):
+    """Paragraph text streamed straight from ``word/document.xml``; no object model."""
+    from xml.etree.ElementTree import iterparse
+
+    paragraphs = []
+    with zipfile.ZipFile(path) as z, z.open("word/document.xml") as xml:
+        for _, element in iterparse(xml):
+            if element.tag == f"{_W}p":
+                paragraphs.append("".join(t.text or "" for t in element.iter(f"{_W}t")))
+                element.clear()
+    yield "\n".join(paragraphs), {}
+
+
+# ---------------------- TEXT FORMATS ----------------------
+def _read(path):
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        return f.read()
+
+
+@register(TEXT, "text")
+def plain_text(path):
+    yield _read(path), {}
+
+
+_MD_HEADING = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+# Only known HTML tag names, with attributes that carry values, count as markup.
+_HTML_TAGS = (
+    "a|abbr|b|br|cite|code|del|details|div|em|figcaption|figure|h[1-6]|hr|i|img|ins|kbd|li|mark|ol|p|picture|"
+    "pre|q|s|samp|small|source|span|strong|sub|summary|sup|table|tbody|td|th|thead|tr|u|ul|var|video"
+)
+_MD_TAG = re.compile(
+    rf"</(?:{_HTML_TAGS})\s*>|<(?:{_HTML_TAGS})(?:\s+[\w:-]+\s*=\s*(?:\"[^\"]*\"|'[^']*'|[^\s\"'<>=`]+))*\s*/?>",
+    re.IGNORECASE,
+)
+_MD_INLINE = [
+    (re.compile(r"!\[([^\]]*)\]\([^)]*\)"), r"\1"),  # images -> alt text
+    (re.compile(r"\[([^\]]+)\]\([^)]*\)"), r"\1"),  # links -> link text
+    (re.compile(r"<((?:https?|ftp|mailto):[^\s<>]+|[\w.+-]+@[\w-]+(?:\.[\w-]+)+)>"), r"\1"),  # autolinks
+    (re.compile(r"<!--.*?-->"), ""),  # HTML comments
+    (_MD_TAG, ""),  # inline HTML tags, not "a <b and c>" or "List<int>"
+    (re.compile(r"(\*\*|\*|`)(?=\S)(.+?)(?<=\S)\1"), r"\2"),  # emphasis, code spans
+    (re.compile(r"(?<!\w)(__|_)(?=\S)(.+?)(?<=\S)\1(?!\w)"), r"\2"),  # _emphasis_, not snake_case
+]
+_MD_FENCE = re.compile(r"^\s{0,3}(`{3,}|~{3,})")
+# Horizontal rules and table separator rows carry no text.
+_MD_SKIP = re.compile(r"\s*(([-*_]\s*){3,}|\|?(\s*:?-+:?\s*\|)+(\s*:?-+:?\s*)?)\s*")
+
+
+@register(MARKDOWN, "markdown")
+def markdown_sections(path):
+    """One section per heading, markup stripped; the heading goes into ``metadata["section"]``.
+
+    Code blocks are kept verbatim: no heading detection or inline rewriting
+    happens between an opening fence and its closing fence.
+    """
+    heading, lines, fence = None, [], None
+
+    def flush():
+        text = "\n".join(lines).strip()
+        if text:
+            return text, ({"section": heading} if heading else {})
+        return None
+
+    for line in _read(path).splitlines():
+        opening = _MD_FENCE.match(line)
+        if fence is not None:
+            # A fence closes on the same character repeated at least as often, with nothing after it.
+            if opening and opening.group(1)[0] == fence[0] and len(opening.group(1)) >= len(fence) \
+                    and not line[opening.end():].strip():
+                fence = None
+            else:
+                lines.append(line)
+            continue
+        if opening:
+            fence = opening.group(1)
+            continue
+        if _MD_SKIP.fullmatch(line):
+            continue
+        match = _MD_HEADING.match(line)
+        if match:
+            section = flush()
+            if section:
+                yield section
+            heading, lines = match.group(2), [match.group(2)]
+            continue
+        line = re.sub(r"^\s{0,3}(>+|[-*+]|\d+[.)])\s+", "", line)
+        for pattern, replacement in _MD_INLINE:
+            line = pattern.sub(replacement, line)
+        lines.append(line)
+    section = flush()
+    if section:
+        yield section
+
+
+class _HTMLText(HTMLParser):
+    SKIP = {"script", "style", "noscript", "template", "svg"}
+    BLOCK = {"p", "div", "br", "li", "tr", "h1", "h2", "h3", "h4", "h5", "h6", "section", "article", "table",
+             "ul", "ol", "pre", "blockquote", "title"}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self._skipping = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP:
+            self._skipping += 1
+        elif tag in self.BLOCK:
+            self.parts.append("\n")
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP:
+            self._skipping = max(0, self._skipping - 1)
+        elif tag in self.BLOCK:
+            self.parts.append("\n")
+
+    def handle_data(self, data):
+        if not self._skipping:
+            self.parts.append(data)
+
+
+def _tidy(text):
+    lines = (" ".join(line.split()) for line in text.splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+@register(HTML, "html.parser")
+def html_stdlib(path):
+    parser = _HTMLText()
+    parser.feed(_read(path))
+    parser.close()
+    yield _tidy("".join(parser.parts)), {}
+
+
+@register(HTML, "lxml", requires=("lxml",))
+def html_lxml(path):
+    import lxml.html
+
+    with open(path, "rb") as f:
+        root = lxml.html.fromstring(f.read())
+    for element in root.xpath("//script|//style|//noscript|//template"):
+        element.drop_tree()
+    for element in root.iter(*_HTMLText.BLOCK):
+        element.tail = "\n" + (element.tail or "")
+    yield _tidy(root.text_content()), {}
+
+
+@register(CSV, "csv")
+def csv_rows(path, rows_per_section=50):
+    """Rows as ``header: value`` lines, ``rows_per_section`` rows per section."""
+    text = _read(path)
+    try:
+        dialect = csv.Sniffer().sniff(text[:4096])
+    except csv.Error:
+        dialect = csv.excel
+    # A file-like reader keeps newlines inside quoted fields; splitlines() would cut those records apart.
+    reader = csv.reader(io.StringIO(text, newline=""), dialect)
+    header = next(reader, None)
+    if header is None:
+        return
+    batch, first = [], 2
+    for number, row in enumerate(reader, start=2):
+        batch.append("; ".join(f"{h}: {v}" for h, v in zip(header, row) if v))
+        if len(batch) == rows_per_section:
+            yield "\n".join(batch), {"rows": f"{first}-{number}"}
+            batch, first = [], number + 1
+    if batch:
+        yield "\n".join(batch), {"rows": f"{first}-{first + len(batch) - 1}"}
@@ -0,0 +1,346 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+
+from dedup import NearDuplicateIndex
+from lexical_index import BM25Index
+
+MANIFEST_NAME = "manifest.json"
+INDEX_NAME = "index"
+LEXICAL_NAME = "lexical.json"
+DEDUP_NAME = "dedup.npz"
+
+
+def file_sha256(path, block_size=1 << 20):
+    """Hash a file in fixed-size blocks so large PDFs are never read whole."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def chunk_id(rel_path, sha, index):
+    """Deterministic vector id for one chunk of one file version."""
+    prefix = hashlib.sha1(f"{rel_path}\0{sha}".encode("utf-8")).hexdigest()[:16]
+    return f"{prefix}-{index}"
+
+
+def manifest_version(files):
+    """Short digest identifying the exact set of indexed file versions."""
+    digest = hashlib.sha1()
+    for fname in sorted(files):
+        digest.update(f"{fname}\0{files[fname]['sha256']}\n".encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+class IndexStore:
+    """On-disk FAISS index plus a manifest of the files it was built from.
+
+    The manifest records path, size, mtime, content hash and vector ids for
+    every indexed file, so a restart only embeds what changed since the last
+    run and drops the vectors of files that were removed. A BM25 index over
+    the same chunk ids is kept alongside and updated in step.
+
+    Unless ``dedup_threshold`` is ``None``, chunks that are near duplicates of
+    an indexed chunk are not embedded; the indexed chunk lists them under
+    ``metadata["duplicates"]`` instead.
+    """
+
+    def __init__(self, root, embeddings, fingerprint="", dedup_threshold=0.85):
+        self.root = root
+        self.embeddings = embeddings
+        self.fingerprint = fingerprint
+        self.dedup_threshold = dedup_threshold
+        self.last_sync = {}
+        self.unsupported = []
+        self.version = None
+        self.lexical = None
+
+    # ---------------------- MANIFEST ----------------------
+    def _manifest_path(self):
+        return os.path.join(self.root, MANIFEST_NAME)
+
+    def load_manifest(self):
+        try:
+            with open(self._manifest_path(), "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if manifest.get("fingerprint") != self.fingerprint:
+            return None
+        return manifest
+
+    def _load_index(self):
+        try:
+            return FAISS.load_local(self.root, self.embeddings, index_name=INDEX_NAME)
+        except Exception:
+            return None
+
+    def _load_lexical(self, db):
+        if db is None:
+            return BM25Index()
+        try:
+            return BM25Index.load(os.path.join(self.root, LEXICAL_NAME))
+        except (OSError, ValueError, KeyError):
+            return BM25Index.from_docstore(db)
+
+    def _load_dedup(self, db):
+        if not self.dedup_threshold:
+            return None
+        if db is None:
+            return NearDuplicateIndex(threshold=self.dedup_threshold)
+        try:
+            dedup = NearDuplicateIndex.load(os.path.join(self.root, DEDUP_NAME))
+        except (OSError, ValueError, KeyError):
+            return NearDuplicateIndex.from_docstore(db, threshold=self.dedup_threshold)
+        dedup.threshold = self.dedup_threshold
+        return dedup
+
+    # ---------------------- SCAN ----------------------
+    def scan(self, docs_dir, extensions, previous):
+        """Stat every supported file, hashing only when size or mtime moved.
+
+        Files with other extensions are listed in ``self.unsupported``.
+        """
+        current = {}
+        self.unsupported = []
+        if not os.path.isdir(docs_dir):
+            return current
+        for fname in sorted(os.listdir(docs_dir)):
+            fpath = os.path.join(docs_dir, fname)
+            if not os.path.isfile(fpath) or fname.startswith("."):
+                continue
+            if not fname.lower().endswith(extensions):
+                self.unsupported.append(fname)
+                continue
+            st = os.stat(fpath)
+            old = previous.get(fname)
+            if old and old["size"] == st.st_size and old["mtime_ns"] == st.st_mtime_ns:
+                sha = old["sha256"]
+            else:
+                sha = file_sha256(fpath)
+            current[fname] = {"path": fpath, "size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": sha}
+        return current
+
+    # ---------------------- SYNC ----------------------
+    def check_unchanged(self, docs_dir, extensions):
+        """True if ``docs_dir`` still matches the persisted index; loads no vectors.
+
+        On success ``version``, ``lexical`` and ``last_sync`` are set as after a
+        no-op ``sync``, so a caller serving from another copy of the vectors
+        (``quantized_store.QuantizedStore``) never opens the FAISS index or
+        docstore. Returns ``False`` when ``sync`` is needed.
+        """
+        started = time.perf_counter()
+        manifest = self.load_manifest()
+        if manifest is None or not any(entry["ids"] for entry in manifest["files"].values()):
+            return False
+        previous = manifest["files"]
+        current = self.scan(docs_dir, extensions, previous)
+        if current.keys() != previous.keys() or any(current[f]["sha256"] != previous[f]["sha256"] for f in current):
+            return False
+        try:
+            lexical = BM25Index.load(os.path.join(self.root, LEXICAL_NAME))
+        except (OSError, ValueError, KeyError):
+            return False
+        files = {
+            fname: {**previous[fname], "size": entry["size"], "mtime_ns": entry["mtime_ns"]}
+            for fname, entry in current.items()
+        }
+        if files != previous:
+            self._write_manifest(self.root, {**manifest, "files": files})
+        self.version = manifest_version(files)
+        self.lexical = lexical
+        self.last_sync = {
+            "added": 0,
+            "changed": 0,
+            "removed": 0,
+            "unchanged": len(current),
+            "seconds": time.perf_counter() - started,
+            "ingest": None,
+            "unsupported": self.unsupported,
+            "failed": [],
+        }
+        return True
+
+    def sync(self, docs_dir, extensions, pipeline):
+        """Bring the persisted index in line with ``docs_dir`` and return it.
+
+        New and changed files are parsed and embedded through ``pipeline``
+        (an ``ingestion.IngestionPipeline``). Returns ``None`` when there is
+        nothing to index.
+        """
+        started = time.perf_counter()
+        manifest = self.load_manifest()
+        db = self._load_index() if manifest else None
+        if db is None:
+            manifest = {"fingerprint": self.fingerprint, "files": {}}
+        previous = manifest["files"]
+        lexical = self._load_lexical(db)
+        dedup = self._load_dedup(db)
+
+        current = self.scan(docs_dir, extensions, previous)
+        removed = [f for f in previous if f not in current]
+        changed = [f for f in current if f in previous and previous[f]["sha256"] != current[f]["sha256"]]
+        added = [f for f in current if f not in previous]
+        if dedup is not None:
+            changed += self._orphaned(dedup, previous, current, removed + changed)
+
+        touched = set()
+        stale_ids = [i for f in removed + changed for i in previous[f]["ids"]]
+        if db is not None and stale_ids:
+            db.delete(stale_ids)
+            for doc_id in stale_ids:
+                lexical.remove(doc_id)
+                if dedup is not None:
+                    dedup.remove(doc_id)
+        if dedup is not None:
+            for f in removed + changed:
+                for doc_id in previous[f].get("duplicates", []):
+                    dedup.remove_file(doc_id, f)
+                    touched.add(doc_id)
+
+        files = {}
+        for fname, entry in current.items():
+            if fname in previous and fname not in changed:
+                files[fname] = {**entry, "ids": previous[fname]["ids"],
+                                "duplicates": previous[fname].get("duplicates", [])}
+        by_path = {}
+        for fname in added + changed:
+            files[fname] = {**current[fname], "ids": [], "duplicates": []}
+            by_path[current[fname]["path"]] = fname
+
+        def skip_duplicate(path, index, text, metadata):
+            fname = by_path[path]
+            signature = dedup.hasher.signature(text)
+            canonical = dedup.find(signature)
+            if canonical is None:
+                dedup.add(chunk_id(fname, files[fname]["sha256"], index), signature)
+                return False
+            dedup.add_duplicate(canonical, {"file": fname, "source": metadata["source"], "page": metadata.get("page")})
+            files[fname]["duplicates"].append(canonical)
+            touched.add(canonical)
+            return True
+
+        skip = skip_duplicate if dedup is not None else None
+        for batch in pipeline.run(list(by_path), skip=skip) if by_path else []:
+            ids = []
+            for chunk in batch:
+                fname = by_path[chunk.path]
+                ids.append(chunk_id(fname, files[fname]["sha256"], chunk.index))
+                files[fname]["ids"].append(ids[-1])
+                lexical.add(ids[-1], chunk.text)
+            text_embeddings = [(chunk.text, chunk.vector) for chunk in batch]
+            metadatas = [chunk.metadata for chunk in batch]
+            if db is None:
+                db = FAISS.from_embeddings(text_embeddings, self.embeddings, metadatas=metadatas, ids=ids)
+            else:
+                db.add_embeddings(text_embeddings, metadatas=metadatas, ids=ids)
+        failed = [by_path[path] for path in pipeline.stats.failed] if by_path else []
+        for fname in failed:
+            # Left out of the manifest, so the next sync tries the file again.
+            entry = files.pop(fname)
+            if db is not None and entry["ids"]:
+                db.delete(entry["ids"])
+            for doc_id in entry["ids"]:
+                lexical.remove(doc_id)
+                if dedup is not None:
+                    dedup.remove(doc_id)
+            for doc_id in entry["duplicates"]:
+                dedup.remove_file(doc_id, fname)
+                touched.add(doc_id)
+        for entry in files.values():
+            entry.pop("path", None)
+        if db is not None:
+            self._update_duplicates(db, dedup, touched)
+
+        new_manifest = {"fingerprint": self.fingerprint, "files": files}
+        if not any(entry["ids"] for entry in files.values()):
+            self.clear()
+            db = None
+        elif removed or changed or added:
+            self._save(db, lexical, dedup, new_manifest)
+        elif files != previous:
+            # Touched but identical files: only the recorded mtimes moved.
+            self._write_manifest(self.root, new_manifest)
+
+        self.version = manifest_version(files) if db is not None else None
+        self.lexical = lexical if db is not None else None
+        self.last_sync = {
+            "added": len(added),
+            "changed": len(changed),
+            "removed": len(removed),
+            "unchanged": len(current) - len(added) - len(changed),
+            "seconds": time.perf_counter() - started,
+            "ingest": pipeline.stats if by_path else None,
+            "unsupported": self.unsupported,
+            "failed": failed,
+        }
+        return db
+
+    @staticmethod
+    def _orphaned(dedup, previous, current, gone):
+        """Unchanged files whose duplicate chunks were folded into chunks of ``gone`` files.
+
+        Their only indexed copy is going away, so they are re-ingested too
+        (which can orphan further files, hence the loop).
+        """
+        gone = set(gone)
+        orphaned = []
+        while True:
+            found = {
+                source["file"]
+                for f in gone
+                for doc_id in previous[f]["ids"]
+                for source in dedup.duplicates.get(doc_id, [])
+            }
+            found = sorted(f for f in found if f in current and f in previous and f not in gone)
+            if not found:
+                return orphaned
+            orphaned += found
+            gone.update(found)
+
+    @staticmethod
+    def _update_duplicates(db, dedup, doc_ids):
+        """Refresh ``metadata["duplicates"]`` of the canonical chunks in ``doc_ids``."""
+        for doc_id in doc_ids:
+            doc = db.docstore.search(doc_id)
+            if not isinstance(doc, Document):
+                continue
+            sources = [{"source": s["source"], "page": s["page"]} for s in dedup.duplicates.get(doc_id, [])]
+            if sources:
+                doc.metadata["duplicates"] = sources
+            else:
+                doc.metadata.pop("duplicates", None)
+
+    def _save(self, db, lexical, dedup, manifest):
+        """Write the indexes and manifest to a sibling directory, then swap it in."""
+        tmp = self.root + ".tmp"
+        old = self.root + ".old"
+        shutil.rmtree(tmp, ignore_errors=True)
+        db.save_local(tmp, index_name=INDEX_NAME)
+        lexical.save(os.path.join(tmp, LEXICAL_NAME))
+        if dedup is not None:
+            dedup.save(os.path.join(tmp, DEDUP_NAME))
+        self._write_manifest(tmp, manifest)
+        shutil.rmtree(old, ignore_errors=True)
+        if os.path.exists(self.root):
+            os.replace(self.root, old)
+        os.replace(tmp, self.root)
+        shutil.rmtree(old, ignore_errors=True)
+
+    @staticmethod
+    def _write_manifest(folder, manifest):
+        path = os.path.join(folder, MANIFEST_NAME)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        os.replace(path + ".tmp", path)
+
+    def clear(self):
+        shutil.rmtree(self.root, ignore_errors=True)
@@ -0,0 +1,182 @@
+import logging
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import List, NamedTuple
+
+from extractors import iter_sections
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WORKERS = int(os.getenv("INGEST_WORKERS", str(os.cpu_count() or 1)))
+DEFAULT_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "64"))
+
+
+# Bump when chunk text or metadata changes shape so persisted indexes rebuild.
+INGEST_VERSION = "3"
+
+
+# ---------------------- FILE PARSER ----------------------
+def iter_chunks(path, splitter, extractors=None):
+    """Stream ``(chunk, metadata)`` pairs straight from the parser into the splitter.
+
+    ``extractors`` maps MIME types to backend names (see ``extractors.parse_choices``).
+    """
+    source = os.path.basename(path)
+    for text, metadata in iter_sections(path, extractors):
+        for chunk in splitter.split_text(text):
+            yield chunk, {"source": source, **metadata}
+
+
+# ---------------------- WORKER ----------------------
+_splitter = None
+_extractors = None
+
+
+def _init_worker(chunk_size, chunk_overlap, extractors=None):
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+    global _splitter, _extractors
+    _splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    _extractors = extractors
+
+
+def parse_file(path):
+    """Parse and split one file. Runs inside a pool worker."""
+    return path, list(iter_chunks(path, _splitter, _extractors))
+
+
+# ---------------------- PIPELINE ----------------------
+class EmbeddedChunk(NamedTuple):
+    path: str
+    index: int
+    text: str
+    metadata: dict
+    vector: List[float]
+
+
+@dataclass
+class IngestStats:
+    files: int = 0
+    pages: int = 0
+    chunks: int = 0
+    duplicates: int = 0
+    seconds: float = 0.0
+    failed: List[str] = field(default_factory=list)
+
+    @property
+    def pages_per_s(self):
+        return self.pages / self.seconds if self.seconds else 0.0
+
+    @property
+    def chunks_per_s(self):
+        return self.chunks / self.seconds if self.seconds else 0.0
+
+    def __str__(self):
+        return (
+            f"{self.files} files, {self.pages} pages, {self.chunks} chunks "
+            f"({self.duplicates} near-duplicates skipped, {len(self.failed)} files failed) in {self.seconds:.1f}s "
+            f"({self.pages_per_s:.1f} pages/s, {self.chunks_per_s:.1f} chunks/s)"
+        )
+
+
+class IngestionPipeline:
+    """Parse files in a process pool and embed their chunks in fixed-size batches.
+
+    Parsing (PDF extraction in particular) is CPU-bound, so it fans out over
+    ``workers`` processes while the parent streams finished files' chunks to
+    the embedder ``batch_size`` texts at a time.
+    """
+
+    def __init__(self, embeddings, chunk_size, chunk_overlap, workers=DEFAULT_WORKERS, batch_size=DEFAULT_BATCH_SIZE,
+                 extractors=None):
+        self.embeddings = embeddings
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.extractors = extractors
+        self.workers = max(1, workers)
+        self.batch_size = max(1, batch_size)
+        self.stats = IngestStats()
+
+    def iter_parsed(self, paths):
+        """Yield ``(path, chunks)`` per file, in order, as soon as it is parsed.
+
+        In-process, ``chunks`` is a lazy generator so pages flow one at a time
+        from the parser to the embedder. With a pool, each worker returns a
+        whole file's chunks and at most ``2 * workers`` files are in flight,
+        so memory is bounded by a few files, not by the corpus.
+        """
+        if self.workers == 1 or len(paths) < 2:
+            _init_worker(self.chunk_size, self.chunk_overlap, self.extractors)
+            for path in paths:
+                yield path, iter_chunks(path, _splitter, _extractors)
+            return
+        # spawn, not fork: the Streamlit server process is multi-threaded.
+        ctx = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(
+            max_workers=min(self.workers, len(paths)),
+            mp_context=ctx,
+            initializer=_init_worker,
+            initargs=(self.chunk_size, self.chunk_overlap, self.extractors),
+        ) as pool:
+            window = deque()
+            for path in paths:
+                window.append((path, pool.submit(parse_file, path)))
+                if len(window) >= 2 * self.workers:
+                    yield self._parsed(*window.popleft())
+            while window:
+                yield self._parsed(*window.popleft())
+
+    @staticmethod
+    def _parsed(path, future):
+        """``(path, chunks)`` of a pool task; like in-process parsing, errors surface while reading ``chunks``."""
+
+        def chunks():
+            yield from future.result()[1]
+
+        return path, chunks()
+
+    def run(self, paths, skip=None):
+        """Yield lists of ``EmbeddedChunk``, at most ``batch_size`` per list.
+
+        Chunks for which ``skip(path, index, text, metadata)`` is true (near
+        duplicates of already indexed text) are dropped before embedding but
+        keep their position, so chunk indexes stay stable.
+        A file that fails to parse is logged and listed in ``self.stats.failed``;
+        chunks it yielded before the error may already be in earlier batches,
+        so the caller must discard them. ``self.stats`` holds the throughput
+        figures once the generator is exhausted.
+        """
+        self.stats = IngestStats()
+        started = time.perf_counter()
+        pending = []
+        for path, chunks in self.iter_parsed(list(paths)):
+            self.stats.files += 1
+            pages = 0
+            try:
+                for i, (chunk, metadata) in enumerate(chunks):
+                    pages = max(pages, metadata.get("page", 1))
+                    if skip is not None and skip(path, i, chunk, metadata):
+                        self.stats.duplicates += 1
+                        continue
+                    pending.append((path, i, chunk, metadata))
+                    if len(pending) >= self.batch_size:
+                        yield self._embed(pending)
+                        pending = []
+            except Exception as e:
+                # One corrupt or unreadable file must not abort the whole sync.
+                logger.warning("Skipping %s: %s: %s", path, type(e).__name__, e)
+                self.stats.failed.append(path)
+            self.stats.pages += pages
+        if pending:
+            yield self._embed(pending)
+        self.stats.seconds = time.perf_counter() - started
+        logger.info("Ingestion finished: %s", self.stats)
+
+    def _embed(self, pending):
+        vectors = self.embeddings.embed_documents([text for _, _, text, _ in pending])
+        self.stats.chunks += len(pending)
+        return [EmbeddedChunk(p, i, t, m, v) for (p, i, t, m), v in zip(pending, vectors)]
@@ -0,0 +1,183 @@
+import json
+import math
+import re
+from collections import Counter
+from typing import Any, List
+
+import numpy as np
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+# Keeps identifiers such as ERR-4021, PN_00123 or v2.3.1 as single tokens.
+_TOKEN = re.compile(r"[a-z0-9]+(?:[-_./][a-z0-9]+)*")
+
+
+def tokenize(text):
+    """Lower-cased tokens; compound identifiers also contribute their parts."""
+    tokens = []
+    for token in _TOKEN.findall(text.lower()):
+        tokens.append(token)
+        parts = re.split(r"[-_./]", token)
+        if len(parts) > 1:
+            tokens.extend(p for p in parts if p)
+    return tokens
+
+
+class BM25Index:
+    """Incrementally updatable inverted index with Okapi BM25 scoring."""
+
+    def __init__(self, k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.doc_terms = {}
+        self.doc_lengths = {}
+        self.postings = {}
+        self.total_length = 0
+
+    def __len__(self):
+        return len(self.doc_terms)
+
+    def add(self, doc_id, text):
+        if doc_id in self.doc_terms:
+            self.remove(doc_id)
+        terms = Counter(tokenize(text))
+        self._insert(doc_id, terms)
+
+    def _insert(self, doc_id, terms):
+        self.doc_terms[doc_id] = terms
+        self.doc_lengths[doc_id] = sum(terms.values())
+        self.total_length += self.doc_lengths[doc_id]
+        for term, tf in terms.items():
+            self.postings.setdefault(term, {})[doc_id] = tf
+
+    def remove(self, doc_id):
+        terms = self.doc_terms.pop(doc_id, None)
+        if terms is None:
+            return
+        self.total_length -= self.doc_lengths.pop(doc_id)
+        for term in terms:
+            posting = self.postings.get(term)
+            if posting is not None:
+                posting.pop(doc_id, None)
+                if not posting:
+                    del self.postings[term]
+
+    def search(self, query, k=4):
+        """Return ``[(doc_id, score)]`` best first."""
+        n = len(self.doc_terms)
+        if not n:
+            return []
+        avg_len = self.total_length / n
+        scores = Counter()
+        for term in set(tokenize(query)):
+            posting = self.postings.get(term)
+            if not posting:
+                continue
+            idf = math.log(1 + (n - len(posting) + 0.5) / (len(posting) + 0.5))
+            for doc_id, tf in posting.items():
+                norm = tf + self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_id] / avg_len)
+                scores[doc_id] += idf * tf * (self.k1 + 1) / norm
+        return scores.most_common(k)
+
+    # ---------------------- PERSISTENCE ----------------------
+    def save(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"k1": self.k1, "b": self.b, "docs": self.doc_terms}, f)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        index = cls(k1=data["k1"], b=data["b"])
+        for doc_id, terms in data["docs"].items():
+            index._insert(doc_id, Counter(terms))
+        return index
+
+    @classmethod
+    def from_docstore(cls, vectorstore):
+        """Rebuild from a FAISS store's documents (indexes saved before BM25 existed)."""
+        index = cls()
+        for doc_id in vectorstore.index_to_docstore_id.values():
+            doc = vectorstore.docstore.search(doc_id)
+            if isinstance(doc, Document):
+                index.add(doc_id, doc.page_content)
+        return index
+
+
+def reciprocal_rank_fusion(rankings, k=60):
+    """Fuse several best-first id lists; ``k`` damps the weight of top ranks."""
+    scores = Counter()
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking):
+            scores[doc_id] += 1.0 / (k + rank + 1)
+    return [doc_id for doc_id, _ in scores.most_common()]
+
+
+class HybridRetriever(BaseRetriever):
+    """BM25 + FAISS retrieval fused with reciprocal rank fusion.
+
+    When the lexical match is clearly decisive (a high top score with a wide
+    margin over the runner-up, typical for error codes and part numbers) the
+    BM25 hits are returned alone and the query is never embedded.
+    ``mode="dense"`` skips BM25 entirely.
+
+    ``vectorstore`` is a LangChain FAISS store or anything exposing
+    ``search_ids(query, n)`` and ``get_documents(ids)`` such as
+    ``quantized_store.QuantizedStore``.
+    """
+
+    vectorstore: Any
+    lexical: Any
+    k: int = 4
+    fetch_k: int = 20
+    rrf_k: int = 60
+    mode: str = "hybrid"
+    lexical_min_score: float = 5.0
+    lexical_margin: float = 0.3
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    def lexical_confident(self, hits):
+        if not hits or hits[0][1] < self.lexical_min_score:
+            return False
+        if len(hits) == 1:
+            return True
+        return (hits[0][1] - hits[1][1]) / hits[0][1] >= self.lexical_margin
+
+    def dense_ids(self, query):
+        if hasattr(self.vectorstore, "search_ids"):
+            return self.vectorstore.search_ids(query, self.fetch_k)
+        vector = np.array([self.vectorstore._embed_query(query)], dtype=np.float32)
+        _, positions = self.vectorstore.index.search(vector, self.fetch_k)
+        return [self.vectorstore.index_to_docstore_id[i] for i in positions[0] if i != -1]
+
+    def _docs(self, ids):
+        if hasattr(self.vectorstore, "get_documents"):
+            return self.vectorstore.get_documents(ids)
+        docs = [self.vectorstore.docstore.search(doc_id) for doc_id in ids]
+        return [doc for doc in docs if isinstance(doc, Document)]
+
+    def retrieve(self, query):
+        """``(docs, path)``; ``path`` is ``"dense"``, ``"hybrid"`` or ``"lexical"`` (query not embedded)."""
+        if self.mode == "dense":
+            return self._docs(self.dense_ids(query)[: self.k]), "dense"
+        hits = self.lexical.search(query, self.fetch_k)
+        if self.lexical_confident(hits):
+            return self._docs([doc_id for doc_id, _ in hits[: self.k]]), "lexical"
+        fused = reciprocal_rank_fusion([self.dense_ids(query), [doc_id for doc_id, _ in hits]], k=self.rrf_k)
+        return self._docs(fused[: self.k]), "hybrid"
+
+    def lexical_path(self, query):
+        """True if ``retrieve(query)`` takes the BM25-only path; costs one BM25 search, no embedding."""
+        return self.mode != "dense" and self.lexical_confident(self.lexical.search(query, self.fetch_k))
+
+    def close(self):
+        """Release the vector store's files, for stores that hold any (``QuantizedStore``)."""
+        close = getattr(self.vectorstore, "close", None)
+        if close is not None:
+            close()
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        return self.retrieve(query)[0]
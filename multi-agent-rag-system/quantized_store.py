@@ -0,0 +1,244 @@
+"""int8 scalar-quantized vector store backed by memory-mapped files.
+
+Every array (int8 codes, optional float32 originals for re-ranking, chunk
+text offsets, sorted ids) is opened with ``mmap``, so several Streamlit
+processes serving the same index share one copy through the OS page cache
+instead of each holding the vectors and docstore in private memory.
+"""
+import glob
+import json
+import mmap
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+
+import numpy as np
+from langchain_core.documents import Document
+
+try:
+    import fcntl
+except ImportError:  # Windows: replicas sharing one store are not supported there
+    fcntl = None
+
+META_NAME = "meta.json"
+ID_DTYPE = "S64"
+
+
+@contextmanager
+def store_lock(folder):
+    """Exclusive lock on ``folder`` across processes, held while a store is built or opened.
+
+    Opening happens under the lock too, so a replica never sees the store
+    in the middle of being swapped for a rebuilt one.
+    """
+    if fcntl is None:
+        yield
+        return
+    parent = os.path.dirname(os.path.abspath(folder))
+    os.makedirs(parent, exist_ok=True)
+    with open(folder + ".lock", "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class QuantizedStore:
+    """Approximate L2 search over int8 codes with optional exact re-ranking.
+
+    Codes are per-dimension affine quantized (``v ~ (q + 128) * scale + low``),
+    so the query-code dot product is one int8 x float32 matmul per block.
+    With ``rerank`` the best ``rerank_k`` candidates are re-scored against
+    their float32 originals; only those rows are paged in. Each block is
+    widened to float32 for the matmul, so a query's scratch memory is
+    ``block_rows * dim * 4`` bytes (12 MB at 4096 x 768), whatever the store size.
+    """
+
+    def __init__(self, folder, embeddings, rerank=True, rerank_k=50, block_rows=4096):
+        self.folder = folder
+        self.embeddings = embeddings
+        self.rerank = rerank
+        self.rerank_k = rerank_k
+        self.block_rows = block_rows
+        with store_lock(folder):
+            self._open(folder)
+
+    def _open(self, folder):
+        with open(os.path.join(folder, META_NAME), "r", encoding="utf-8") as f:
+            self.meta = json.load(f)
+        n, dim = self.meta["rows"], self.meta["dim"]
+        self.codes = np.memmap(os.path.join(folder, "codes.int8"), dtype=np.int8, mode="r", shape=(n, dim))
+        self.full = np.memmap(os.path.join(folder, "vectors.f32"), dtype=np.float32, mode="r", shape=(n, dim))
+        self.scale = np.load(os.path.join(folder, "scale.npy"))
+        self.low = np.load(os.path.join(folder, "low.npy"))
+        self.sq_norms = np.load(os.path.join(folder, "sq_norms.npy"), mmap_mode="r")
+        self.offsets = np.load(os.path.join(folder, "offsets.npy"), mmap_mode="r")
+        self.sorted_ids = np.load(os.path.join(folder, "sorted_ids.npy"), mmap_mode="r")
+        self.sorted_rows = np.load(os.path.join(folder, "sorted_rows.npy"), mmap_mode="r")
+        self._docs_file = open(os.path.join(folder, "docs.jsonl"), "rb")
+        self._docs = mmap.mmap(self._docs_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __len__(self):
+        return self.meta["rows"]
+
+    # ---------------------- SEARCH ----------------------
+    def search_vector(self, vector, n):
+        """Return ``(rows, squared_distances)`` of the ``n`` nearest rows."""
+        x = np.asarray(vector, dtype=np.float32)
+        weights = self.scale * x
+        bias = float(np.dot(self.low + 128.0 * self.scale, x))
+        want = min(len(self), max(n, self.rerank_k if self.rerank else n))
+        best_rows = np.empty(0, dtype=np.int64)
+        best_dists = np.empty(0, dtype=np.float32)
+        for start in range(0, len(self), self.block_rows):
+            block = self.codes[start:start + self.block_rows]
+            dots = block.astype(np.float32) @ weights + bias
+            dists = self.sq_norms[start:start + len(block)] - 2.0 * dots
+            rows = np.arange(start, start + len(block))
+            best_rows = np.concatenate([best_rows, rows])
+            best_dists = np.concatenate([best_dists, dists.astype(np.float32)])
+            if len(best_rows) > want:
+                keep = np.argpartition(best_dists, want - 1)[:want]
+                best_rows, best_dists = best_rows[keep], best_dists[keep]
+        if self.rerank and len(best_rows):
+            exact = self.full[np.sort(best_rows)]
+            best_rows = np.sort(best_rows)
+            best_dists = ((exact - x) ** 2).sum(axis=1) - float(np.dot(x, x))
+        order = np.argsort(best_dists)[:n]
+        return best_rows[order], best_dists[order] + float(np.dot(x, x))
+
+    def search_ids(self, query, n):
+        rows, _ = self.search_vector(self.embeddings.embed_query(query), n)
+        return [self._record(row)["id"] for row in rows]
+
+    def similarity_search_by_vector(self, embedding, k=4):
+        """Same signature as LangChain's FAISS store."""
+        rows, _ = self.search_vector(embedding, k)
+        return [self._document(self._record(row)) for row in rows]
+
+    # ---------------------- DOCUMENTS ----------------------
+    def _record(self, row):
+        return json.loads(self._docs[int(self.offsets[row]):int(self.offsets[row + 1])])
+
+    @staticmethod
+    def _document(record):
+        return Document(page_content=record["text"], metadata=record["metadata"])
+
+    def get_documents(self, ids):
+        keys = np.array([doc_id.encode("utf-8") for doc_id in ids], dtype=ID_DTYPE)
+        positions = np.searchsorted(self.sorted_ids, keys)
+        docs = []
+        for key, pos in zip(keys, positions):
+            if pos < len(self.sorted_ids) and self.sorted_ids[pos] == key:
+                docs.append(self._document(self._record(self.sorted_rows[pos])))
+        return docs
+
+    def close(self):
+        """Unmap the files; arrays a caller still holds stay valid until dropped. Idempotent."""
+        if self._docs_file.closed:
+            return
+        self._docs.close()
+        self._docs_file.close()
+        self.codes = self.full = self.sq_norms = self.offsets = self.sorted_ids = self.sorted_rows = None
+
+    # ---------------------- BUILD ----------------------
+    @staticmethod
+    def is_current(folder, version):
+        try:
+            with open(os.path.join(folder, META_NAME), "r", encoding="utf-8") as f:
+                return json.load(f).get("version") == version
+        except (OSError, ValueError):
+            return False
+
+    @classmethod
+    def build(cls, folder, rows, dim, vector_blocks, records, version=None):
+        """Write a store from ``vector_blocks()`` (an iterable factory of float32
+        arrays, read twice) and ``records`` (``{"id", "text", "metadata"}`` per row).
+
+        Replicas sharing ``folder`` build one at a time; when another one has
+        already built ``version`` by the time the lock is taken, this is a no-op.
+        """
+        with store_lock(folder):
+            if version is not None and cls.is_current(folder, version):
+                return
+            # Under the lock, leftovers of crashed builds are nobody's work in progress.
+            for stale in glob.glob(glob.escape(folder) + ".tmp-*"):
+                shutil.rmtree(stale, ignore_errors=True)
+            parent, name = os.path.split(os.path.abspath(folder))
+            tmp = tempfile.mkdtemp(prefix=name + ".tmp-", dir=parent)
+            try:
+                cls._write(tmp, rows, dim, vector_blocks, records, version)
+            except BaseException:
+                shutil.rmtree(tmp, ignore_errors=True)
+                raise
+            old = folder + ".old"
+            shutil.rmtree(old, ignore_errors=True)
+            if os.path.exists(folder):
+                os.replace(folder, old)
+            os.replace(tmp, folder)
+            shutil.rmtree(old, ignore_errors=True)
+
+    @staticmethod
+    def _write(tmp, rows, dim, vector_blocks, records, version):
+        low = np.full(dim, np.inf, dtype=np.float32)
+        high = np.full(dim, -np.inf, dtype=np.float32)
+        for block in vector_blocks():
+            low = np.minimum(low, block.min(axis=0))
+            high = np.maximum(high, block.max(axis=0))
+        scale = np.maximum((high - low) / 255.0, 1e-12).astype(np.float32)
+
+        codes = np.memmap(os.path.join(tmp, "codes.int8"), dtype=np.int8, mode="w+", shape=(rows, dim))
+        full = np.memmap(os.path.join(tmp, "vectors.f32"), dtype=np.float32, mode="w+", shape=(rows, dim))
+        sq_norms = np.empty(rows, dtype=np.float32)
+        start = 0
+        for block in vector_blocks():
+            end = start + len(block)
+            codes[start:end] = (np.clip(np.rint((block - low) / scale), 0, 255) - 128).astype(np.int8)
+            full[start:end] = block
+            # Norms of the dequantized vectors keep approximate distances consistent.
+            dequant = (codes[start:end].astype(np.float32) + 128.0) * scale + low
+            sq_norms[start:end] = (dequant ** 2).sum(axis=1)
+            start = end
+        codes.flush()
+        full.flush()
+        del codes, full
+
+        offsets = np.empty(rows + 1, dtype=np.int64)
+        ids = np.empty(rows, dtype=ID_DTYPE)
+        offsets[0] = 0
+        with open(os.path.join(tmp, "docs.jsonl"), "wb") as f:
+            for row, record in enumerate(records):
+                line = json.dumps(record).encode("utf-8") + b"\n"
+                f.write(line)
+                offsets[row + 1] = offsets[row] + len(line)
+                ids[row] = record["id"].encode("utf-8")
+        order = np.argsort(ids)
+
+        np.save(os.path.join(tmp, "scale.npy"), scale)
+        np.save(os.path.join(tmp, "low.npy"), low)
+        np.save(os.path.join(tmp, "sq_norms.npy"), sq_norms)
+        np.save(os.path.join(tmp, "offsets.npy"), offsets)
+        np.save(os.path.join(tmp, "sorted_ids.npy"), ids[order])
+        np.save(os.path.join(tmp, "sorted_rows.npy"), order.astype(np.int64))
+        with open(os.path.join(tmp, META_NAME), "w", encoding="utf-8") as f:
+            json.dump({"rows": rows, "dim": dim, "version": version}, f)
+
+    @classmethod
+    def export_faiss(cls, db, folder, version=None, block_rows=65536):
+        """Quantize a LangChain FAISS store (flat index) into ``folder``."""
+        index = db.index
+        rows, dim = index.ntotal, index.d
+
+        def vector_blocks():
+            for start in range(0, rows, block_rows):
+                yield index.reconstruct_n(start, min(block_rows, rows - start)).astype(np.float32)
+
+        def records():
+            for row in range(rows):
+                doc_id = db.index_to_docstore_id[row]
+                doc = db.docstore.search(doc_id)
+                yield {"id": doc_id, "text": doc.page_content, "metadata": doc.metadata}
+
+        cls.build(folder, rows, dim, vector_blocks, records(), version=version)
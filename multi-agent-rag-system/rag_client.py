@@ -0,0 +1,50 @@
+"""Blocking client for ``service.py``; lets the Streamlit page run as a thin client."""
+import json
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class RAGClient:
+    def __init__(self, base_url, timeout=300, pool_size=8):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def answer(self, query, collection=None, speculative=False, preference=None, session=None):
+        response = self.session.post(
+            f"{self.base_url}/query",
+            json={"query": query, "collection": collection, "session": session, "speculative": speculative,
+                  "preference": preference},
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+        return response.json()
+
+    def stream(self, query, collection=None, speculative=False, preference=None, session=None):
+        """Yield ``{"token": ...}`` events, then one ``{"done": True, ...}`` event."""
+        with self.session.post(
+            f"{self.base_url}/query/stream",
+            json={"query": query, "collection": collection, "session": session, "speculative": speculative,
+                  "preference": preference},
+            stream=True,
+            timeout=self.timeout,
+        ) as response:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if line:
+                    yield json.loads(line)
+
+    def collection_ids(self):
+        response = self.session.get(f"{self.base_url}/collections", timeout=10)
+        response.raise_for_status()
+        return response.json()["collections"]
+
+    def stats(self, collection=None):
+        params = {"collection": collection} if collection else None
+        response = self.session.get(f"{self.base_url}/stats", params=params, timeout=10)
+        response.raise_for_status()
+        return response.json()
@@ -0,0 +1,331 @@
+"""Local query routing: keyword rules, index similarity and a Naive Bayes model.
+
+The LLM is only asked to classify a query when the local signals disagree or
+are weak. Every decision is appended to a JSONL log; retrain the classifier
+(and recalibrate the index-similarity thresholds) from it offline with:
+
+    python router.py --retrain
+"""
+import argparse
+import json
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter
+from dataclasses import asdict, dataclass, field
+from typing import Dict, Optional
+
+import numpy as np
+
+ROUTES = ("web", "rag", "llm")
+DEFAULT_MODEL_PATH = os.getenv("ROUTER_MODEL_PATH", "router_model.json")
+DEFAULT_LOG_PATH = os.getenv("ROUTER_LOG_PATH", "logs/routing_decisions.jsonl")
+
+RULES = {
+    "web": re.compile(
+        r"\b(latest|today|tonight|yesterday|tomorrow|current(ly)?|news|recent(ly)?|right now|this (week|month|year)"
+        r"|price|stock|weather|forecast|score|trending|live|20[2-9]\d)\b",
+        re.IGNORECASE,
+    ),
+    "rag": re.compile(
+        r"\b((my|our|the|these|uploaded) (docs?|documents?|files?|pdfs?|notes|manuals?|polic(y|ies)|reports?|papers?)"
+        r"|according to|in the (document|file|manual|policy)|knowledge base|my_docs)\b",
+        re.IGNORECASE,
+    ),
+}
+# Error codes and part numbers (E-1042, PN-00123) only make sense against our docs.
+# A match counts only if the lexical index has the token, so "COVID-19" stays general.
+IDENTIFIER = re.compile(r"\b[A-Z]{1,5}[-_]?\d{2,}[A-Z0-9_-]*\b")
+# Cosine similarity of the query to its nearest indexed chunk: above RAG_HIGH the index
+# clearly covers it, below RAG_LOW it clearly does not. ``--retrain`` refits both.
+RAG_HIGH, RAG_LOW = 0.75, 0.5
+
+SEED_EXAMPLES = [
+    ("What's the latest news about artificial intelligence?", "web"),
+    ("Current stock price of Tesla", "web"),
+    ("Recent developments in quantum computing", "web"),
+    ("What's today's weather in London?", "web"),
+    ("Who won the match last night?", "web"),
+    ("What are the trending topics this week?", "web"),
+    ("Summarize the key findings in my research papers", "rag"),
+    ("What does the document say about refunds?", "rag"),
+    ("Find information about onboarding in the uploaded files", "rag"),
+    ("According to our policy, how many leave days do I get?", "rag"),
+    ("What does error code E-1042 mean in the manual?", "rag"),
+    ("List the requirements described in the report", "rag"),
+    ("Explain how neural networks work", "llm"),
+    ("What is the difference between supervised and unsupervised learning?", "llm"),
+    ("How does blockchain technology work?", "llm"),
+    ("Write a haiku about autumn", "llm"),
+    ("Explain photosynthesis", "llm"),
+    ("What is a binary search tree?", "llm"),
+]
+
+_WORD = re.compile(r"[a-z0-9_]+")
+
+
+def tokenize(text):
+    words = _WORD.findall(text.lower())
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+# ---------------------- CLASSIFIER ----------------------
+class NaiveBayesClassifier:
+    """Multinomial Naive Bayes over word unigrams and bigrams."""
+
+    def __init__(self, alpha=1.0):
+        self.alpha = alpha
+        self.class_counts = Counter()
+        self.token_counts = {route: Counter() for route in ROUTES}
+        # ``(rag_low, rag_high)`` fitted by ``--retrain``; stored with the model.
+        self.rag_thresholds = None
+
+    def fit(self, samples):
+        for text, route in samples:
+            self.class_counts[route] += 1
+            self.token_counts[route].update(tokenize(text))
+        return self
+
+    def predict_proba(self, text) -> Dict[str, float]:
+        total_docs = sum(self.class_counts.values())
+        if not total_docs:
+            return {route: 1 / len(ROUTES) for route in ROUTES}
+        vocab = len(set().union(*self.token_counts.values())) or 1
+        tokens = tokenize(text)
+        log_probs = {}
+        for route in ROUTES:
+            counts = self.token_counts[route]
+            denom = sum(counts.values()) + self.alpha * vocab
+            score = math.log((self.class_counts[route] + self.alpha) / (total_docs + self.alpha * len(ROUTES)))
+            for token in tokens:
+                score += math.log((counts[token] + self.alpha) / denom)
+            log_probs[route] = score
+        top = max(log_probs.values())
+        exp = {route: math.exp(score - top) for route, score in log_probs.items()}
+        norm = sum(exp.values())
+        return {route: value / norm for route, value in exp.items()}
+
+    def save(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({
+                "alpha": self.alpha,
+                "class_counts": self.class_counts,
+                "token_counts": self.token_counts,
+                "rag_thresholds": self.rag_thresholds,
+            }, f)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        model = cls(alpha=data["alpha"])
+        model.class_counts = Counter(data["class_counts"])
+        for route in ROUTES:
+            model.token_counts[route] = Counter(data["token_counts"].get(route, {}))
+        model.rag_thresholds = data.get("rag_thresholds")
+        return model
+
+
+# ---------------------- ROUTER ----------------------
+@dataclass
+class RouteDecision:
+    route: str
+    confidence: float
+    source: str
+    probs: Dict[str, float] = field(default_factory=dict)
+    rule_hits: tuple = ()
+    rag_score: Optional[float] = None
+    seconds: float = 0.0
+
+
+class QueryRouter:
+    """Combine rules, retriever similarity and the classifier; ask the LLM last.
+
+    ``fallback(query, history)`` is the LLM classifier, used only when the
+    combined local confidence is below ``min_confidence``; ``history`` is the
+    conversation context passed to ``route()`` (or ``None``).
+    """
+
+    RULE_WEIGHT = 1.0
+    SCORE_WEIGHT = 1.0
+
+    def __init__(self, fallback=None, model_path=DEFAULT_MODEL_PATH, log_path=DEFAULT_LOG_PATH,
+                 min_confidence=0.7, rag_high=None, rag_low=None):
+        self.fallback = fallback
+        self.log_path = log_path
+        self.min_confidence = min_confidence
+        self._log_lock = threading.Lock()
+        if os.path.exists(model_path):
+            self.classifier = NaiveBayesClassifier.load(model_path)
+        else:
+            self.classifier = NaiveBayesClassifier().fit(SEED_EXAMPLES)
+        fitted_low, fitted_high = self.classifier.rag_thresholds or (RAG_LOW, RAG_HIGH)
+        self.rag_high = fitted_high if rag_high is None else rag_high
+        self.rag_low = fitted_low if rag_low is None else rag_low
+
+    def rag_score(self, query, retriever):
+        """Cosine similarity (-1..1) of the query to its nearest chunk in the vector index.
+
+        The chunk's vector is read back from the index, so routing costs one
+        query embedding and one search, never an embedding of the chunk.
+        """
+        vectorstore = getattr(retriever, "vectorstore", None)
+        embeddings = getattr(vectorstore, "embeddings", None)
+        if embeddings is None:
+            return None
+        try:
+            query_vector = np.asarray(embeddings.embed_query(query), dtype=np.float32)
+            doc_vector = self.nearest_vector(vectorstore, query_vector)
+        except Exception:
+            return None
+        if doc_vector is None:
+            return None
+        q, d = query_vector, np.asarray(doc_vector, dtype=np.float32)
+        return float(q @ d / max(np.linalg.norm(q) * np.linalg.norm(d), 1e-12))
+
+    @staticmethod
+    def nearest_vector(vectorstore, query_vector):
+        """Stored vector of the chunk nearest to ``query_vector``, or ``None`` for an empty index."""
+        if hasattr(vectorstore, "search_vector"):  # quantized_store.QuantizedStore
+            rows, _ = vectorstore.search_vector(query_vector, 1)
+            return vectorstore.full[int(rows[0])] if len(rows) else None
+        _, positions = vectorstore.index.search(query_vector.reshape(1, -1), 1)
+        position = int(positions[0][0])
+        return vectorstore.index.reconstruct(position) if position != -1 else None
+
+    @staticmethod
+    def known_identifier(query, retriever):
+        """True if the query names an identifier that occurs in the indexed documents."""
+        postings = getattr(getattr(retriever, "lexical", None), "postings", None)
+        if not postings:
+            return False
+        return any(match.lower() in postings for match in IDENTIFIER.findall(query))
+
+    def route(self, query, retriever=None, history=None):
+        started = time.perf_counter()
+        rule_hits = tuple(route for route, pattern in RULES.items() if pattern.search(query))
+        if "rag" not in rule_hits and self.known_identifier(query, retriever):
+            rule_hits += ("rag",)
+        probs = self.classifier.predict_proba(query)
+        scores = dict(probs)
+        for route in rule_hits:
+            scores[route] += self.RULE_WEIGHT
+        decision = self._decide(scores, "local", probs, rule_hits, None)
+
+        # Similarity against the index is an embedding call; only pay for it
+        # when the cheap signals are not already confident.
+        if decision.confidence < self.min_confidence and retriever is not None:
+            rag_score = self.rag_score(query, retriever)
+            if rag_score is not None:
+                if rag_score >= self.rag_high:
+                    scores["rag"] += self.SCORE_WEIGHT
+                elif rag_score < self.rag_low:
+                    scores["rag"] = max(0.0, scores["rag"] - self.SCORE_WEIGHT)
+            decision = self._decide(scores, "local", probs, rule_hits, rag_score)
+
+        if decision.confidence < self.min_confidence and self.fallback is not None:
+            decision.route = self.fallback(query, history)
+            decision.source = "llm"
+        if retriever is None and decision.route == "rag":
+            decision.route = "llm"
+            decision.source = "no-index"
+        decision.seconds = time.perf_counter() - started
+        self.log(query, decision)
+        return decision
+
+    @staticmethod
+    def _decide(scores, source, probs, rule_hits, rag_score):
+        total = sum(scores.values()) or 1.0
+        route = max(scores, key=scores.get)
+        return RouteDecision(route, scores[route] / total, source, probs, rule_hits, rag_score)
+
+    def log(self, query, decision):
+        if not self.log_path:
+            return
+        record = {"ts": time.time(), "query": query, **asdict(decision), "rag_metric": "cosine"}
+        os.makedirs(os.path.dirname(self.log_path) or ".", exist_ok=True)
+        with self._log_lock, open(self.log_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+
+
+# ---------------------- OFFLINE TRAINING ----------------------
+def labelled_records(log_path, min_confidence=0.8):
+    """``(record, label)`` pairs from the decision log.
+
+    A record's ``label`` field (added by hand when reviewing) wins; otherwise
+    LLM decisions and confident local ones are used as-is.
+    """
+    if not os.path.exists(log_path):
+        return
+    with open(log_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            label = record.get("label")
+            if label is None and record.get("source") == "no-index":
+                continue
+            if label is None and (record.get("source") == "llm" or record.get("confidence", 0) >= min_confidence):
+                label = record.get("route")
+            if label in ROUTES:
+                yield record, label
+
+
+def load_training_samples(log_path, min_confidence=0.8):
+    return [(record["query"], label) for record, label in labelled_records(log_path, min_confidence)]
+
+
+def calibrate_rag_thresholds(log_path, precision=0.9, min_samples=10):
+    """``(rag_low, rag_high)`` fitted to the cosine ``rag_score`` of labelled queries, or ``None``.
+
+    ``rag_high`` is the lowest score at and above which at least ``precision``
+    of the queries were rag; ``rag_low`` the highest score at and below which
+    at least ``precision`` were not. ``None`` until each side has ``min_samples``.
+    """
+    scored = sorted(
+        (record["rag_score"], label == "rag") for record, label in labelled_records(log_path)
+        if record.get("rag_metric") == "cosine" and record.get("rag_score") is not None
+    )
+    rag = [is_rag for _, is_rag in scored]
+    if sum(rag) < min_samples or len(rag) - sum(rag) < min_samples:
+        return None
+    n = len(scored)
+    suffix_rag = [0] * (n + 1)
+    for i in range(n - 1, -1, -1):
+        suffix_rag[i] = suffix_rag[i + 1] + rag[i]
+    high = next((scored[i][0] for i in range(n) if suffix_rag[i] >= precision * (n - i)), None)
+    low, other = None, 0
+    for i, (score, is_rag) in enumerate(scored):
+        other += not is_rag
+        if other >= precision * (i + 1):
+            low = score
+    if high is None or low is None:
+        return None
+    return min(low, high), high
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Retrain the local query router from the decision log.")
+    parser.add_argument("--retrain", action="store_true", help="fit the classifier and write it to --model")
+    parser.add_argument("--log", default=DEFAULT_LOG_PATH)
+    parser.add_argument("--model", default=DEFAULT_MODEL_PATH)
+    args = parser.parse_args()
+    if not args.retrain:
+        parser.print_help()
+        return
+    samples = SEED_EXAMPLES + load_training_samples(args.log)
+    model = NaiveBayesClassifier().fit(samples)
+    model.rag_thresholds = calibrate_rag_thresholds(args.log)
+    model.save(args.model)
+    print(f"Trained on {len(samples)} samples ({Counter(r for _, r in samples)}) -> {args.model}")
+    if model.rag_thresholds:
+        print(f"Index similarity thresholds: low {model.rag_thresholds[0]:.3f}, high {model.rag_thresholds[1]:.3f}")
+    else:
+        print(f"Too few scored queries to calibrate; using low {RAG_LOW}, high {RAG_HIGH}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,393 @@
+"""Models, indexes and the agent graph, built without Streamlit.
+
+``app.py`` and ``service.py`` keep one ``Runtime`` per server process;
+``batch.py`` builds its own for headless runs. Configuration comes from the
+environment (``.env``).
+
+Documents live in collections: ``default`` is ``my_docs`` with its index in
+``INDEX_DIR``; any other collection ``<id>`` is ``COLLECTIONS_DIR/<id>/``
+with its index in ``INDEX_DIR.collections/<id>``. Each is loaded on first
+use (see ``collection_registry``).
+
+Nothing heavy happens at import or construction time: each component (and
+the LangChain, FAISS and Gemini modules behind it) is imported and built on
+first use, once per process. ``warm_up()`` builds them all on a background
+thread so a UI can render first.
+"""
+import os
+import threading
+import time
+
+from dotenv import load_dotenv
+
+from collection_registry import DEFAULT_COLLECTION, Collection, CollectionRegistry
+from extractors import SUPPORTED_EXTENSIONS, describe, parse_choices
+
+load_dotenv()
+# ---------------------- CONFIGURATION ----------------------
+GOOGLE_API_KEY = os.getenv("GEMINI_API_KEY")
+LLM_MODEL = "gemini-1.5-flash"
+EMBEDDING_MODEL = "models/embedding-001"
+EMBED_CACHE_PATH = os.getenv("EMBED_CACHE_PATH", ".cache/embeddings.sqlite3")
+EMBED_CACHE_MAX_MB = int(os.getenv("EMBED_CACHE_MAX_MB", "512"))
+TRACE_PATH = os.getenv("TRACE_PATH", "logs/traces.sqlite3")
+CHUNK_SIZE, CHUNK_OVERLAP = 500, 50
+
+DOCS_DIR = "my_docs"
+INDEX_DIR = os.getenv("INDEX_DIR", ".index_store")
+COLLECTIONS_DIR = os.getenv("COLLECTIONS_DIR", "collections")
+# Loaded collection indexes beyond this (on-disk size) are evicted least-recently-used.
+COLLECTION_CACHE_MB = int(os.getenv("COLLECTION_CACHE_MB", "1024"))
+# Per-format extractor backends, e.g. "pdf=pdfminer,docx=docx-xml" (see extractors.py).
+EXTRACTOR_CHOICES = parse_choices(os.getenv("EXTRACTORS", ""))
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "hybrid")
+# Retrieval returns CONTEXT_CANDIDATES chunks; MMR then packs them into the token budget.
+CONTEXT_CANDIDATES = int(os.getenv("CONTEXT_CANDIDATES", "20"))
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "1500"))
+MMR_LAMBDA = float(os.getenv("MMR_LAMBDA", "0.5"))
+# Estimated Jaccard similarity at which a chunk is folded into an indexed one; 0 disables.
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", "0.85"))
+# Default latency preference for the summarizer bypass: fast, balanced or quality.
+SUMMARY_PREFERENCE = os.getenv("SUMMARY_PREFERENCE", "balanced")
+# Turns kept verbatim per session before older ones are folded into a summary.
+CONVERSATION_TURNS = int(os.getenv("CONVERSATION_TURNS", "4"))
+# Web answers go stale with the search results behind them (SEARCH_CACHE_TTL); 0 never caches them.
+ANSWER_CACHE_WEB_TTL = float(os.getenv("ANSWER_CACHE_WEB_TTL", "300"))
+# "faiss" keeps float32 vectors in process memory; "int8" serves from shared mmap files.
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "faiss")
+
+
+class lazy:
+    """Thread-safe cached property: built on first access, once per instance."""
+
+    def __init__(self, factory):
+        self.factory = factory
+        self.name = factory.__name__
+        self.__doc__ = factory.__doc__
+        # Re-entrant because factories read other lazy attributes.
+        self.lock = threading.RLock()
+
+    def __get__(self, obj, owner):
+        if obj is None:
+            return self
+        try:
+            return obj.__dict__[self.name]
+        except KeyError:
+            pass
+        with self.lock:
+            if self.name not in obj.__dict__:
+                obj.__dict__[self.name] = self.factory(obj)
+            return obj.__dict__[self.name]
+
+
+def _require_key():
+    if not GOOGLE_API_KEY:
+        raise ValueError("GEMINI_API_KEY not found in environment variables")
+
+
+class Runtime:
+    """Everything needed to answer a query; safe to share between threads."""
+
+    def __init__(self):
+        self.ready = threading.Event()
+        self.warm_error = None
+        self.warm_seconds = None
+        self._warmup = None
+        self._lock = threading.Lock()
+
+    def built(self, name):
+        """Whether the lazy component ``name`` has been created yet."""
+        return name in self.__dict__
+
+    # ---------------------- COMPONENTS ----------------------
+    @lazy
+    def tracer(self):
+        import tracing
+
+        return tracing.configure(TRACE_PATH)
+
+    @lazy
+    def llm(self):
+        _require_key()
+        from langchain_google_genai import ChatGoogleGenerativeAI
+
+        from tracing import TraceCallbackHandler
+
+        return ChatGoogleGenerativeAI(
+            model=LLM_MODEL, temperature=0.2, google_api_key=GOOGLE_API_KEY, callbacks=[TraceCallbackHandler()]
+        )
+
+    @lazy
+    def embeddings(self):
+        # One cache per process, shared by index builds and retriever queries.
+        _require_key()
+        from langchain_google_genai import GoogleGenerativeAIEmbeddings
+
+        from embedding_cache import CachedEmbeddings
+
+        return CachedEmbeddings(
+            GoogleGenerativeAIEmbeddings(model=EMBEDDING_MODEL, google_api_key=GOOGLE_API_KEY),
+            path=EMBED_CACHE_PATH,
+            model_name=EMBEDDING_MODEL,
+            max_bytes=EMBED_CACHE_MAX_MB * 1024 * 1024,
+        )
+
+    @lazy
+    def search(self):
+        from web_search import SearchClient, backend_from_env
+
+        return SearchClient(
+            backend_from_env(),
+            cache_path=os.getenv("SEARCH_CACHE_PATH", ".cache/search_cache.json"),
+            ttl=float(os.getenv("SEARCH_CACHE_TTL", "900")),
+            max_entries=int(os.getenv("SEARCH_CACHE_SIZE", "1000")),
+        )
+
+    @lazy
+    def collections(self):
+        return CollectionRegistry(self.open_collection, COLLECTIONS_DIR, COLLECTION_CACHE_MB * 1024 * 1024)
+
+    @lazy
+    def graph(self):
+        from agents import AgentGraph
+        from context import ContextAssembler
+        from router import QueryRouter
+        from summary_policy import SummaryPolicy
+
+        context = ContextAssembler(self.embeddings, budget_tokens=CONTEXT_TOKEN_BUDGET, lambda_mult=MMR_LAMBDA)
+        policy = SummaryPolicy(
+            preference=SUMMARY_PREFERENCE,
+            latency_budget_ms=float(os.getenv("SUMMARY_LATENCY_BUDGET_MS", "2500")),
+        )
+        return AgentGraph(
+            self.llm, self.search, router=QueryRouter(), context=context, summary_policy=policy,
+            web_index=self.web_index,
+        )
+
+    @lazy
+    def web_index(self):
+        from web_index import WebResultIndex
+
+        return WebResultIndex(
+            self.embeddings,
+            ttl=float(os.getenv("WEB_INDEX_TTL", "600")),
+            threshold=float(os.getenv("WEB_INDEX_THRESHOLD", "0.75")),
+            max_bytes=int(os.getenv("WEB_INDEX_MAX_MB", "64")) * 1024 * 1024,
+        )
+
+    @lazy
+    def conversations(self):
+        from conversation import ConversationStore
+
+        return ConversationStore(
+            self.llm,
+            max_turns=CONVERSATION_TURNS,
+            ttl=float(os.getenv("CONVERSATION_TTL", "3600")),
+        )
+
+    @lazy
+    def speculative_runner(self):
+        from speculative import SpeculativeRunner
+
+        return SpeculativeRunner(self.graph, budget=int(os.getenv("SPECULATIVE_BUDGET", "4")))
+
+    # ---------------------- WARM-UP ----------------------
+    def warm_up(self, collection=DEFAULT_COLLECTION):
+        """Build every component, then load ``collection`` (``None``: none), on a background thread.
+
+        Returns at once.
+        """
+        with self._lock:
+            if self._warmup is None:
+                self._warmup = threading.Thread(target=self._warm, args=(collection,), name="warm-up", daemon=True)
+                self._warmup.start()
+        return self._warmup
+
+    def _warm(self, collection):
+        started = time.perf_counter()
+        try:
+            for name in ("tracer", "embeddings", "llm", "search", "graph"):
+                getattr(self, name)
+            if collection is not None:
+                self.collections.get(collection)
+        except Exception as e:
+            self.warm_error = f"{type(e).__name__}: {e}"
+        finally:
+            self.warm_seconds = time.perf_counter() - started
+            self.ready.set()
+
+    def wait_ready(self, timeout=None):
+        """Block until ``warm_up()`` has finished; re-raise what made it fail."""
+        self.ready.wait(timeout)
+        if self.warm_error:
+            raise RuntimeError(self.warm_error)
+
+    # ---------------------- COLLECTIONS ----------------------
+    @staticmethod
+    def collection_paths(collection_id):
+        """``(docs_dir, index_dir)`` of a collection."""
+        if collection_id == DEFAULT_COLLECTION:
+            return DOCS_DIR, INDEX_DIR
+        return os.path.join(COLLECTIONS_DIR, collection_id), os.path.join(INDEX_DIR + ".collections", collection_id)
+
+    def open_collection(self, collection_id):
+        """Load (or build) a collection's index and keep it in sync with its folder."""
+        from answer_cache import SemanticAnswerCache
+        from doc_watcher import DocWatcher
+        from index_store import IndexStore
+        from ingestion import INGEST_VERSION
+
+        docs_dir, index_dir = self.collection_paths(collection_id)
+        # Changing the embedding model or chunking invalidates the persisted index.
+        fingerprint = f"{self.embeddings.model}|{CHUNK_SIZE}|{CHUNK_OVERLAP}|v{INGEST_VERSION}"
+        if EXTRACTOR_CHOICES:
+            # Other backends extract different text; default-backend indexes keep their fingerprint.
+            fingerprint += f"|{describe(EXTRACTOR_CHOICES)}"
+        store = IndexStore(index_dir, self.embeddings, fingerprint=fingerprint, dedup_threshold=DEDUP_THRESHOLD or None)
+        watcher = DocWatcher(
+            docs_dir,
+            SUPPORTED_EXTENSIONS,
+            lambda: self.build_retriever(store, docs_dir),
+            interval=float(os.getenv("WATCH_INTERVAL", "2")),
+        )
+        watcher.refresh()
+        watcher.start()
+        # Per collection, so one team's cached answers never reach another.
+        answer_cache = SemanticAnswerCache(
+            self.embeddings,
+            threshold=float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.95")),
+            ttl=float(os.getenv("ANSWER_CACHE_TTL", "3600")),
+            max_entries=int(os.getenv("ANSWER_CACHE_SIZE", "500")),
+        )
+        return Collection(
+            collection_id, docs_dir, store, watcher, answer_cache,
+            index_dirs=(index_dir, index_dir + ".ann", index_dir + ".int8"),
+        )
+
+    def build_retriever(self, store, docs_dir):
+        """Sync ``store`` with ``docs_dir``; returns ``(retriever, version)``, ``(None, None)`` if empty."""
+        from ann_index import load_config as load_ann_config, with_ann_index
+        from ingestion import IngestionPipeline
+        from lexical_index import HybridRetriever
+
+        pipeline = IngestionPipeline(self.embeddings, CHUNK_SIZE, CHUNK_OVERLAP, extractors=EXTRACTOR_CHOICES)
+        if VECTOR_BACKEND == "int8":
+            from quantized_store import QuantizedStore
+
+            folder = store.root + ".int8"
+            # The float32 FAISS index and docstore are only loaded to apply changes and re-export.
+            current = store.check_unchanged(docs_dir, SUPPORTED_EXTENSIONS)
+            if not (current and QuantizedStore.is_current(folder, store.version)):
+                db = store.sync(docs_dir, SUPPORTED_EXTENSIONS, pipeline)
+                if db is None:
+                    return None, None
+                if not QuantizedStore.is_current(folder, store.version):
+                    QuantizedStore.export_faiss(db, folder, version=store.version)
+                del db
+            db = QuantizedStore(folder, self.embeddings, rerank=os.getenv("INT8_RERANK", "1") == "1")
+        else:
+            db = store.sync(docs_dir, SUPPORTED_EXTENSIONS, pipeline)
+            if db is None:
+                return None, None
+            db = with_ann_index(db, load_ann_config(), store.root + ".ann", store.version)
+        retriever = HybridRetriever(
+            vectorstore=db,
+            lexical=store.lexical,
+            mode=RETRIEVAL_MODE,
+            k=CONTEXT_CANDIDATES,
+            fetch_k=max(20, CONTEXT_CANDIDATES),
+        )
+        # store.version moves as soon as sync finishes; callers publish this pair only once it is all built.
+        return retriever, store.version
+
+    # ---------------------- QUERIES ----------------------
+    def answer(self, user_query, collection=DEFAULT_COLLECTION, speculative=False, on_token=None, preference=None,
+               session=None):
+        """Answer one query against ``collection``; returns ``{"answer", "route", "seconds"}``.
+
+        ``route`` is ``"cache"`` when the semantic answer cache served it, in
+        which case ``on_token`` is never called. ``preference`` overrides
+        ``SUMMARY_PREFERENCE`` for this query. With a ``session`` id, web
+        results are indexed for its later queries, the turn is added to the
+        conversation, and follow-up questions get the conversation so far. Raises
+        ``collection_registry.UnknownCollection`` for an unknown id.
+        """
+        import tracing
+
+        started = time.perf_counter()
+        self.tracer  # installs the span sink on first use
+        with tracing.trace(user_query) as root:
+            with tracing.span("collection", kind="collection", collection=collection) as s:
+                loaded = self.collections.peek(collection) is not None
+                col = self.collections.get(collection)
+                s.set(cache_hit=loaded)
+            # The lease keeps this index open for the query even if the watcher swaps it meanwhile.
+            answer_cache = col.answer_cache
+            with col.lease() as (retriever, version):
+                history, search_query, follow_up = None, user_query, False
+                if session is not None:
+                    conversation = self.conversations.get(session)
+                    follow_up = conversation.is_follow_up(user_query)
+                if follow_up:
+                    # Only follow-ups see the conversation. Their answers depend on it, so they
+                    # bypass the answer cache, which is shared by every session of the collection.
+                    history, search_query = conversation.context(), conversation.standalone(user_query)
+                # Queries BM25 answers alone are matched by exact text, so they are never embedded.
+                lexical = not follow_up and hasattr(retriever, "lexical_path") and retriever.lexical_path(user_query)
+                cached = vector = None
+                if not follow_up:
+                    with tracing.span("answer_cache", kind="cache", lexical=lexical) as s:
+                        if lexical:
+                            cached = answer_cache.lookup_text(user_query, version)
+                        else:
+                            vector = answer_cache.embed(user_query)
+                            cached = answer_cache.lookup(vector, version)
+                        s.set(cache_hit=cached is not None)
+                if cached is not None:
+                    answer, route = cached, "cache"
+                else:
+                    runner = self.speculative_runner if speculative else self.graph
+                    state = runner.invoke(user_query, retriever, on_token=on_token, preference=preference,
+                                          session=session, history=history, search_query=search_query)
+                    answer, route = state["final"], state["route"]
+                    if not follow_up:
+                        answer_cache.store(user_query, vector, answer, time.perf_counter() - started, version,
+                                           ttl=ANSWER_CACHE_WEB_TTL if route == "web" else None)
+                if session is not None:
+                    self.conversations.record(session, user_query, answer)
+                if root is not None:
+                    root.set(route=route, collection=collection, follow_up=follow_up)
+        return {"answer": answer, "route": route, "seconds": time.perf_counter() - started}
+
+    # ---------------------- STATS ----------------------
+    def collection_ids(self):
+        return self.collections.available()
+
+    def stats(self, collection=DEFAULT_COLLECTION, trace_window=200):
+        """JSON-serializable status for the sidebar and ``GET /stats``.
+
+        Index and answer-cache figures are for ``collection``. Only reports on
+        components that already exist; never builds or loads one.
+        """
+        col = self.collections.peek(collection) if self.built("collections") else None
+        sync = col.store.last_sync if col is not None else None
+        if sync:
+            sync = {**sync, "ingest": str(sync["ingest"]) if sync["ingest"] else None}
+        return {
+            "ready": self.ready.is_set(),
+            "warm_error": self.warm_error,
+            "warm_seconds": self.warm_seconds,
+            "collection": collection,
+            "documents": col.stats()["documents"] if col is not None else None,
+            "watch_error": col.watcher.last_error if col is not None else None,
+            "last_sync": sync or None,
+            "collections": self.collections.summary() if self.built("collections") else None,
+            "embedding_cache": self.embeddings.stats() if self.built("embeddings") else None,
+            "answer_cache": col.answer_cache.stats() if col is not None else None,
+            "web_search": dict(self.search.stats) if self.built("search") else None,
+            "web_index": self.web_index.stats() if self.built("web_index") else None,
+            "conversations": self.conversations.summary() if self.built("conversations") else None,
+            "summary": dict(self.graph.summary_policy.stats) if self.built("graph") else None,
+            "speculative": dict(self.speculative_runner.stats) if self.built("speculative_runner") else None,
+            "latency": self.tracer.summary(last=trace_window) if self.built("tracer") else [],
+        }
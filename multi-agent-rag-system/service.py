@@ -0,0 +1,184 @@
+"""asyncio HTTP front end for the agent graph.
+
+One ``Runtime`` (models, caches, index watcher, compiled graph) per process,
+shared by every request:
+
+    python service.py --port 8000 --concurrency 8 --queue 32
+
+    POST /query         {"query": "...", "collection": "default", "session": "...", "speculative": false,
+                         "preference": "balanced"} -> {"answer", "route", "seconds"}
+    POST /query/stream  same body -> NDJSON: {"token": ...} lines, then {"done": true, "answer", "route", "seconds"}
+    GET  /collections   ids that can be queried
+    GET  /stats         cache, index and latency figures (?collection=<id>)
+    GET  /health
+
+An unknown ``collection`` is rejected with 404. Web results are reused by
+later queries that send the same ``session`` id.
+
+At most ``concurrency`` queries run at once and up to ``queue`` more wait;
+beyond that requests are rejected with 429 and ``Retry-After`` so callers
+back off instead of piling up.
+"""
+import argparse
+import asyncio
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from aiohttp import web
+
+from collection_registry import DEFAULT_COLLECTION
+from summary_policy import PREFERENCES
+
+NDJSON = "application/x-ndjson"
+
+
+class RAGService:
+    def __init__(self, runtime, concurrency=8, queue=32):
+        self.runtime = runtime
+        self.queue = queue
+        self.pool = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="rag")
+        self._running = asyncio.Semaphore(concurrency)
+        self._waiting = 0
+        self._active = 0
+
+    async def _admitted(self, job):
+        """Run ``job`` in the worker pool once a slot is free, or reject with 429."""
+        if self._running.locked() and self._waiting >= self.queue:
+            raise web.HTTPTooManyRequests(
+                text=json.dumps({"error": "overloaded"}), content_type="application/json", headers={"Retry-After": "1"}
+            )
+        self._waiting += 1
+        try:
+            await self._running.acquire()
+        finally:
+            self._waiting -= 1
+        self._active += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.pool, job)
+        finally:
+            self._active -= 1
+            self._running.release()
+
+    async def _body(self, request):
+        try:
+            body = await request.json()
+            query = body["query"].strip()
+        except (ValueError, KeyError, AttributeError):
+            raise web.HTTPBadRequest(text=json.dumps({"error": "expected {\"query\": \"...\"}"}),
+                                     content_type="application/json")
+        if not query:
+            raise web.HTTPBadRequest(text=json.dumps({"error": "empty query"}), content_type="application/json")
+        preference = body.get("preference")
+        if preference is not None and preference not in PREFERENCES:
+            raise web.HTTPBadRequest(text=json.dumps({"error": f"preference must be one of {list(PREFERENCES)}"}),
+                                     content_type="application/json")
+        collection = body.get("collection") or DEFAULT_COLLECTION
+        self._check_collection(collection)
+        session = body.get("session")
+        if session is not None and not isinstance(session, str):
+            raise web.HTTPBadRequest(text=json.dumps({"error": "session must be a string"}),
+                                     content_type="application/json")
+        return query, collection, session, bool(body.get("speculative", False)), preference
+
+    def _check_collection(self, collection):
+        if not isinstance(collection, str) or collection not in self.runtime.collection_ids():
+            raise web.HTTPNotFound(text=json.dumps({"error": f"unknown collection {collection!r}"}),
+                                   content_type="application/json")
+
+    # ---------------------- HANDLERS ----------------------
+    async def query(self, request):
+        query, collection, session, speculative, preference = await self._body(request)
+
+        def job():
+            self.runtime.wait_ready()
+            return self.runtime.answer(query, collection, speculative, preference=preference, session=session)
+
+        return web.json_response(await self._admitted(job))
+
+    async def query_stream(self, request):
+        query, collection, session, speculative, preference = await self._body(request)
+        loop = asyncio.get_running_loop()
+        tokens = asyncio.Queue()
+
+        def on_token(text):
+            loop.call_soon_threadsafe(tokens.put_nowait, text)
+
+        def job():
+            try:
+                self.runtime.wait_ready()
+                return self.runtime.answer(query, collection, speculative, on_token=on_token, preference=preference,
+                                           session=session)
+            finally:
+                loop.call_soon_threadsafe(tokens.put_nowait, None)
+
+        result = asyncio.ensure_future(self._admitted(job))
+        # A rejected request gets a plain 429 rather than an empty stream.
+        getter = asyncio.ensure_future(tokens.get())
+        await asyncio.wait([result, getter], return_when=asyncio.FIRST_COMPLETED)
+        if result.done() and isinstance(result.exception(), web.HTTPException):
+            getter.cancel()
+            raise result.exception()
+
+        response = web.StreamResponse(headers={"Content-Type": NDJSON})
+        await response.prepare(request)
+        token = await getter
+        while token is not None:
+            await response.write((json.dumps({"token": token}) + "\n").encode("utf-8"))
+            token = await tokens.get()
+        try:
+            final = {"done": True, **(await result)}
+        except Exception as e:
+            final = {"done": True, "error": f"{type(e).__name__}: {e}"}
+        await response.write((json.dumps(final) + "\n").encode("utf-8"))
+        await response.write_eof()
+        return response
+
+    async def collections(self, request):
+        ids = await asyncio.get_running_loop().run_in_executor(None, self.runtime.collection_ids)
+        return web.json_response({"collections": ids})
+
+    async def stats(self, request):
+        collection = request.query.get("collection", DEFAULT_COLLECTION)
+        stats = await asyncio.get_running_loop().run_in_executor(None, self.runtime.stats, collection)
+        return web.json_response({**stats, "running": self._active, "waiting": self._waiting})
+
+    async def health(self, request):
+        runtime = self.runtime
+        default = runtime.collections.peek(DEFAULT_COLLECTION)
+        version = default.version if default is not None else None
+        return web.json_response({"ok": not runtime.warm_error, "ready": runtime.ready.is_set(), "index_version": version})
+
+
+def create_app(runtime, concurrency=8, queue=32):
+    service = RAGService(runtime, concurrency=concurrency, queue=queue)
+    app = web.Application()
+    app.add_routes([
+        web.post("/query", service.query),
+        web.post("/query/stream", service.query_stream),
+        web.get("/collections", service.collections),
+        web.get("/stats", service.stats),
+        web.get("/health", service.health),
+    ])
+    app.on_cleanup.append(lambda _: asyncio.get_running_loop().run_in_executor(None, service.pool.shutdown))
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the multi-agent RAG graph over HTTP.")
+    parser.add_argument("--host", default=os.getenv("RAG_SERVICE_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("RAG_SERVICE_PORT", "8000")))
+    parser.add_argument("--concurrency", type=int, default=int(os.getenv("RAG_SERVICE_CONCURRENCY", "8")))
+    parser.add_argument("--queue", type=int, default=int(os.getenv("RAG_SERVICE_QUEUE", "32")))
+    args = parser.parse_args()
+
+    from runtime import Runtime
+
+    runtime = Runtime()
+    # Listen right away; queries wait in their worker thread until warm-up is done.
+    runtime.warm_up()
+    web.run_app(create_app(runtime, args.concurrency, args.queue), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+import contextvars
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class SpeculativeTask:
+    """A branch call started before the router has decided whether it is needed."""
+
+    def __init__(self, pool, fn, on_done):
+        self.started = time.perf_counter()
+        self.finished = None
+        self.requested = None
+        self._on_done = on_done
+        # Run in a copy of the caller's context so spans join the query's trace.
+        self.future = pool.submit(contextvars.copy_context().run, self._run, fn)
+
+    def _run(self, fn):
+        try:
+            return fn()
+        finally:
+            self.finished = time.perf_counter()
+            self._on_done(self)
+
+    def result(self):
+        self.requested = time.perf_counter()
+        return self.future.result()
+
+    @property
+    def head_start(self):
+        """Seconds of this task that ran before the branch asked for it."""
+        if self.requested is None:
+            return 0.0
+        end = min(self.finished or self.requested, self.requested)
+        return max(0.0, end - self.started)
+
+
+class SpeculativeRunner:
+    """Start retrieval and web search concurrently with routing.
+
+    Whichever branch the router picks consumes its already-running task; the
+    others are cancelled if they have not started, or their result is
+    discarded. At most ``budget`` speculative calls run at once across all
+    sessions; beyond that, queries fall back to the sequential path.
+    """
+
+    def __init__(self, graph, budget=4):
+        self.graph = graph
+        self.pool = ThreadPoolExecutor(max_workers=budget, thread_name_prefix="speculative")
+        self._budget = threading.BoundedSemaphore(budget)
+        self._lock = threading.Lock()
+        self.stats = {
+            "queries": 0,
+            "launched": 0,
+            "used": 0,
+            "cancelled": 0,
+            "wasted": 0,
+            "over_budget": 0,
+            "saved_seconds": 0.0,
+            "wasted_seconds": 0.0,
+        }
+
+    def run(self, user_query, retriever):
+        return self.invoke(user_query, retriever)["final"]
+
+    def invoke(self, user_query, retriever, on_token=None, preference=None, session=None, history=None,
+               search_query=None):
+        search_query = search_query or user_query
+        branches = {"web": lambda: self.graph.search.run(search_query)}
+        if retriever is not None:
+            branches["rag"] = lambda: self.graph.retrieve(retriever, search_query)
+
+        prefetch = {}
+        for name, fn in branches.items():
+            if self._budget.acquire(blocking=False):
+                prefetch[name] = SpeculativeTask(self.pool, fn, self._release)
+            else:
+                self._count("over_budget")
+        self._count("launched", len(prefetch))
+        self._count("queries")
+        try:
+            return self.graph.invoke(user_query, retriever, prefetch=prefetch, on_token=on_token,
+                                     preference=preference, session=session, history=history,
+                                     search_query=search_query)
+        finally:
+            self._settle(prefetch)
+
+    def _settle(self, prefetch):
+        for task in prefetch.values():
+            if task.requested is not None:
+                self._count("used")
+                self._count("saved_seconds", task.head_start)
+            elif task.future.cancel():
+                self._count("cancelled")
+                self._budget.release()
+            else:
+                task.future.add_done_callback(lambda _, task=task: self._discard(task))
+
+    def _discard(self, task):
+        self._count("wasted")
+        self._count("wasted_seconds", task.finished - task.started)
+
+    def _release(self, task):
+        self._budget.release()
+
+    def _count(self, key, amount=1):
+        with self._lock:
+            self.stats[key] += amount
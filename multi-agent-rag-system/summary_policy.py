@@ -0,0 +1,178 @@
+"""Decide whether an agent's output needs the summarizer's extra Gemini call.
+
+Short LLM and RAG answers are already final; re-summarizing them doubles
+latency for nothing. For each query the policy picks one of:
+
+* ``passthrough`` - return the agent's content as-is,
+* ``truncate``    - cut it locally at a sentence boundary (keeping ``Sources:``),
+* ``summarize``   - make the summarizer call,
+
+from the content's estimated token count, the route and the caller's latency
+preference. The summarizer's cost is a running estimate
+(``overhead_ms + ms_per_token * tokens``) updated from observed calls.
+Every decision is appended to a JSONL log; review it with:
+
+    python summary_policy.py --report
+"""
+import argparse
+import json
+import os
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from dataclasses import asdict, dataclass
+
+from tracing import estimate_tokens
+
+ACTIONS = ("summarize", "truncate", "passthrough")
+PREFERENCES = ("fast", "balanced", "quality")
+DEFAULT_LOG_PATH = os.getenv("SUMMARY_LOG_PATH", "logs/summary_decisions.jsonl")
+
+# Content at or under this many tokens is passed through as-is. Web content is
+# raw search results, never an answer on its own.
+PASSTHROUGH_TOKENS = {"llm": 250, "rag": 300, "web": 0}
+# (multiplier on PASSTHROUGH_TOKENS, multiplier on LATENCY_BUDGET_MS) per latency preference.
+# "quality" always summarizes, as the graph did before this policy existed.
+PREFERENCE_SCALE = {"fast": (2.0, 0.0), "balanced": (1.0, 1.0), "quality": (0.0, float("inf"))}
+# Longest summarizer call (estimated) worth waiting for before truncating instead.
+LATENCY_BUDGET_MS = 2500.0
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+@dataclass
+class SummaryDecision:
+    action: str
+    route: str
+    preference: str
+    tokens: int
+    estimated_ms: float
+    reason: str
+
+
+def truncate(content, max_tokens):
+    """First whole sentences of ``content`` within ``max_tokens``; a trailing ``Sources:`` line is kept."""
+    body, sep, sources = content.rpartition("\n\nSources: ")
+    if not sep:
+        body, sources = content, ""
+    limit = max_tokens * 4
+    kept = ""
+    for sentence in _SENTENCE_END.split(body.strip()):
+        if len(kept) + len(sentence) + 1 > limit:
+            break
+        kept = f"{kept} {sentence}" if kept else sentence
+    if not kept:
+        kept = body[:limit].rstrip() + "…"
+    return f"{kept}\n\nSources: {sources}" if sources else kept
+
+
+class SummaryPolicy:
+    """Per-route cost model for the summarizer step.
+
+    ``observe(tokens, seconds)`` feeds measured summarizer calls back into the
+    latency estimate (exponentially weighted, ``alpha`` per observation).
+    """
+
+    def __init__(self, preference="balanced", log_path=DEFAULT_LOG_PATH, passthrough_tokens=None,
+                 latency_budget_ms=LATENCY_BUDGET_MS, truncate_tokens=250, overhead_ms=700.0,
+                 ms_per_token=1.5, alpha=0.2):
+        if preference not in PREFERENCES:
+            raise ValueError(f"preference must be one of {PREFERENCES}, got {preference!r}")
+        self.preference = preference
+        self.log_path = log_path
+        self.passthrough_tokens = {**PASSTHROUGH_TOKENS, **(passthrough_tokens or {})}
+        self.latency_budget_ms = latency_budget_ms
+        self.truncate_tokens = truncate_tokens
+        self.overhead_ms = overhead_ms
+        self.ms_per_token = ms_per_token
+        self.alpha = alpha
+        self.stats = Counter()
+        self._lock = threading.Lock()
+
+    def estimate_ms(self, tokens):
+        return self.overhead_ms + self.ms_per_token * tokens
+
+    def observe(self, tokens, seconds):
+        per_token = max(0.0, (seconds * 1000 - self.overhead_ms) / max(tokens, 1))
+        with self._lock:
+            self.ms_per_token += self.alpha * (per_token - self.ms_per_token)
+
+    def decide(self, route, content, preference=None):
+        preference = preference or self.preference
+        if preference not in PREFERENCES:
+            preference = self.preference
+        passthrough_scale, budget_scale = PREFERENCE_SCALE[preference]
+        tokens = estimate_tokens(content)
+        estimated_ms = self.estimate_ms(tokens)
+        limit = self.passthrough_tokens.get(route, 0) * passthrough_scale
+        budget_ms = self.latency_budget_ms * budget_scale
+
+        if tokens <= limit:
+            action, reason = "passthrough", f"{tokens} tokens <= {limit:.0f} for {route}"
+        elif route == "web":
+            action, reason = "summarize", "raw search results"
+        elif estimated_ms > budget_ms:
+            action, reason = "truncate", f"~{estimated_ms:.0f} ms > {budget_ms:.0f} ms budget"
+        else:
+            action, reason = "summarize", f"~{estimated_ms:.0f} ms within {preference} budget"
+
+        decision = SummaryDecision(action, route, preference, tokens, round(estimated_ms, 1), reason)
+        with self._lock:
+            self.stats[action] += 1
+        self.log(decision)
+        return decision
+
+    def apply(self, decision, content):
+        """Final text for a ``passthrough`` or ``truncate`` decision."""
+        if decision.action == "truncate":
+            return truncate(content, self.truncate_tokens)
+        return content
+
+    def log(self, decision):
+        if not self.log_path:
+            return
+        record = {"ts": time.time(), **asdict(decision)}
+        os.makedirs(os.path.dirname(self.log_path) or ".", exist_ok=True)
+        with self._lock, open(self.log_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+
+
+# ---------------------- OFFLINE REPORT ----------------------
+def report(log_path):
+    """``{(route, preference): {"n", "tokens_p50", <action>: count...}}`` from the decision log."""
+    groups = defaultdict(list)
+    with open(log_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            groups[(record["route"], record["preference"])].append(record)
+    rows = {}
+    for key, records in sorted(groups.items()):
+        tokens = sorted(r["tokens"] for r in records)
+        actions = Counter(r["action"] for r in records)
+        rows[key] = {"n": len(records), "tokens_p50": tokens[len(tokens) // 2], **{a: actions[a] for a in ACTIONS}}
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize the summarizer-bypass decision log.")
+    parser.add_argument("--report", action="store_true", help="print action counts per route and preference")
+    parser.add_argument("--log", default=DEFAULT_LOG_PATH)
+    args = parser.parse_args()
+    if not args.report:
+        parser.print_help()
+        return
+    if not os.path.exists(args.log):
+        print(f"No decisions logged yet ({args.log}).")
+        return
+    print(f"{'route':<6} {'preference':<10} {'n':>6} {'p50 tok':>8} " + " ".join(f"{a:>11}" for a in ACTIONS))
+    for (route, preference), row in report(args.log).items():
+        print(f"{route:<6} {preference:<10} {row['n']:>6} {row['tokens_p50']:>8} "
+              + " ".join(f"{row[a]:>11}" for a in ACTIONS))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+"""Shared fixtures. Tests run offline against the stub clients in ``benchmarks/stubs.py``."""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.stubs import StubChatModel, StubEmbeddings, StubSearch  # noqa: E402
+
+
+@pytest.fixture
+def embeddings():
+    return StubEmbeddings()
+
+
+@pytest.fixture
+def stub_runtime(tmp_path, monkeypatch):
+    """A ``runtime.Runtime`` working in ``tmp_path`` with stub LLM, embeddings and search."""
+    pytest.importorskip("dotenv")
+    monkeypatch.chdir(tmp_path)
+    import runtime
+
+    rt = runtime.Runtime()
+    rt.__dict__.update(llm=StubChatModel(route="llm"), embeddings=StubEmbeddings(), search=StubSearch())
+    return rt
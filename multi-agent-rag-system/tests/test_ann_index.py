@@ -0,0 +1,62 @@
+import json
+
+import faiss
+import numpy as np
+from langchain_community.vectorstores import FAISS
+
+import ann_index
+from benchmarks.stubs import StubEmbeddings
+
+
+def vectors(rows=400, dim=16, seed=0):
+    return np.random.default_rng(seed).standard_normal((rows, dim)).astype(np.float32)
+
+
+def test_config_file_is_overridden_by_env(tmp_path, monkeypatch):
+    path = tmp_path / "ann_config.json"
+    monkeypatch.delenv("ANN_INDEX", raising=False)
+    assert ann_index.load_config(str(path)) == {"type": "flat"}
+    path.write_text(json.dumps({"type": "hnsw", "M": 16, "efConstruction": 80, "efSearch": 32}))
+    assert ann_index.load_config(str(path))["efSearch"] == 32
+    monkeypatch.setenv("ANN_INDEX", "ivf")
+    assert ann_index.load_config(str(path)) == {"type": "ivf"}
+
+
+def test_build_index_selects_the_type_and_caps_nlist():
+    data = vectors()
+    assert isinstance(ann_index.build_index(data, {"type": "flat"}), faiss.IndexFlatL2)
+    hnsw = ann_index.build_index(data, {"type": "hnsw", "M": 16, "efSearch": 48})
+    assert isinstance(hnsw, faiss.IndexHNSWFlat) and hnsw.hnsw.efSearch == 48
+    ivf = ann_index.build_index(data, {"type": "ivf", "nlist": 1000, "nprobe": 64})
+    assert ivf.nlist == len(data) // 39 and ivf.nprobe == ivf.nlist
+    assert all(c["nlist"] <= len(data) // 39 for c in ann_index.candidate_configs(len(data)) if c["type"] == "ivf")
+
+
+def test_ann_index_is_cached_per_version(tmp_path):
+    texts = [f"document {i} about topic {i % 9}" for i in range(200)]
+    cache = str(tmp_path / "ann")
+    config = {"type": "hnsw", "M": 16, "efConstruction": 40, "efSearch": 32}
+
+    db = ann_index.with_ann_index(FAISS.from_texts(texts, StubEmbeddings()), config, cache, "v1")
+    assert isinstance(db.index, faiss.IndexHNSWFlat)
+    assert db.similarity_search("document 7 about topic 7", k=1)[0].page_content == texts[7]
+    stamp = (tmp_path / "ann" / "index.faiss").stat().st_mtime_ns
+
+    ann_index.with_ann_index(FAISS.from_texts(texts, StubEmbeddings()), config, cache, "v1")
+    assert (tmp_path / "ann" / "index.faiss").stat().st_mtime_ns == stamp
+    ann_index.with_ann_index(FAISS.from_texts(texts, StubEmbeddings()), config, cache, "v2")
+    assert json.loads((tmp_path / "ann" / "meta.json").read_text())["version"] == "v2"
+
+    flat = FAISS.from_texts(texts, StubEmbeddings())
+    assert ann_index.with_ann_index(flat, {"type": "flat"}, cache, "v2").index is flat.index
+
+
+def test_tune_picks_a_config_meeting_the_recall_target():
+    indexed, queries = ann_index.held_out(vectors(rows=600), n_queries=50)
+    assert len(indexed) == 550 and len(queries) == 50
+    assert not (indexed[:, None, :] == queries[None, :, :]).all(axis=2).any()
+
+    best, results = ann_index.tune(indexed, queries, k=4, recall_target=0.9)
+    by_config = {json.dumps(config, sort_keys=True): stats for config, stats in results}
+    assert by_config[json.dumps({"type": "flat"})]["recall"] == 1.0
+    assert by_config[json.dumps(best, sort_keys=True)]["recall"] >= 0.9
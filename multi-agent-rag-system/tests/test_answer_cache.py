@@ -0,0 +1,66 @@
+import answer_cache
+from answer_cache import SemanticAnswerCache
+
+
+def cache_with(embeddings, **kwargs):
+    cache = SemanticAnswerCache(embeddings, **kwargs)
+    cache.store("how do I reset my password", cache.embed("how do I reset my password"), "Use the portal.", 2.0, "v1")
+    return cache
+
+
+def test_similar_queries_hit_and_unrelated_ones_miss(embeddings):
+    cache = cache_with(embeddings)
+    assert cache.lookup(cache.embed("How do I reset my password?"), "v1") == "Use the portal."
+    assert cache.lookup(cache.embed("quarterly revenue by region"), "v1") is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["saved_seconds"] == 2.0
+
+
+def test_new_index_version_drops_every_entry(embeddings):
+    cache = cache_with(embeddings)
+    assert cache.lookup(cache.embed("how do I reset my password"), "v2") is None
+    assert cache.stats()["entries"] == 0
+    # Going back to the old version does not resurrect answers built on it.
+    assert cache.lookup(cache.embed("how do I reset my password"), "v1") is None
+
+
+def test_entries_expire_after_ttl(embeddings, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(answer_cache.time, "time", lambda: now[0])
+    cache = cache_with(embeddings, ttl=60)
+    vector = cache.embed("how do I reset my password")
+
+    now[0] += 59
+    assert cache.lookup(vector, "v1") == "Use the portal."
+    now[0] += 2
+    assert cache.lookup(vector, "v1") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_text_only_entries_match_exact_query(embeddings):
+    cache = SemanticAnswerCache(embeddings)
+    cache.store("ERR-4012", None, "Disk quota exceeded.", 1.0, "v1")
+    assert cache.lookup_text("ERR-4012", "v1") == "Disk quota exceeded."
+    assert cache.lookup_text("ERR-4013", "v1") is None
+    assert cache.lookup(cache.embed("ERR-4012"), "v1") is None
+
+
+def test_hits_reuse_the_stacked_vectors(embeddings):
+    cache = cache_with(embeddings)
+    cache.store("quarterly revenue by region", cache.embed("quarterly revenue by region"), "Up 4%.", 1.0, "v1")
+    assert cache.lookup(cache.embed("quarterly revenue by region"), "v1") == "Up 4%."
+    matrix = cache._matrix
+    assert cache.lookup(cache.embed("how do I reset my password"), "v1") == "Use the portal."
+    assert cache._matrix is matrix
+
+
+def test_entries_can_expire_sooner_than_the_cache_ttl(embeddings, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(answer_cache.time, "time", lambda: now[0])
+    cache = SemanticAnswerCache(embeddings, ttl=3600)
+    vector = cache.embed("weather in Paris today")
+    cache.store("weather in Paris today", vector, "Sunny.", 1.0, "v1", ttl=300)
+    cache.store("never cached", cache.embed("never cached"), "-", 1.0, "v1", ttl=0)
+    assert cache.stats()["entries"] == 1
+
+    now[0] += 301
+    assert cache.lookup(vector, "v1") is None
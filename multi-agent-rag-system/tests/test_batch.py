@@ -0,0 +1,62 @@
+import json
+
+from batch import BatchRunner, load_checkpoint, read_queries
+
+
+class FakeRuntime:
+    def __init__(self, fail=()):
+        self.fail = set(fail)
+        self.asked = []
+
+    def answer(self, query, collection, speculative=False, preference=None):
+        self.asked.append(query)
+        if query in self.fail:
+            raise RuntimeError("upstream timeout")
+        return {"answer": query.upper(), "route": "llm", "seconds": 0.0}
+
+
+def records(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_resume_skips_answered_and_retries_failed(tmp_path):
+    queries = tmp_path / "queries.jsonl"
+    queries.write_text("".join(json.dumps({"id": i, "query": f"q{i}"}) + "\n" for i in range(5)))
+    output = tmp_path / "answers.jsonl"
+
+    first = FakeRuntime(fail={"q3"})
+    stats = BatchRunner(first, "default", str(output), concurrency=2).run(read_queries(str(queries)))
+    assert stats["answered"] == 4 and stats["failed"] == 1
+
+    # A crash mid-write leaves a torn last line; it is dropped on resume.
+    with open(output, "a", encoding="utf-8") as f:
+        f.write('{"id": "4", "que')
+    done = load_checkpoint(str(output))
+    assert done == {"0", "1", "2", "4"}
+    # The failed record is removed too; its query runs again below.
+    assert sorted(r["id"] for r in records(output)) == ["0", "1", "2", "4"]
+
+    second = FakeRuntime()
+    stats = BatchRunner(second, "default", str(output), concurrency=2).run(read_queries(str(queries)), done)
+    assert second.asked == ["q3"]
+    assert stats["skipped"] == 4 and stats["answered"] == 1
+    assert load_checkpoint(str(output)) == {"0", "1", "2", "3", "4"}
+    assert sorted(r["id"] for r in records(output)) == ["0", "1", "2", "3", "4"]
+
+
+def test_only_a_torn_last_line_is_dropped(tmp_path):
+    output = tmp_path / "answers.jsonl"
+    output.write_text(
+        '{"id": "1", "query": "q1", "answer": "A1"}\n'
+        'not json\n'
+        '{"id": "2", "query": "q2", "answer": "A2"}\n'
+        '{"id": "3", "que'
+    )
+    assert load_checkpoint(str(output)) == {"1", "2"}
+    assert output.read_text() == (
+        '{"id": "1", "query": "q1", "answer": "A1"}\n'
+        'not json\n'
+        '{"id": "2", "query": "q2", "answer": "A2"}\n'
+    )
+    assert not (tmp_path / "answers.jsonl.tmp").exists()
@@ -0,0 +1,90 @@
+import threading
+import time
+
+import pytest
+
+from collection_registry import CollectionRegistry
+
+
+class FakeCollection:
+    def __init__(self, collection_id, size):
+        self.id = collection_id
+        self.size = size
+        self.closed = False
+
+    def nbytes(self):
+        return self.size
+
+    def close(self):
+        self.closed = True
+
+
+def registry(tmp_path, budget, size=100, delay=0.0):
+    for name in ("a", "b", "c"):
+        (tmp_path / name).mkdir()
+    opened = []
+
+    def open_collection(collection_id):
+        time.sleep(delay)
+        opened.append(FakeCollection(collection_id, size))
+        return opened[-1]
+
+    return CollectionRegistry(open_collection, str(tmp_path), budget), opened
+
+
+def test_least_recently_used_collections_are_evicted_over_budget(tmp_path):
+    reg, opened = registry(tmp_path, budget=250)
+    a, b = reg.get("a"), reg.get("b")
+    assert reg.get("a") is a  # a is now the most recently used
+
+    reg.get("c")
+    assert b.closed and not a.closed
+    assert reg.peek("b") is None and reg.peek("a") is a
+    assert reg.stats["evictions"] == 1 and reg.stats["hits"] == 1
+
+    assert reg.get("b") is not b
+    assert [c.id for c in opened] == ["a", "b", "c", "b"]
+
+
+def test_newest_collection_is_kept_even_over_budget(tmp_path):
+    reg, _ = registry(tmp_path, budget=50)
+    a = reg.get("a")
+    assert reg.peek("a") is a and not a.closed
+    reg.get("b")
+    assert a.closed and reg.peek("a") is None
+
+
+def test_concurrent_gets_share_one_load(tmp_path):
+    reg, opened = registry(tmp_path, budget=1000, delay=0.05)
+    results = []
+    stop = time.perf_counter() + 0.2
+
+    def query():
+        while time.perf_counter() < stop:
+            results.append(reg.get("a"))
+
+    threads = [threading.Thread(target=query) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(opened) == 1
+    assert all(c is opened[0] for c in results)
+    assert reg._loading == {}
+
+
+def test_failed_load_can_be_retried(tmp_path):
+    calls = []
+
+    def open_collection(collection_id):
+        calls.append(collection_id)
+        if len(calls) == 1:
+            raise OSError("disk full")
+        return FakeCollection(collection_id, 10)
+
+    (tmp_path / "a").mkdir()
+    reg = CollectionRegistry(open_collection, str(tmp_path), 100)
+    with pytest.raises(OSError):
+        reg.get("a")
+    assert reg._loading == {} and reg.peek("a") is None
+    assert reg.get("a").id == "a"
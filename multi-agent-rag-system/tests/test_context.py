@@ -0,0 +1,68 @@
+import numpy as np
+from langchain_core.documents import Document
+
+from context import ContextAssembler, mmr_order
+
+
+class TableEmbeddings:
+    """Fixed vectors per text, counting every call."""
+
+    def __init__(self, vectors):
+        self.vectors = vectors
+        self.calls = 0
+
+    def embed_query(self, text):
+        self.calls += 1
+        return self.vectors[text]
+
+    def embed_documents(self, texts):
+        self.calls += 1
+        return [self.vectors[t] for t in texts]
+
+
+def doc(text):
+    return Document(page_content=text, metadata={"source": text[:8]})
+
+
+def test_mmr_skips_a_near_duplicate_for_a_diverse_chunk():
+    query = np.array([1.0, 1.0, 0.0])
+    vectors = np.array([[1.0, 0.9, 0.0], [1.0, 0.91, 0.0], [0.2, 1.0, 0.3]])
+    assert mmr_order(query, vectors, lambda_mult=1.0)[:2] == [1, 0]
+    assert mmr_order(query, vectors, lambda_mult=0.5)[:2] == [1, 2]
+
+
+def test_selection_respects_the_token_budget_and_keeps_shorter_chunks():
+    long_text, short_text, other_text = "a" * 400, "b" * 40, "c" * 40
+    embeddings = TableEmbeddings({
+        "q": [1.0, 0.0],
+        long_text: [1.0, 0.0],
+        short_text: [0.9, 0.1],
+        other_text: [0.5, 0.5],
+    })
+    assembler = ContextAssembler(embeddings, budget_tokens=30, lambda_mult=1.0)
+    selected = assembler.select("q", [doc(long_text), doc(short_text), doc(other_text)])
+    assert [d.page_content for d in selected] == [short_text, other_text]
+
+
+def test_max_chunks_caps_the_selection():
+    texts = [f"chunk {i}" for i in range(5)]
+    embeddings = TableEmbeddings({"q": [1.0, 0.0], **{t: [1.0, i / 10] for i, t in enumerate(texts)}})
+    assembler = ContextAssembler(embeddings, budget_tokens=1000, max_chunks=2)
+    assert len(assembler.select("q", [doc(t) for t in texts])) == 2
+
+
+def test_an_oversized_best_chunk_is_truncated_to_the_budget():
+    text = "x" * 1000
+    assembler = ContextAssembler(TableEmbeddings({"q": [1.0], text: [1.0]}), budget_tokens=10)
+    [selected] = assembler.select("q", [doc(text)])
+    assert selected.page_content == "x" * 40
+    assert selected.metadata == {"source": "xxxxxxxx"}
+
+
+def test_lexical_candidates_keep_bm25_order_and_embed_nothing():
+    texts = ["first " * 10, "second " * 10, "third " * 10]
+    embeddings = TableEmbeddings({})
+    assembler = ContextAssembler(embeddings, budget_tokens=40)
+    selected = assembler.select("q", [doc(t) for t in texts], lexical=True)
+    assert [d.page_content for d in selected] == texts[:2]
+    assert embeddings.calls == 0
@@ -0,0 +1,28 @@
+from conversation import Conversation
+
+
+def test_only_short_back_references_are_follow_ups():
+    conversation = Conversation()
+    assert not conversation.is_follow_up("what about its price?")
+    conversation.add("How much does the Falcon 9 launch cost?", "About 67 million dollars.")
+    assert conversation.is_follow_up("what about its price?")
+    assert not conversation.is_follow_up("Explain photosynthesis")
+    assert conversation.standalone("Explain photosynthesis") == "Explain photosynthesis"
+    assert "Falcon" in conversation.standalone("what about its price?")
+
+
+def test_sessions_do_not_see_each_others_conversation(stub_runtime):
+    # The stub LLM echoes the start of its prompt, so any history it was given shows up in the answer.
+    stub_runtime.answer("My codename is Bluejay", session="alice")
+    alice = stub_runtime.answer("Explain photosynthesis", session="alice")
+    bob = stub_runtime.answer("Explain photosynthesis", session="bob")
+
+    assert bob["route"] == "cache"
+    assert "Bluejay" not in alice["answer"]
+    assert "Bluejay" not in bob["answer"]
+
+    follow_up = stub_runtime.answer("and what about it?", session="alice")
+    assert follow_up["route"] != "cache"
+    assert "Conversation so far" in follow_up["answer"]
+    bob_follow_up = stub_runtime.answer("and what about it?", session="bob")
+    assert "Bluejay" not in bob_follow_up["answer"]
@@ -0,0 +1,68 @@
+import os
+
+from dedup import NearDuplicateIndex
+from index_store import IndexStore
+from ingestion import IngestionPipeline
+
+TEXT = ("The cooling loop pumps heavy water through the reactor core, carries the heat to the steam "
+        "generators and returns it through the condenser; operators check the flow rate every hour "
+        "and log pressure, temperature and valve positions in the shift report.")
+OTHER = ("Quarterly revenue grew in every region, driven by subscription renewals, while hardware sales "
+         "fell slightly and marketing spend stayed flat compared with the same quarter last year.")
+
+
+def test_near_duplicates_match_and_distinct_texts_do_not(tmp_path):
+    index = NearDuplicateIndex(threshold=0.8)
+    index.add("a-0", index.hasher.signature(TEXT))
+    assert index.find(index.hasher.signature(TEXT.replace("every hour", "every  hour."))) == "a-0"
+    assert index.find(index.hasher.signature(OTHER)) is None
+
+    index.add_duplicate("a-0", {"file": "b.txt", "source": "b.txt", "page": None})
+    index.save(str(tmp_path / "dedup.npz"))
+    loaded = NearDuplicateIndex.load(str(tmp_path / "dedup.npz"))
+    assert loaded.find(loaded.hasher.signature(TEXT)) == "a-0"
+    assert loaded.duplicates == {"a-0": [{"file": "b.txt", "source": "b.txt", "page": None}]}
+
+    assert loaded.remove("a-0") == [{"file": "b.txt", "source": "b.txt", "page": None}]
+    assert loaded.find(loaded.hasher.signature(TEXT)) is None
+
+
+def sync(store, docs, embeddings):
+    pipeline = IngestionPipeline(embeddings, chunk_size=1000, chunk_overlap=0, workers=1)
+    return store.sync(str(docs), (".txt",), pipeline)
+
+
+def test_duplicates_are_folded_and_reingested_when_orphaned(tmp_path, embeddings):
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    (docs / "a.txt").write_text(TEXT)
+    (docs / "b.txt").write_text(TEXT)
+    (docs / "c.txt").write_text(OTHER)
+    store = IndexStore(str(tmp_path / "index"), embeddings, dedup_threshold=0.85)
+
+    db = sync(store, docs, embeddings)
+    assert len(db.index_to_docstore_id) == 2
+    manifest = store.load_manifest()["files"]
+    assert manifest["b.txt"]["ids"] == []
+    canonical = db.docstore.search(manifest["a.txt"]["ids"][0])
+    assert [d["source"] for d in canonical.metadata["duplicates"]] == ["b.txt"]
+
+    # a.txt held the only indexed copy of b.txt's text: b.txt must be re-ingested, not lost.
+    os.remove(docs / "a.txt")
+    db = sync(store, docs, embeddings)
+    assert store.last_sync["removed"] == 1 and store.last_sync["changed"] == 1
+    manifest = store.load_manifest()["files"]
+    assert len(manifest["b.txt"]["ids"]) == 1
+    restored = db.docstore.search(manifest["b.txt"]["ids"][0])
+    assert restored.metadata["source"] == "b.txt"
+    assert "duplicates" not in restored.metadata
+    assert len(db.index_to_docstore_id) == 2
+
+
+def test_rebuilt_signatures_cover_only_stored_documents(embeddings):
+    from langchain_community.vectorstores import FAISS
+
+    db = FAISS.from_texts([TEXT, OTHER], embeddings, ids=["a-0", "b-0"])
+    db.docstore._dict["b-0"] = None  # e.g. a docstore entry lost to a partial write
+    index = NearDuplicateIndex.from_docstore(db, threshold=0.8)
+    assert list(index.signatures) == ["a-0"]
@@ -0,0 +1,71 @@
+import time
+
+from doc_watcher import DocWatcher
+from index_store import IndexStore
+from ingestion import IngestionPipeline
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.time() + timeout
+    while not condition():
+        assert time.time() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_new_file_is_synced_incrementally_and_swapped_in(tmp_path, embeddings):
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    (docs / "a.txt").write_text("Alpha reactors cool with heavy water.")
+    store = IndexStore(str(tmp_path / "index"), embeddings, dedup_threshold=None)
+
+    def rebuild():
+        pipeline = IngestionPipeline(embeddings, chunk_size=200, chunk_overlap=0, workers=1)
+        db = store.sync(str(docs), (".txt",), pipeline)
+        return db, store.version
+
+    watcher = DocWatcher(str(docs), (".txt",), rebuild, interval=0.02)
+    watcher.refresh()
+    watcher.start()
+    try:
+        old_db, old_version = watcher.current
+        (docs / "b.txt").write_text("Beta turbines spin on superheated steam.")
+        wait_for(lambda: watcher.generation == 2)
+        db, version = watcher.current
+        assert db is not old_db and version != old_version
+        assert store.last_sync["added"] == 1 and store.last_sync["unchanged"] == 1
+        assert len(db.index_to_docstore_id) == 2
+        assert watcher.files == ["a.txt", "b.txt"]
+
+        # Editor swap and lock files are not documents and trigger nothing.
+        (docs / ".b.txt.swp").write_text("x")
+        (docs / ".~lock.a.txt").write_text("x")
+        time.sleep(0.2)
+        assert watcher.generation == 2 and watcher.files == ["a.txt", "b.txt"]
+    finally:
+        watcher.stop()
+
+
+def test_failed_rebuild_keeps_serving_and_backs_off(tmp_path):
+    calls = []
+
+    def rebuild():
+        calls.append(time.time())
+        if len(calls) > 1:
+            raise OSError("disk full")
+        return "retriever", "v1"
+
+    (tmp_path / "a.txt").write_text("a")
+    watcher = DocWatcher(str(tmp_path), (".txt",), rebuild, interval=0.02, max_backoff=60)
+    watcher.refresh()
+    watcher.start()
+    try:
+        (tmp_path / "b.txt").write_text("b")
+        wait_for(lambda: watcher.failures == 1)
+        assert watcher.current == ("retriever", "v1")
+        assert watcher.last_error == "OSError: disk full"
+        # The same folder state is retried 0.02 * 2**failures seconds later, not on every poll.
+        wait_for(lambda: watcher.failures == 3)
+        assert calls[3] - calls[2] >= 0.02 * 2 ** 2
+        assert watcher._retry_at - calls[3] >= 0.02 * 2 ** 3 - 0.01
+    finally:
+        watcher.stop()
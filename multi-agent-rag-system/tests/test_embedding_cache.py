@@ -0,0 +1,55 @@
+from embedding_cache import CachedEmbeddings
+
+
+class CountingEmbeddings:
+    def __init__(self, dim=16):
+        self.dim = dim
+        self.calls = 0
+
+    def embed_documents(self, texts):
+        self.calls += len(texts)
+        return [[float(len(t))] * self.dim for t in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+def last_used(cache):
+    return dict(cache._conn.execute("SELECT key, last_used FROM embeddings"))
+
+
+def test_hits_are_served_without_writes_until_the_next_store(tmp_path):
+    inner = CountingEmbeddings()
+    cache = CachedEmbeddings(inner, str(tmp_path / "cache.sqlite3"), "m")
+    cache.embed_documents(["alpha", "beta"])
+    before = last_used(cache)
+
+    assert cache.embed_documents(["alpha"]) == [[5.0] * 16]
+    assert inner.calls == 2 and cache.hits == 1
+    assert last_used(cache) == before
+
+    cache.embed_documents(["gamma"])
+    key = cache._key("document", "alpha")
+    assert last_used(cache)[key] > before[key]
+
+
+def test_rows_stored_twice_are_counted_once(tmp_path):
+    cache = CachedEmbeddings(CountingEmbeddings(), str(tmp_path / "cache.sqlite3"), "m")
+    # Two threads (or replicas) that both missed the same text both store it.
+    vector = {cache._key("document", "alpha"): [1.0] * 16}
+    cache._store(vector)
+    cache._store(vector)
+    assert cache._bytes == 16 * 4
+
+
+def test_least_recently_used_rows_are_evicted(tmp_path):
+    cache = CachedEmbeddings(CountingEmbeddings(), str(tmp_path / "cache.sqlite3"), "m", max_bytes=3 * 64)
+    cache.embed_documents(["a"])
+    cache.embed_documents(["bb"])
+    cache.embed_documents(["ccc"])
+    cache.embed_documents(["a"])  # a is now more recent than bb
+    cache.embed_documents(["dddd"])
+    keys = set(last_used(cache))
+    assert cache._key("document", "bb") not in keys
+    assert cache._key("document", "a") in keys
+    assert cache._bytes == 64 * len(keys) <= 3 * 64
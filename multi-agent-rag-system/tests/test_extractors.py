@@ -0,0 +1,41 @@
+import extractors
+
+
+def test_markdown_code_blocks_are_kept_verbatim(tmp_path):
+    path = tmp_path / "notes.md"
+    path.write_text(
+        "# Setup\n"
+        "Install the **client**.\n"
+        "```python\n"
+        "# not a heading\n"
+        "value = `x` * 2\n"
+        "```\n"
+        "***\n"
+        "## Usage\n"
+        "Call `run()`.\n"
+    )
+    sections = list(extractors.markdown_sections(str(path)))
+    assert [meta["section"] for _, meta in sections] == ["Setup", "Usage"]
+    setup = sections[0][0]
+    assert "# not a heading\nvalue = `x` * 2" in setup
+    assert "Install the client." in setup
+    assert "```" not in setup and "`python" not in setup and "***" not in setup
+    assert sections[1][0] == "Usage\nCall run()."
+
+
+def test_csv_quoted_fields_keep_their_newlines(tmp_path):
+    path = tmp_path / "tickets.csv"
+    path.write_text('id,summary\n1,"first line\nsecond line"\n2,plain\n')
+    (text, meta), = extractors.csv_rows(str(path))
+    assert text == "id: 1; summary: first line\nsecond line\nid: 2; summary: plain"
+    assert meta == {"rows": "2-3"}
+
+
+def test_markdown_strips_html_tags_but_not_angle_bracket_text(tmp_path):
+    path = tmp_path / "notes.md"
+    path.write_text(
+        'Use <b>bold</b> and <span class="x">spans</span>.<br/>\n'
+        "Keep a <b and c> d, List<int> and <https://example.com/docs>.\n"
+    )
+    (text, _), = extractors.markdown_sections(str(path))
+    assert text == "Use bold and spans.\nKeep a <b and c> d, List<int> and https://example.com/docs."
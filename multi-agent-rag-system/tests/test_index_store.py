@@ -0,0 +1,76 @@
+import os
+
+from index_store import IndexStore, manifest_version
+from ingestion import IngestionPipeline
+
+EXTENSIONS = (".txt",)
+
+
+def write(folder, name, text):
+    folder.mkdir(exist_ok=True)
+    (folder / name).write_text(text)
+
+
+def sync(store, docs, embeddings):
+    pipeline = IngestionPipeline(embeddings, chunk_size=200, chunk_overlap=0, workers=1)
+    return store.sync(str(docs), EXTENSIONS, pipeline)
+
+
+def counts(store):
+    return {key: store.last_sync[key] for key in ("added", "changed", "removed", "unchanged")}
+
+
+def test_sync_embeds_only_what_changed(tmp_path, embeddings):
+    docs = tmp_path / "docs"
+    write(docs, "a.txt", "Alpha reactors cool with heavy water.")
+    write(docs, "b.txt", "Beta turbines spin on superheated steam.")
+    store = IndexStore(str(tmp_path / "index"), embeddings, fingerprint="test", dedup_threshold=None)
+
+    db = sync(store, docs, embeddings)
+    assert counts(store) == {"added": 2, "changed": 0, "removed": 0, "unchanged": 0}
+    assert len(db.index_to_docstore_id) == 2
+    first_version = store.version
+
+    # A restart with nothing changed embeds nothing and keeps the version.
+    store = IndexStore(str(tmp_path / "index"), embeddings, fingerprint="test", dedup_threshold=None)
+    db = sync(store, docs, embeddings)
+    assert counts(store) == {"added": 0, "changed": 0, "removed": 0, "unchanged": 2}
+    assert store.last_sync["ingest"] is None
+    assert store.version == first_version
+
+    write(docs, "a.txt", "Alpha reactors now cool with molten salt.")
+    os.remove(docs / "b.txt")
+    write(docs, "c.txt", "Gamma cells store charge in lithium.")
+    db = sync(store, docs, embeddings)
+    assert counts(store) == {"added": 1, "changed": 1, "removed": 1, "unchanged": 0}
+    texts = sorted(doc.page_content for doc in db.docstore._dict.values())
+    assert texts == ["Alpha reactors now cool with molten salt.", "Gamma cells store charge in lithium."]
+
+    manifest = store.load_manifest()
+    assert sorted(manifest["files"]) == ["a.txt", "c.txt"]
+    assert store.version == manifest_version(manifest["files"]) != first_version
+    assert sorted(store.lexical.postings["lithium"]) == manifest["files"]["c.txt"]["ids"]
+
+
+def test_touched_files_are_not_reembedded(tmp_path, embeddings):
+    docs = tmp_path / "docs"
+    write(docs, "a.txt", "Alpha reactors cool with heavy water.")
+    store = IndexStore(str(tmp_path / "index"), embeddings, fingerprint="test", dedup_threshold=None)
+    sync(store, docs, embeddings)
+
+    os.utime(docs / "a.txt", ns=(1, 1))
+    sync(store, docs, embeddings)
+    assert counts(store) == {"added": 0, "changed": 0, "removed": 0, "unchanged": 1}
+    assert store.last_sync["ingest"] is None
+    assert store.load_manifest()["files"]["a.txt"]["mtime_ns"] == 1
+
+
+def test_changed_fingerprint_rebuilds(tmp_path, embeddings):
+    docs = tmp_path / "docs"
+    write(docs, "a.txt", "Alpha reactors cool with heavy water.")
+    sync(IndexStore(str(tmp_path / "index"), embeddings, fingerprint="old", dedup_threshold=None), docs, embeddings)
+
+    store = IndexStore(str(tmp_path / "index"), embeddings, fingerprint="new", dedup_threshold=None)
+    assert store.load_manifest() is None
+    sync(store, docs, embeddings)
+    assert counts(store)["added"] == 1
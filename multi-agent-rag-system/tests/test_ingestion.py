@@ -0,0 +1,49 @@
+import pytest
+
+from index_store import IndexStore
+from ingestion import IngestionPipeline
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_unreadable_file_is_skipped_and_retried(tmp_path, embeddings, workers):
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    (docs / "a.txt").write_text("Alpha reactors cool with heavy water.")
+    (docs / "broken.pdf").write_bytes(b"%PDF-1.4 this is not really a pdf")
+    (docs / "c.txt").write_text("Gamma cells store charge in lithium.")
+    store = IndexStore(str(tmp_path / "index"), embeddings, dedup_threshold=None)
+    pipeline = IngestionPipeline(embeddings, chunk_size=200, chunk_overlap=0, workers=workers)
+
+    db = store.sync(str(docs), (".txt", ".pdf"), pipeline)
+    assert store.last_sync["failed"] == ["broken.pdf"]
+    assert pipeline.stats.failed == [str(docs / "broken.pdf")]
+    assert sorted(store.load_manifest()["files"]) == ["a.txt", "c.txt"]
+    assert len(db.index_to_docstore_id) == 2
+
+    # Not in the manifest, so the next sync tries it again.
+    store.sync(str(docs), (".txt", ".pdf"), pipeline)
+    assert store.last_sync["added"] == 1 and store.last_sync["failed"] == ["broken.pdf"]
+
+
+def test_chunks_of_a_file_that_fails_midway_are_discarded(tmp_path, embeddings, monkeypatch):
+    import ingestion
+
+    real = ingestion.iter_sections
+
+    def sections(path, extractors=None):
+        yield from real(path, extractors)
+        if path.endswith("b.txt"):
+            raise ValueError("truncated file")
+
+    monkeypatch.setattr(ingestion, "iter_sections", sections)
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    (docs / "a.txt").write_text("Alpha reactors cool with heavy water.")
+    (docs / "b.txt").write_text("Beta turbines spin on superheated steam.")
+    store = IndexStore(str(tmp_path / "index"), embeddings, dedup_threshold=0.85)
+    pipeline = IngestionPipeline(embeddings, chunk_size=200, chunk_overlap=0, workers=1, batch_size=1)
+
+    db = store.sync(str(docs), (".txt",), pipeline)
+    assert store.last_sync["failed"] == ["b.txt"]
+    assert [doc.page_content for doc in db.docstore._dict.values()] == ["Alpha reactors cool with heavy water."]
+    assert "turbines" not in store.lexical.postings
@@ -0,0 +1,77 @@
+from langchain_community.vectorstores import FAISS
+
+from benchmarks.stubs import StubEmbeddings
+from lexical_index import BM25Index, HybridRetriever, reciprocal_rank_fusion, tokenize
+
+TEXTS = {
+    "err": "Error ERR-4021 means the coolant pump overheated and shut down.",
+    "refund": "Refunds are issued within 30 days of purchase.",
+    "pump": "The coolant pump is serviced every six months.",
+    "staff": "Onboarding checklist for new staff members.",
+}
+
+
+class CountingEmbeddings(StubEmbeddings):
+    def __init__(self):
+        super().__init__()
+        self.queries = 0
+
+    def embed_query(self, text):
+        self.queries += 1
+        return super().embed_query(text)
+
+
+def retriever(**kwargs):
+    embeddings = CountingEmbeddings()
+    db = FAISS.from_texts(list(TEXTS.values()), embeddings, ids=list(TEXTS))
+    lexical = BM25Index()
+    for doc_id, text in TEXTS.items():
+        lexical.add(doc_id, text)
+    # BM25 scores are low on a four-document corpus; the default cut-off assumes a real one.
+    kwargs.setdefault("lexical_min_score", 2.5)
+    return HybridRetriever(vectorstore=db, lexical=lexical, k=2, fetch_k=4, **kwargs), embeddings
+
+
+def test_identifiers_are_single_tokens_with_their_parts():
+    assert tokenize("See ERR-4021 in v2.3.1") == ["see", "err-4021", "err", "4021", "in", "v2.3.1", "v2", "3", "1"]
+
+
+def test_rrf_favours_documents_ranked_high_in_several_lists():
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["b", "d", "a"]])
+    assert fused[0] == "b"
+    assert set(fused) == {"a", "b", "c", "d"}
+    assert fused.index("d") > fused.index("a")
+
+
+def test_decisive_lexical_match_skips_the_query_embedding():
+    r, embeddings = retriever()
+    docs, path = r.retrieve("ERR-4021")
+    assert path == "lexical"
+    assert docs[0].page_content == TEXTS["err"]
+    assert r.lexical_path("ERR-4021")
+    assert embeddings.queries == 0
+
+
+def test_other_queries_fuse_dense_and_lexical_rankings():
+    r, embeddings = retriever()
+    # "coolant pump" matches two documents about equally: no decisive lexical winner.
+    docs, path = r.retrieve("coolant pump")
+    assert path == "hybrid" and embeddings.queries == 1
+    assert {doc.page_content for doc in docs} == {TEXTS["pump"], TEXTS["err"]}
+    assert not r.lexical_path("coolant pump")
+
+
+def test_dense_mode_never_uses_bm25():
+    r, embeddings = retriever(mode="dense")
+    docs, path = r.retrieve("ERR-4021")
+    assert path == "dense" and embeddings.queries == 1
+    assert len(docs) == 2
+
+
+def test_bm25_index_survives_save_and_remove(tmp_path):
+    r, _ = retriever()
+    r.lexical.save(str(tmp_path / "lexical.json"))
+    loaded = BM25Index.load(str(tmp_path / "lexical.json"))
+    assert loaded.search("refunds", 1) == r.lexical.search("refunds", 1)
+    loaded.remove("refund")
+    assert loaded.search("refunds", 1) == [] and "refunds" not in loaded.postings
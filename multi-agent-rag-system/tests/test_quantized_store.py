@@ -0,0 +1,98 @@
+import glob
+import os
+import threading
+
+import numpy as np
+
+from doc_watcher import DocWatcher
+from quantized_store import QuantizedStore
+
+
+def build(folder, vectors, version):
+    records = [{"id": f"doc-{i}", "text": f"chunk {i}", "metadata": {"row": i}} for i in range(len(vectors))]
+    QuantizedStore.build(folder, len(vectors), vectors.shape[1], lambda: iter([vectors]), records, version=version)
+
+
+def vectors(rows=500, dim=32, seed=0):
+    return np.random.default_rng(seed).standard_normal((rows, dim)).astype(np.float32)
+
+
+def test_search_matches_exact_neighbours(tmp_path):
+    data = vectors()
+    folder = str(tmp_path / "int8")
+    build(folder, data, "v1")
+    store = QuantizedStore(folder, embeddings=None, block_rows=64)
+    query = data[7] + 0.01
+    rows, _ = store.search_vector(query, 5)
+    exact = np.argsort(((data - query) ** 2).sum(axis=1))[:5]
+    assert list(rows) == list(exact)
+    assert store.get_documents(["doc-7", "missing"])[0].metadata == {"row": 7}
+    store.close()
+    store.close()
+
+
+def test_concurrent_rebuilds_do_not_clobber_each_other(tmp_path):
+    folder = str(tmp_path / "int8")
+    build(folder, vectors(seed=1), "v1")
+    reader = QuantizedStore(folder, embeddings=None)
+    errors = []
+
+    def rebuild(seed):
+        try:
+            build(folder, vectors(seed=seed), f"v{seed}")
+            QuantizedStore(folder, embeddings=None).close()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=rebuild, args=(seed,)) for seed in range(2, 6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert glob.glob(folder + ".tmp-*") == [] and not os.path.exists(folder + ".old")
+    # A store opened before the swaps keeps serving its own files.
+    assert reader.get_documents(["doc-3"])[0].page_content == "chunk 3"
+    reader.close()
+
+
+def test_rebuild_of_current_version_is_skipped(tmp_path):
+    folder = str(tmp_path / "int8")
+    build(folder, vectors(seed=1), "v1")
+    build(folder, vectors(seed=2), "v1")
+    store = QuantizedStore(folder, embeddings=None)
+    assert np.allclose(store.full[0], vectors(seed=1)[0])
+    store.close()
+
+
+class FakeRetriever:
+    def __init__(self, name):
+        self.name = name
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def test_replaced_retriever_is_closed_after_its_last_lease(tmp_path):
+    built = []
+
+    def rebuild():
+        built.append(FakeRetriever(len(built)))
+        return built[-1], f"v{len(built)}"
+
+    watcher = DocWatcher(str(tmp_path), (".txt",), rebuild)
+    watcher.refresh()
+    with watcher.lease() as (retriever, version):
+        watcher.refresh()
+        assert retriever is built[0] and version == "v1"
+        assert not built[0].closed
+    assert built[0].closed and not built[1].closed
+
+    watcher.refresh()
+    assert built[1].closed  # no lease held it
+
+    with watcher.lease():
+        watcher.stop()
+        assert not built[2].closed
+    assert built[2].closed
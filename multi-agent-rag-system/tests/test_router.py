@@ -0,0 +1,55 @@
+import numpy as np
+from langchain_community.vectorstores import FAISS
+
+import router
+from ann_index import with_ann_index
+from benchmarks.stubs import StubEmbeddings
+from lexical_index import BM25Index, HybridRetriever
+from quantized_store import QuantizedStore
+
+TEXTS = ["Error ERR-4021 means the pump overheated.", "Refund policy: 30 days.", "Onboarding checklist for new staff."]
+
+
+class NoDocumentEmbeddings(StubEmbeddings):
+    def embed_documents(self, texts):
+        raise AssertionError("routing must not embed chunks")
+
+
+def retriever(vectorstore):
+    lexical = BM25Index()
+    for i, text in enumerate(TEXTS):
+        lexical.add(str(i), text)
+    return HybridRetriever(vectorstore=vectorstore, lexical=lexical)
+
+
+def expected(query):
+    embeddings = StubEmbeddings()
+    q = np.array(embeddings.embed_query(query))
+    return max(float(q @ np.array(d)) for d in embeddings.embed_documents(TEXTS))
+
+
+def test_rag_score_reads_the_nearest_vector_back_from_the_index(tmp_path):
+    db = FAISS.from_texts(TEXTS, StubEmbeddings())
+    db.embedding_function = NoDocumentEmbeddings()
+    query_router = router.QueryRouter(model_path=str(tmp_path / "none.json"), log_path=None)
+    query = "pump overheated"
+    assert abs(query_router.rag_score(query, retriever(db)) - expected(query)) < 1e-5
+
+    QuantizedStore.export_faiss(db, str(tmp_path / "int8"), version="v")
+    store = QuantizedStore(str(tmp_path / "int8"), NoDocumentEmbeddings())
+    assert abs(query_router.rag_score(query, retriever(store)) - expected(query)) < 1e-5
+    store.close()
+
+
+def test_rag_score_works_on_an_ivf_index(tmp_path):
+    texts = TEXTS + [f"filler document number {i} about topic {i % 7}" for i in range(100)]
+    db = FAISS.from_texts(texts, StubEmbeddings())
+    db = with_ann_index(db, {"type": "ivf", "nlist": 2, "nprobe": 2}, str(tmp_path / "ann"), "v")
+    query_router = router.QueryRouter(model_path=str(tmp_path / "none.json"), log_path=None)
+    assert query_router.rag_score("pump overheated", retriever(db)) > 0.5
+
+
+def test_identifiers_force_rag_only_when_indexed(tmp_path):
+    r = retriever(FAISS.from_texts(TEXTS, StubEmbeddings()))
+    assert router.QueryRouter.known_identifier("What does ERR-4021 mean?", r)
+    assert not router.QueryRouter.known_identifier("How did COVID-19 spread?", r)
@@ -0,0 +1,93 @@
+import asyncio
+import threading
+
+import pytest
+
+aiohttp = pytest.importorskip("aiohttp")
+from aiohttp.test_utils import TestClient, TestServer  # noqa: E402
+
+from service import create_app  # noqa: E402
+
+
+class FakeRuntime:
+    warm_error = None
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.started = threading.Semaphore(0)
+        self.ready = threading.Event()
+        self.ready.set()
+
+    def wait_ready(self):
+        pass
+
+    def collection_ids(self):
+        return ["default", "team-a"]
+
+    def stats(self, collection):
+        return {}
+
+    def answer(self, query, collection, speculative=False, on_token=None, preference=None, session=None):
+        self.started.release()
+        self.release.wait(5)
+        if on_token is not None:
+            for token in ("Hello", " world"):
+                on_token(token)
+        return {"answer": f"{collection}: {query}", "route": "llm", "seconds": 0.0}
+
+
+def serve(runtime, scenario, **kwargs):
+    async def main():
+        async with TestClient(TestServer(create_app(runtime, **kwargs))) as client:
+            return await scenario(client)
+
+    return asyncio.run(main())
+
+
+def test_requests_beyond_the_queue_get_429_and_the_rest_finish():
+    runtime = FakeRuntime()
+
+    async def scenario(client):
+        loop = asyncio.get_running_loop()
+        running = asyncio.ensure_future(client.post("/query", json={"query": "one"}))
+        await loop.run_in_executor(None, runtime.started.acquire)
+        waiting = asyncio.ensure_future(client.post("/query", json={"query": "two"}))
+        while (await (await client.get("/stats")).json())["waiting"] < 1:
+            await asyncio.sleep(0.01)
+
+        rejected = await client.post("/query", json={"query": "three"})
+        rejected_stream = await client.post("/query/stream", json={"query": "four"})
+        runtime.release.set()
+        done = [await running, await waiting]
+        return rejected, rejected_stream, [(r.status, await r.json()) for r in done]
+
+    rejected, rejected_stream, done = serve(runtime, scenario, concurrency=1, queue=1)
+    assert rejected.status == 429 and rejected.headers["Retry-After"] == "1"
+    assert rejected_stream.status == 429
+    assert [status for status, _ in done] == [200, 200]
+    assert [body["answer"] for _, body in done] == ["default: one", "default: two"]
+
+
+def test_stream_sends_tokens_then_the_answer():
+    runtime = FakeRuntime()
+    runtime.release.set()
+
+    async def scenario(client):
+        response = await client.post("/query/stream", json={"query": "hi", "collection": "team-a"})
+        return response.status, [line async for line in response.content if line.strip()]
+
+    status, lines = serve(runtime, scenario)
+    assert status == 200
+    assert lines[:2] == [b'{"token": "Hello"}\n', b'{"token": " world"}\n']
+    assert b'"answer": "team-a: hi"' in lines[2]
+
+
+def test_bad_requests_are_rejected_before_queueing():
+    runtime = FakeRuntime()
+
+    async def scenario(client):
+        unknown = await client.post("/query", json={"query": "hi", "collection": "nope"})
+        empty = await client.post("/query", json={"query": "  "})
+        return unknown.status, empty.status
+
+    assert serve(runtime, scenario) == (404, 400)
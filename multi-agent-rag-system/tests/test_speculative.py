@@ -0,0 +1,61 @@
+import threading
+
+from speculative import SpeculativeRunner
+
+
+class BlockingGraph:
+    """Branch calls block until ``release`` is set; ``invoke`` waits for them to start and consumes those in ``use``."""
+
+    def __init__(self, use=()):
+        self.use = set(use)
+        self.release = threading.Event()
+        self.started = threading.Semaphore(0)
+        self.prefetched = []
+        self.search = self
+
+    def run(self, query):
+        self.started.release()
+        self.release.wait(5)
+        return "web results"
+
+    def retrieve(self, retriever, query):
+        self.started.release()
+        self.release.wait(5)
+        return [], "dense"
+
+    def invoke(self, user_query, retriever, prefetch=None, **kwargs):
+        self.prefetched.append(sorted(prefetch))
+        for _ in prefetch:
+            self.started.acquire(timeout=5)
+        for name in self.use & set(prefetch):
+            prefetch[name].result()
+        return {"final": "answer"}
+
+
+def test_budget_caps_speculative_calls_across_queries():
+    graph = BlockingGraph()
+    runner = SpeculativeRunner(graph, budget=2)
+
+    runner.run("first", retriever=object())
+    runner.run("second", retriever=object())
+    assert graph.prefetched == [["rag", "web"], []]
+    assert runner.stats["launched"] == 2
+    assert runner.stats["over_budget"] == 2
+
+    # Discarded tasks hold their slot until they finish, then free it.
+    graph.release.set()
+    runner.pool.shutdown(wait=True)
+    assert runner.stats["wasted"] == 2
+    assert runner._budget.acquire(blocking=False) and runner._budget.acquire(blocking=False)
+
+
+def test_used_tasks_return_their_slots():
+    graph = BlockingGraph(use={"web"})
+    graph.release.set()
+    runner = SpeculativeRunner(graph, budget=2)
+
+    runner.run("query", retriever=None)
+    runner.run("query", retriever=None)
+    assert graph.prefetched == [["web"], ["web"]]
+    assert runner.stats["used"] == 2
+    assert runner.stats["over_budget"] == 0
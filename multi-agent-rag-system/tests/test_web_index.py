@@ -0,0 +1,77 @@
+import web_index
+from web_index import WebResultIndex, chunk_text
+
+
+class TopicEmbeddings:
+    """Two-dimensional vectors: one axis for pump text, one for everything else."""
+
+    def embed_query(self, text):
+        return [1.0, 0.0] if "pump" in text else [0.0, 1.0]
+
+    def embed_documents(self, texts):
+        return [self.embed_query(t) for t in texts]
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+def index(monkeypatch, **kwargs):
+    clock = Clock()
+    monkeypatch.setattr(web_index.time, "time", clock.time)
+    return WebResultIndex(TopicEmbeddings(), **kwargs), clock
+
+
+def test_chunk_text_packs_sentences_under_the_limit():
+    chunks = chunk_text("One two. Three four. Five six.", chunk_chars=20)
+    assert chunks == ["One two. Three four.", "Five six."]
+    assert all(len(c) <= 20 for c in chunk_text("x" * 50, chunk_chars=20))
+
+
+def test_follow_up_on_the_same_topic_hits_until_the_ttl(monkeypatch):
+    web, clock = index(monkeypatch, ttl=60)
+    web.add("s1", "The pump is rated for 40 bar.").result()
+    assert web.lookup("s1", "pump pressure?") == ["The pump is rated for 40 bar."]
+    assert web.lookup("s1", "weather today?") is None
+    assert web.lookup("s2", "pump pressure?") is None
+
+    clock.now += 61
+    assert web.lookup("s1", "pump pressure?") is None
+    assert web.stats()["chunks"] == 0
+    assert (web.hits, web.misses) == (1, 3)
+
+
+def test_expiry_drops_only_old_chunks(monkeypatch):
+    web, clock = index(monkeypatch, ttl=60)
+    web.add("s1", "Old pump manual.").result()
+    clock.now += 40
+    web.add("s1", "New pump manual.").result()
+    clock.now += 30
+    assert web.lookup("s1", "pump?") == ["New pump manual."]
+
+
+def test_each_session_keeps_at_most_max_chunks(monkeypatch):
+    web, _ = index(monkeypatch, chunk_chars=12, max_chunks=2)
+    web.add("s1", "pump one. pump two. pump three.").result()
+    assert sorted(web.lookup("s1", "pump?")) == ["pump three.", "pump two."]
+    assert web.stats()["chunks"] == 2
+
+
+def test_memory_cap_evicts_least_recently_used_sessions(monkeypatch):
+    web, _ = index(monkeypatch)
+    text = "pump " * 20
+    web.add("a", text).result()
+    per_session = web.stats()["mb"] * 1e6
+    web.max_bytes = int(per_session * 2.5)
+    web.add("b", text).result()
+    web.lookup("a", "pump?")
+    web.add("c", text).result()
+
+    assert web.evicted_sessions == 1
+    assert web.lookup("b", "pump?") is None
+    assert web.lookup("a", "pump?") and web.lookup("c", "pump?")
+    assert web.stats()["sessions"] == 2
@@ -0,0 +1,58 @@
+import json
+import threading
+import time
+
+from web_search import SearchClient
+
+
+class CountingBackend:
+    def __init__(self, delay=0.0):
+        self.calls = []
+        self.delay = delay
+        self.release = threading.Event()
+
+    def search(self, query):
+        self.calls.append(query)
+        if self.delay:
+            self.release.wait(self.delay)
+        return f"results for {query}"
+
+
+def test_identical_queries_are_cached_and_coalesced(tmp_path):
+    backend = CountingBackend(delay=5)
+    client = SearchClient(backend, cache_path=None)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(client.run("Falcon 9 price?"))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    while not backend.calls:
+        time.sleep(0.001)
+    backend.release.set()
+    for thread in threads:
+        thread.join()
+    assert len(backend.calls) == 1 and len(set(results)) == 1
+    assert client.run("falcon 9   PRICE") == results[0]
+    assert client.stats["misses"] == 1
+    assert client.stats["hits"] + client.stats["coalesced"] == 4
+
+
+def test_misses_share_one_write_behind_and_survive_a_restart(tmp_path):
+    path = str(tmp_path / "search_cache.json")
+    client = SearchClient(CountingBackend(), cache_path=path, save_delay=60)
+    for n in range(5):
+        client.run(f"query {n}")
+    assert not (tmp_path / "search_cache.json").exists()
+    client.flush()
+
+    backend = CountingBackend()
+    restarted = SearchClient(backend, cache_path=path)
+    assert restarted.run("query 3") == "results for query 3"
+    assert backend.calls == []
+
+
+def test_malformed_cache_entries_are_skipped(tmp_path):
+    path = tmp_path / "search_cache.json"
+    stamp = time.time()
+    path.write_text(json.dumps([["good", [stamp, "kept"]], ["short"], 42, ["bad", [stamp]], ["num", ["x", "y"]]]))
+    client = SearchClient(CountingBackend(), cache_path=str(path))
+    assert list(client._cache) == ["good"]
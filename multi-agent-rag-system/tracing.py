@@ -0,0 +1,229 @@
+"""Per-query spans for graph nodes and LLM, embedding and search calls.
+
+Nothing is recorded until ``configure()`` installs a sink; after that every
+``span()`` opened inside a ``trace()`` is written as one SQLite row::
+
+    tracing.configure("logs/traces.sqlite3")
+    with tracing.trace(query):
+        with tracing.span("rag_agent") as s:
+            ...
+            s.set(route="rag", cache_hit=False)
+
+The current trace id lives in a context variable, so work handed to a thread
+pool is attributed correctly when submitted through ``contextvars.copy_context``.
+"""
+import contextvars
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+_tracer = None
+_current_trace = contextvars.ContextVar("trace_id", default=None)
+_current_span = contextvars.ContextVar("span_name", default=None)
+
+
+def estimate_tokens(text):
+    """Rough token count (~4 characters per token) when the provider reports none."""
+    return max(1, len(text) // 4) if text else 0
+
+
+def _percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+class Span:
+    def __init__(self, name, kind, trace_id, attrs):
+        self.name = name
+        self.kind = kind
+        self.trace_id = trace_id
+        self.attrs = attrs
+        self.start = time.time()
+        self._started = time.perf_counter()
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    @property
+    def duration_ms(self):
+        return (time.perf_counter() - self._started) * 1000
+
+
+class Tracer:
+    """SQLite span sink keeping the most recent ``max_traces`` queries."""
+
+    def __init__(self, path, max_traces=5000):
+        self.max_traces = max_traces
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS spans ("
+            "trace_id TEXT NOT NULL, name TEXT NOT NULL, kind TEXT NOT NULL, start REAL NOT NULL, "
+            "duration_ms REAL NOT NULL, tokens_in INTEGER, tokens_out INTEGER, cache_hit INTEGER, "
+            "route TEXT, error TEXT, attrs TEXT)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS spans_trace ON spans (trace_id)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS spans_kind_start ON spans (kind, start)")
+        self._conn.commit()
+
+    def record(self, span, duration_ms, error=None):
+        attrs = dict(span.attrs)
+        cache_hit = attrs.pop("cache_hit", None)
+        row = (
+            span.trace_id, span.name, span.kind, span.start, duration_ms,
+            attrs.pop("tokens_in", None), attrs.pop("tokens_out", None),
+            None if cache_hit is None else int(bool(cache_hit)),
+            attrs.pop("route", None), error, json.dumps(attrs, default=str) if attrs else None,
+        )
+        with self._lock:
+            self._conn.execute("INSERT INTO spans VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", row)
+            if span.kind == "query":
+                self._prune()
+            self._conn.commit()
+
+    def _prune(self):
+        cutoff = self._conn.execute(
+            "SELECT start FROM spans WHERE kind = 'query' ORDER BY start DESC LIMIT 1 OFFSET ?",
+            (self.max_traces,),
+        ).fetchone()
+        if cutoff is not None:
+            self._conn.execute("DELETE FROM spans WHERE start <= ?", cutoff)
+
+    def summary(self, last=200):
+        """Per-span-name latency percentiles and token totals over the last ``last`` queries."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT name, kind, duration_ms, tokens_in, tokens_out, cache_hit FROM spans WHERE trace_id IN "
+                "(SELECT trace_id FROM spans WHERE kind = 'query' ORDER BY start DESC LIMIT ?)",
+                (last,),
+            ).fetchall()
+        grouped = {}
+        for name, kind, duration, tokens_in, tokens_out, cache_hit in rows:
+            entry = grouped.setdefault(name, {"kind": kind, "durations": [], "tokens_in": 0, "tokens_out": 0,
+                                              "cache_hits": 0})
+            entry["durations"].append(duration)
+            entry["tokens_in"] += tokens_in or 0
+            entry["tokens_out"] += tokens_out or 0
+            entry["cache_hits"] += cache_hit or 0
+        summary = []
+        for name, entry in grouped.items():
+            durations = entry.pop("durations")
+            summary.append({
+                "name": name,
+                **entry,
+                "count": len(durations),
+                "p50_ms": _percentile(durations, 0.5),
+                "p95_ms": _percentile(durations, 0.95),
+            })
+        return sorted(summary, key=lambda item: -item["p95_ms"])
+
+
+def configure(path, max_traces=5000):
+    global _tracer
+    _tracer = Tracer(path, max_traces=max_traces)
+    return _tracer
+
+
+def get_tracer():
+    return _tracer
+
+
+@contextmanager
+def trace(query):
+    """Root span for one user query; nested spans share its trace id."""
+    if _tracer is None:
+        yield None
+        return
+    token = _current_trace.set(uuid.uuid4().hex)
+    try:
+        with span("query", kind="query", query_chars=len(query)) as root:
+            yield root
+    finally:
+        _current_trace.reset(token)
+
+
+@contextmanager
+def span(name, kind="node", **attrs):
+    """Time the enclosed block; a no-op outside ``trace()`` or before ``configure()``."""
+    trace_id = _current_trace.get()
+    if _tracer is None or trace_id is None:
+        yield Span(name, kind, None, attrs)
+        return
+    current = Span(name, kind, trace_id, attrs)
+    token = _current_span.set(name)
+    try:
+        yield current
+    except BaseException as e:
+        _tracer.record(current, current.duration_ms, error=f"{type(e).__name__}: {e}")
+        raise
+    else:
+        _tracer.record(current, current.duration_ms)
+    finally:
+        _current_span.reset(token)
+
+
+class TraceCallbackHandler(BaseCallbackHandler):
+    """Records every LLM call made through a LangChain model as an ``llm`` span.
+
+    The span is named after the enclosing span (``summarizer_agent.llm``), so
+    calls from different nodes are reported separately.
+
+    Token counts come from the provider's usage metadata when it is present
+    and are otherwise estimated from the prompt and completion text.
+    """
+
+    def __init__(self):
+        self._open = {}
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._start(run_id, serialized, "".join(prompts))
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._start(run_id, serialized, "".join(str(m.content) for batch in messages for m in batch))
+
+    def _start(self, run_id, serialized, prompt):
+        trace_id = _current_trace.get()
+        if _tracer is None or trace_id is None:
+            return
+        parent = _current_span.get()
+        name = f"{parent}.llm" if parent else "llm"
+        self._open[run_id] = (Span(name, "llm", trace_id, {}), prompt)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        opened = self._open.pop(run_id, None)
+        if opened is None:
+            return
+        current, prompt = opened
+        completion = "".join(g.text for batch in response.generations for g in batch)
+        usage = self._usage(response)
+        current.set(
+            tokens_in=usage.get("input_tokens", estimate_tokens(prompt)),
+            tokens_out=usage.get("output_tokens", estimate_tokens(completion)),
+            estimated_tokens=not usage,
+        )
+        _tracer.record(current, current.duration_ms)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        opened = self._open.pop(run_id, None)
+        if opened is not None:
+            _tracer.record(opened[0], opened[0].duration_ms, error=f"{type(error).__name__}: {error}")
+
+    @staticmethod
+    def _usage(response):
+        for batch in response.generations:
+            for generation in batch:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                if usage:
+                    return usage
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        if "prompt_tokens" in usage:
+            return {"input_tokens": usage["prompt_tokens"], "output_tokens": usage.get("completion_tokens", 0)}
+        return {}
@@ -0,0 +1,159 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+def chunk_text(text, chunk_chars=500):
+    """Greedy sentence packing into chunks of at most ~``chunk_chars`` characters."""
+    chunks, current = [], ""
+    for sentence in _SENTENCE_END.split(text.strip()):
+        if current and len(current) + len(sentence) + 1 > chunk_chars:
+            chunks.append(current)
+            current = ""
+        current = f"{current} {sentence}" if current else sentence
+        while len(current) > chunk_chars:
+            chunks.append(current[:chunk_chars])
+            current = current[chunk_chars:]
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+class _Session:
+    def __init__(self):
+        self.texts = []
+        self.created = []
+        self.vectors = np.empty((0, 0), dtype=np.float32)
+
+    @property
+    def nbytes(self):
+        return self.vectors.nbytes + sum(len(t) for t in self.texts)
+
+    def keep(self, mask):
+        self.texts = [t for t, k in zip(self.texts, mask) if k]
+        self.created = [c for c, k in zip(self.created, mask) if k]
+        self.vectors = self.vectors[np.asarray(mask, dtype=bool)]
+
+
+class WebResultIndex:
+    """Short-lived, per-session index of fetched web results.
+
+    After a web search, ``add`` chunks and embeds the result text on a
+    background thread. A later web-route query in the same session is
+    answered by ``lookup`` from chunks whose cosine similarity to it is at
+    least ``threshold``, with no new search. Unlike the search cache, which
+    only matches the same query string, this serves follow-up questions on
+    the same topic.
+
+    Chunks expire after ``ttl`` seconds (web answers go stale). Each session
+    keeps at most ``max_chunks`` (oldest dropped first). Past ``max_bytes``
+    of vectors and text in total, least recently used sessions are dropped.
+    """
+
+    def __init__(self, embeddings, ttl=600, threshold=0.75, k=4, chunk_chars=500, max_chunks=200,
+                 max_bytes=64 * 1024 * 1024):
+        self.embeddings = embeddings
+        self.ttl = ttl
+        self.threshold = threshold
+        self.k = k
+        self.chunk_chars = chunk_chars
+        self.max_chunks = max_chunks
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.indexed = 0
+        self.evicted_sessions = 0
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="web-index")
+
+    def lookup(self, session_id, query):
+        """Best matching chunks (most similar first) for ``query``, or ``None``."""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None:
+                self._sessions.move_to_end(session_id)
+                self._expire(session)
+            if session is None or not session.texts:
+                self.misses += 1
+                return None
+        vector = self._unit(np.asarray(self.embeddings.embed_query(query), dtype=np.float32))
+        with self._lock:
+            if not session.texts:
+                self.misses += 1
+                return None
+            sims = session.vectors @ vector
+            order = [i for i in np.argsort(-sims)[: self.k] if sims[i] >= self.threshold]
+            if not order:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return [session.texts[i] for i in order]
+
+    def add(self, session_id, text):
+        """Index ``text`` for ``session_id`` in the background; returns the future."""
+        return self._pool.submit(self._add, session_id, text)
+
+    def _add(self, session_id, text):
+        chunks = chunk_text(text, self.chunk_chars)
+        if not chunks:
+            return 0
+        vectors = self._unit(np.asarray(self.embeddings.embed_documents(chunks), dtype=np.float32))
+        now = time.time()
+        with self._lock:
+            session = self._sessions.setdefault(session_id, _Session())
+            self._sessions.move_to_end(session_id)
+            self._expire(session)
+            session.vectors = np.vstack([session.vectors, vectors]) if session.texts else vectors
+            session.texts += chunks
+            session.created += [now] * len(chunks)
+            if len(session.texts) > self.max_chunks:
+                excess = len(session.texts) - self.max_chunks
+                session.keep([i >= excess for i in range(len(session.texts))])
+            self.indexed += len(chunks)
+            self._enforce_budget(session_id)
+        return len(chunks)
+
+    def drop(self, session_id):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    @staticmethod
+    def _unit(vectors):
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+    def _expire(self, session):
+        cutoff = time.time() - self.ttl
+        if session.created and session.created[0] < cutoff:
+            session.keep([c >= cutoff for c in session.created])
+
+    def _enforce_budget(self, keep_id):
+        total = sum(s.nbytes for s in self._sessions.values())
+        while total > self.max_bytes and len(self._sessions) > 1:
+            session_id = next(iter(self._sessions))
+            if session_id == keep_id:
+                break
+            total -= self._sessions.pop(session_id).nbytes
+            self.evicted_sessions += 1
+
+    def stats(self):
+        with self._lock:
+            sessions = list(self._sessions.values())
+        total = self.hits + self.misses
+        return {
+            "sessions": len(sessions),
+            "chunks": sum(len(s.texts) for s in sessions),
+            "mb": sum(s.nbytes for s in sessions) / 1e6,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "indexed": self.indexed,
+            "evicted_sessions": self.evicted_sessions,
+        }
@@ -0,0 +1,198 @@
+import atexit
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Protocol
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from tracing import span
+
+
+def normalize_query(query):
+    """Case-, whitespace- and trailing-punctuation-insensitive cache key."""
+    return re.sub(r"\s+", " ", query).strip().rstrip("?!.").strip().lower()
+
+
+# ---------------------- BACKENDS ----------------------
+class SearchBackend(Protocol):
+    def search(self, query: str) -> str:
+        ...
+
+
+class DuckDuckGoBackend:
+    """DuckDuckGo text search through one long-lived client (pooled connections)."""
+
+    def __init__(self, max_results=5, timeout=10):
+        from duckduckgo_search import DDGS
+
+        self.max_results = max_results
+        self._ddgs = DDGS(timeout=timeout)
+
+    def search(self, query):
+        results = self._ddgs.text(query, max_results=self.max_results) or []
+        snippets = [r["body"] for r in results if r.get("body")]
+        return " ".join(snippets) if snippets else "No good DuckDuckGo Search Result was found"
+
+
+class HTTPSearchBackend:
+    """JSON search endpoint (``GET url?q=...`` -> ``{"results": [{"snippet": ...}]}``).
+
+    Meant for internal search services and the fake server in
+    ``benchmarks/fake_search_server.py``.
+    """
+
+    def __init__(self, url, timeout=10, pool_size=16):
+        self.url = url
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def search(self, query):
+        response = self.session.get(self.url, params={"q": query}, timeout=self.timeout)
+        response.raise_for_status()
+        return " ".join(r.get("snippet", "") for r in response.json().get("results", []))
+
+
+def backend_from_env():
+    if os.getenv("SEARCH_BACKEND", "duckduckgo") == "http":
+        return HTTPSearchBackend(os.getenv("SEARCH_URL", "http://127.0.0.1:8765/search"))
+    return DuckDuckGoBackend()
+
+
+# ---------------------- CLIENT ----------------------
+class SearchClient:
+    """Cached, coalescing, retrying front end with ``DuckDuckGoSearchRun.run``'s interface.
+
+    Results are cached by normalized query for ``ttl`` seconds (LRU beyond
+    ``max_entries``) and persisted to ``cache_path``: at most one write every
+    ``save_delay`` seconds, in the background, plus one at exit. Concurrent
+    identical queries share one backend call.
+    """
+
+    def __init__(self, backend, cache_path=".cache/search_cache.json", ttl=900, max_entries=1000,
+                 retries=2, backoff=0.5, save_delay=2.0):
+        self.backend = backend
+        self.cache_path = cache_path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.retries = retries
+        self.backoff = backoff
+        self.save_delay = save_delay
+        self.stats = {"hits": 0, "misses": 0, "coalesced": 0, "retries": 0, "errors": 0}
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._save_timer = None
+        self._inflight = {}
+        self._cache = OrderedDict()
+        self._load()
+        if cache_path:
+            atexit.register(self.flush)
+
+    def run(self, query):
+        with span("web_search", kind="search") as s:
+            result, source = self._run(query)
+            s.set(cache_hit=source != "backend", source=source)
+            return result
+
+    def _run(self, query):
+        key = normalize_query(query)
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None and time.time() - entry[0] < self.ttl:
+                self._cache.move_to_end(key)
+                self.stats["hits"] += 1
+                return entry[1], "cache"
+            future = self._inflight.get(key)
+            if future is not None:
+                self.stats["coalesced"] += 1
+                owner = False
+            else:
+                future = self._inflight[key] = Future()
+                self.stats["misses"] += 1
+                owner = True
+        if not owner:
+            return future.result(), "coalesced"
+
+        try:
+            result = self._search_with_retry(query)
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            self._store(key, result)
+            return result, "backend"
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def _search_with_retry(self, query):
+        for attempt in range(self.retries + 1):
+            try:
+                return self.backend.search(query)
+            except Exception:
+                if attempt == self.retries:
+                    with self._lock:
+                        self.stats["errors"] += 1
+                    raise
+                with self._lock:
+                    self.stats["retries"] += 1
+                time.sleep(self.backoff * 2 ** attempt)
+
+    # ---------------------- PERSISTENCE ----------------------
+    def _store(self, key, result):
+        with self._lock:
+            self._cache[key] = (time.time(), result)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+            if not self.cache_path or self._save_timer is not None:
+                return
+            # Write-behind: misses within save_delay of each other share one write.
+            self._save_timer = threading.Timer(self.save_delay, self.flush)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+
+    def _load(self):
+        if not self.cache_path:
+            return
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            return
+        if not isinstance(entries, list):
+            return
+        cutoff = time.time() - self.ttl
+        for entry in entries:
+            try:
+                key, (stamp, result) = entry
+            except (TypeError, ValueError):
+                continue
+            if isinstance(key, str) and isinstance(result, str) and isinstance(stamp, (int, float)) \
+                    and stamp >= cutoff:
+                self._cache[key] = (stamp, result)
+
+    def flush(self):
+        """Write the cache to ``cache_path`` now; one writer at a time, each with the latest entries."""
+        if not self.cache_path:
+            return
+        with self._save_lock:
+            with self._lock:
+                if self._save_timer is not None:
+                    self._save_timer.cancel()
+                    self._save_timer = None
+                snapshot = list(self._cache.items())
+            os.makedirs(os.path.dirname(self.cache_path) or ".", exist_ok=True)
+            tmp = f"{self.cache_path}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(snapshot, f)
+            os.replace(tmp, self.cache_path)